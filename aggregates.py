@@ -0,0 +1,240 @@
+import numpy as np
+import pandas as pd
+
+from filter_index import FILTER_KEYS, category_codes, selected_values
+
+# Additive partial aggregates (row count, per-column sum / sum of squares /
+# non-null count) for every (age_category, month_name, gender, *grouping)
+# cell, stored as dense arrays with one axis per key. A chart only ever
+# combines the cells of the current selection, so its cost depends on the
+# number of cells and not on the number of raw rows.
+
+NUMERIC_MEASURES = [
+    "duration_minutes", "calories_burned", "daily_steps", "stress_level",
+    "resting_heart_rate", "bmi", "hydration_level", "avg_heart_rate", "hours_sleep",
+]
+COUNTED_COLUMNS = ["intensity"]
+
+# Group-by columns used by the charts besides the filter keys themselves
+GROUPINGS = [
+    (),
+    ("activity_type",),
+    ("fitness_level",),
+    ("health_condition",),
+    ("type_wight",),
+    ("stress_level",),
+    ("activity_type", "fitness_level"),
+]
+
+
+def codes_against(column, labels):
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        mapping = np.append(labels.get_indexer(column.cat.categories), -1)
+        return mapping[column.cat.codes.to_numpy()]
+    return labels.get_indexer(column)
+
+
+def _weights(columns, stat, start, stop):
+    if stat == "rows":
+        return None
+    kind, col = stat
+    if kind == "count":
+        if ("present", col) in columns:
+            return columns[("present", col)][start:stop].astype(np.float64)
+        return ~np.isnan(columns[("values", col)][start:stop]) * 1.0
+    values = np.nan_to_num(columns[("values", col)][start:stop], nan=0.0)
+    return values ** 2 if kind == "sumsq" else values
+
+
+def reduce_rows(columns, shapes, stats, start=0, stop=None):
+    # Cube tables for rows [start, stop). Tables of disjoint row ranges add
+    # up to the tables of their union, which is what lets
+    # parallel_aggregates.py reduce ranges in separate processes.
+    row_cells = {}
+    for grouping, shape in shapes.items():
+        key_codes = [columns[("codes", key)][start:stop] for key in FILTER_KEYS + list(grouping)]
+        valid = np.logical_and.reduce([c >= 0 for c in key_codes])
+        row_cells[grouping] = (valid, np.ravel_multi_index([c[valid] for c in key_codes], shape))
+
+    tables = {grouping: np.zeros(shape + (len(stats),)) for grouping, shape in shapes.items()}
+    for stat, position in stats.items():
+        weights = _weights(columns, stat, start, stop)
+        for grouping, (valid, flat) in row_cells.items():
+            shape = shapes[grouping]
+            w = None if weights is None else weights[valid]
+            tables[grouping][..., position] = np.bincount(
+                flat, weights=w, minlength=int(np.prod(shape))).reshape(shape)
+    return tables
+
+
+class AggregateCube:
+
+    def __init__(self, data, groupings=GROUPINGS, measures=NUMERIC_MEASURES, counted=COUNTED_COLUMNS,
+                 labels=None, workers=1, executor=None):
+        self.measures = [col for col in measures if col in data.columns]
+        self.counted = [col for col in counted if col in data.columns]
+        self.integer = {col for col in self.measures if pd.api.types.is_integer_dtype(data[col])}
+
+        self.stats = {"rows": 0}
+        for col in self.measures:
+            for stat in ("sum", "sumsq", "count"):
+                self.stats[(stat, col)] = len(self.stats)
+        for col in self.counted:
+            self.stats[("count", col)] = len(self.stats)
+
+        self.labels = {}
+        codes = {}
+        for col in dict.fromkeys(FILTER_KEYS + [col for grouping in groupings for col in grouping]):
+            if labels is None:
+                codes[col], col_labels = category_codes(data[col])
+                self.labels[col] = pd.Index(col_labels, name=col)
+            else:
+                self.labels[col] = labels[col]
+                codes[col] = codes_against(data[col], labels[col])
+
+        columns = {("codes", col): col_codes for col, col_codes in codes.items()}
+        for col in self.measures:
+            columns[("values", col)] = data[col].to_numpy(np.float64, na_value=np.nan)
+        for col in self.counted:
+            columns[("present", col)] = data[col].notna().to_numpy()
+        shapes = {grouping: tuple(len(self.labels[key]) for key in FILTER_KEYS + list(grouping))
+                  for grouping in groupings}
+        # More than one worker reduces row ranges in a process pool
+        if workers > 1:
+            from parallel_aggregates import reduce_parallel
+            self.tables = reduce_parallel(columns, shapes, self.stats, workers, executor)
+        else:
+            self.tables = reduce_rows(columns, shapes, self.stats)
+
+    def merge(self, rows):
+        # New cube with `rows` added. Only the new rows are reduced; the
+        # existing cells are copied into the (possibly larger) label space,
+        # where values not seen before get appended labels.
+        labels = {}
+        for col, current in self.labels.items():
+            values = pd.Index(pd.unique(rows[col].dropna().to_numpy()))
+            extra = values[~values.isin(current)]
+            labels[col] = current.append(extra).rename(col) if len(extra) else current
+        merged = AggregateCube(rows, list(self.tables), self.measures, self.counted, labels=labels)
+        merged.integer |= self.integer
+        for grouping, table in self.tables.items():
+            merged.tables[grouping][tuple(slice(0, n) for n in table.shape)] += table
+        return merged
+
+    def grouping_for(self, by):
+        grouping = {col for col in by if col not in FILTER_KEYS}
+        for candidate in self.tables:
+            if set(candidate) == grouping:
+                return candidate
+        raise KeyError(f"no precomputed grouping covers {list(by)}")
+
+    def codes_for(self, col, values):
+        return self.labels[col].get_indexer(values)
+
+    def select(self, gender, age_category, month):
+        return CubeView(self, {
+            "age_category": selected_values(age_category),
+            "month_name": selected_values(month),
+            "gender": selected_values(gender),
+        })
+
+
+class CubeView:
+
+    def __init__(self, cube, selection):
+        self.cube = cube
+        # Filter key -> selected label codes, None meaning every value
+        self.codes = {}
+        for col, values in selection.items():
+            if values is not None:
+                codes = cube.codes_for(col, values)
+                self.codes[col] = codes[codes >= 0]
+
+    def cells(self, by=()):
+        by = [by] if isinstance(by, str) else list(by)
+        grouping = self.cube.grouping_for(by)
+        table = self.cube.tables[grouping]
+        dims = FILTER_KEYS + list(grouping)
+        for axis, dim in enumerate(dims):
+            if dim in self.codes:
+                table = table.take(self.codes[dim], axis=axis)
+        table = table.sum(axis=tuple(axis for axis, dim in enumerate(dims) if dim not in by))
+        kept = [dim for dim in dims if dim in by]
+        labels = [self._labels(dim) for dim in by]
+        return np.moveaxis(table, [kept.index(dim) for dim in by], range(len(by))), labels
+
+    def _labels(self, dim):
+        labels = self.cube.labels[dim]
+        return labels[self.codes[dim]] if dim in self.codes else labels
+
+    def _series(self, values, rows, labels, name):
+        observed = np.nonzero(rows > 0)
+        if len(labels) == 1:
+            index = labels[0][observed[0]]
+        else:
+            index = pd.MultiIndex.from_arrays([level[codes] for level, codes in zip(labels, observed)])
+        return pd.Series(values[observed], index=index, name=name)
+
+    def _stat(self, cells, stat):
+        return cells[..., self.cube.stats[stat]]
+
+    def agg(self, by, column, how):
+        cells, labels = self.cells(by)
+        count = self._stat(cells, ("count", column))
+        if how == "count":
+            result = count.astype(np.int64)
+        elif how == "sum":
+            result = self._stat(cells, ("sum", column))
+            if column in self.cube.integer:
+                result = result.astype(np.int64)
+        else:
+            total = self._stat(cells, ("sum", column))
+            with np.errstate(invalid="ignore", divide="ignore"):
+                if how == "mean":
+                    result = total / count
+                elif how in ("var", "std"):
+                    result = (self._stat(cells, ("sumsq", column)) - total ** 2 / count) / (count - 1)
+                    result = np.where(count > 1, np.clip(result, 0, None), np.nan)
+                    result = np.sqrt(result) if how == "std" else result
+                else:
+                    raise ValueError(f"unsupported aggregation {how!r}")
+        if not labels:
+            return result[()]
+        return self._series(result, self._stat(cells, "rows"), labels, column)
+
+    def mean(self, column):
+        return self.agg((), column, "mean")
+
+    def rows(self):
+        cells, _ = self.cells()
+        return int(self._stat(cells, "rows"))
+
+    def value_counts(self, column):
+        # Sorted like pandas sorts a categorical column's counts: every label
+        # in label order, zeros included, so that ties come out the same way
+        cells, labels = self.cells(column)
+        rows = pd.Series(self._stat(cells, "rows").astype(np.int64), index=labels[0], name="count")
+        counts = rows.reindex(self.cube.labels[column], fill_value=0).sort_values(ascending=False)
+        return counts[counts > 0]
+
+
+class FrameView:
+    # Same interface as CubeView, computed directly from raw rows
+
+    def __init__(self, data):
+        self.data = data
+
+    def agg(self, by, column, how):
+        if not len(by):
+            return getattr(self.data[column], how)()
+        return self.data.groupby(by, observed=True)[column].agg(how)
+
+    def mean(self, column):
+        return self.data[column].mean()
+
+    def rows(self):
+        return len(self.data)
+
+    def value_counts(self, column):
+        counts = self.data[column].value_counts()
+        return counts[counts > 0]
@@ -0,0 +1,53 @@
+import argparse
+import itertools
+import time
+
+import numpy as np
+
+from aggregates import AggregateCube, FrameView
+from benchmarks.checks import QUERIES, assert_same, run
+from benchmarks.synthetic import make_dataset
+from data_store import optimize_dtypes
+from filter_index import FilterIndex
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chart aggregation cost from raw rows vs the aggregate cube.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[68_240, 682_400, 2_729_600])
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        df = optimize_dtypes(make_dataset(rows))
+        index = FilterIndex(df)
+        start = time.perf_counter()
+        cube = AggregateCube(df)
+        build = time.perf_counter() - start
+
+        selections = list(itertools.product(["All"] + index.options['gender'],
+                                            index.options['age_category'],
+                                            index.options['month_name']))
+        raw_times, cube_times = [], []
+        for selection in selections:
+            start = time.perf_counter()
+            frame_view = FrameView(index.select(*selection))
+            expected = [run(frame_view, query) for query in QUERIES]
+            raw_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            cube_view = cube.select(*selection)
+            actual = [run(cube_view, query) for query in QUERIES]
+            cube_times.append(time.perf_counter() - start)
+
+            for query, want, got in zip(QUERIES, expected, actual):
+                assert_same(want, got, query, selection)
+
+        print(f"\n{rows:,} rows, {len(selections)} selections x {len(QUERIES)} aggregations "
+              f"match pandas; cube built in {build:.2f}s")
+        print(f"{'source':<10}{'p50 ms/rerun':>14}{'p95 ms/rerun':>14}")
+        for name, timings in [("raw rows", raw_times), ("cube", cube_times)]:
+            timings = np.array(timings) * 1e3
+            print(f"{name:<10}{np.percentile(timings, 50):>14.2f}{np.percentile(timings, 95):>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import argparse
+import json
+import os
+import platform
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import make_dataset
+from charts import CHARTS, METRICS, Selection, all_filters
+from data_store import DASHBOARD_COLUMNS, optimize_dtypes
+from incremental import Snapshot
+
+# Runs the data preparation of every chart and page metric for every sidebar
+# selection, without Streamlit, and writes the timings as JSON so two runs
+# can be compared with --baseline.
+
+
+def measure(call, trace):
+    if trace:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    result = call()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] - before if trace else 0
+    return result, elapsed, peak
+
+
+def run_pass(dataset, timings, peaks, figures, trace):
+    def record(name, call):
+        result, elapsed, peak = measure(call, trace)
+        if trace:
+            peaks[name] = max(peaks[name], peak)
+        else:
+            timings[name].append(elapsed)
+        return result
+
+    for filters in all_filters(dataset.index):
+        selection = record("selection", lambda: Selection(dataset, *filters))
+        for metric_id, metric in METRICS.items():
+            record(metric_id, lambda: metric(selection))
+        for chart_id, chart in CHARTS.items():
+            prepared = record(chart_id, lambda: chart.prepare(selection))
+            if figures:
+                record(f"{chart_id} (figure)", lambda: chart.figure(prepared))
+
+
+def run_size(rows, figures, trace):
+    data = optimize_dtypes(make_dataset(rows))[DASHBOARD_COLUMNS]
+    start = time.perf_counter()
+    dataset = Snapshot.build(data)
+    build = time.perf_counter() - start
+
+    names = ["selection"] + list(METRICS) + list(CHARTS)
+    if figures:
+        names += [f"{chart_id} (figure)" for chart_id in CHARTS]
+    timings = {name: [] for name in names}
+    peaks = dict.fromkeys(names, 0)
+
+    run_pass(dataset, timings, peaks, figures, trace=False)
+    if trace:
+        # Separate pass: tracemalloc slows down every allocation it records.
+        # Figures are plotly objects, so only the data preparation is traced.
+        tracemalloc.start()
+        try:
+            run_pass(dataset, timings, peaks, figures=False, trace=True)
+        finally:
+            tracemalloc.stop()
+
+    charts = {}
+    for name, values in timings.items():
+        values = np.array(values) * 1e3
+        charts[name] = {
+            "calls": len(values), "total_ms": values.sum(), "p50_ms": np.percentile(values, 50),
+            "p95_ms": np.percentile(values, 95), "max_ms": values.max(), "peak_kb": peaks[name] / 1024,
+        }
+    return {"rows": rows, "selections": len(timings["selection"]), "build_s": build, "charts": charts}
+
+
+def print_size(result, baseline):
+    previous = {}
+    for entry in (baseline or {}).get("results", []):
+        if entry["rows"] == result["rows"]:
+            previous = entry["charts"]
+    print(f"\n{result['rows']:,} rows, {result['selections']} selections, "
+          f"index + cube + bins built in {result['build_s']:.2f}s")
+    header = f"{'chart':<58}{'p50 ms':>9}{'p95 ms':>9}{'total ms':>10}{'peak KB':>10}"
+    print(header + (f"{'vs base':>9}" if previous else ""))
+    rows = sorted(result["charts"].items(), key=lambda item: -item[1]["total_ms"])
+    for name, stats in rows:
+        line = (f"{name:<58}{stats['p50_ms']:>9.3f}{stats['p95_ms']:>9.3f}"
+                f"{stats['total_ms']:>10.1f}{stats['peak_kb']:>10.1f}")
+        if name in previous and previous[name]["total_ms"] > 0:
+            line += f"{stats['total_ms'] / previous[name]['total_ms']:>8.2f}x"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-chart data preparation cost over every sidebar selection.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[68_240, 682_400, 2_729_600])
+    parser.add_argument("--figures", action="store_true", help="also time building each plotly figure")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass that measures peak memory")
+    parser.add_argument("--output", default="bench_dashboard.json")
+    parser.add_argument("--baseline", help="results of an earlier run to compare against")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results = []
+    for rows in args.rows:
+        result = run_size(rows, args.figures, not args.no_memory)
+        print_size(result, baseline)
+        results.append(result)
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(), "pandas": pd.__version__, "numpy": np.__version__,
+        "cpus": os.cpu_count(), "figures": args.figures, "memory": not args.no_memory,
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=1, default=float)
+    print(f"\nWrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
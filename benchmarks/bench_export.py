@@ -0,0 +1,95 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from aggregates import FrameView
+from benchmarks.synthetic import make_dataset
+from charts import CHARTS, METRICS, Selection, all_filters
+from data_store import DASHBOARD_COLUMNS, optimize_dtypes
+from export_reports import SKIPPED_METRICS, combination_data, export
+from filter_index import FILTER_KEYS
+from incremental import Snapshot
+
+# Batch export: the chart data of every combination from one pass
+# (export_reports.combination_data) against one filter per combination,
+# then the whole export across worker counts and output formats.
+
+
+class MaskSelection:
+    # One combination's rows filtered out with boolean masks and aggregated
+    # by pandas, as the dashboard did before the filter index and cube
+
+    def __init__(self, data, bins, gender, age_category, month):
+        mask = np.ones(len(data), dtype=bool)
+        for col, value in zip(FILTER_KEYS, (age_category, month, gender)):
+            if value != "All":
+                mask &= (data[col] == value).to_numpy()
+        self.rows = data[mask]
+        self.view = FrameView(self.rows)
+        self.bins = bins
+
+    def __len__(self):
+        return len(self.rows)
+
+    def columns(self, *names):
+        return self.rows[list(names)]
+
+    def column(self, name):
+        return self.rows[name].to_numpy()
+
+
+def prepare_each(dataset, make_selection):
+    for filters in all_filters(dataset.index):
+        selection = make_selection(filters)
+        for metric_id, metric in METRICS.items():
+            if metric_id not in SKIPPED_METRICS:
+                metric(selection)
+        for chart in CHARTS.values():
+            chart.prepare(selection)
+
+
+def timed(call):
+    start = time.perf_counter()
+    call()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch export: one-pass aggregates and parallel figure rendering.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[170_600, 682_400, 2_729_600])
+    parser.add_argument("--export-rows", type=int, default=170_600)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--formats", nargs="+", default=["json", "html"])
+    args = parser.parse_args()
+    print(f"{os.cpu_count()} CPUs available")
+
+    print("\nChart data for every combination, seconds")
+    print(f"{'rows':>12}{'combinations':>14}{'one pass':>10}{'per index':>11}{'per mask':>10}")
+    for rows in args.rows:
+        dataset = Snapshot.build(optimize_dtypes(make_dataset(rows))[DASHBOARD_COLUMNS])
+        one_pass = timed(lambda: combination_data(dataset))
+        per_index = timed(lambda: prepare_each(dataset, lambda filters: Selection(dataset, *filters)))
+        per_mask = timed(lambda: prepare_each(dataset, lambda filters: MaskSelection(
+            dataset.index.data, dataset.bins, *filters)))
+        print(f"{rows:>12,}{len(all_filters(dataset.index)):>14}{one_pass:>10.2f}{per_index:>11.2f}{per_mask:>10.2f}")
+
+    data = optimize_dtypes(make_dataset(args.export_rows))[DASHBOARD_COLUMNS]
+    print(f"\nWhole export, {args.export_rows:,} rows")
+    print(f"{'format':<8}{'workers':>8}{'wall s':>9}{'comb/s':>9}{'aggregate s':>13}{'figures s':>11}{'MB':>8}")
+    for fmt in args.formats:
+        for workers in args.workers:
+            output_dir = tempfile.mkdtemp(prefix="bench_export_")
+            try:
+                stats = export(data, output_dir, fmt, workers)
+            finally:
+                shutil.rmtree(output_dir)
+            print(f"{fmt:<8}{workers:>8}{stats['wall s']:>9.2f}{stats['combinations per s']:>9.1f}"
+                  f"{stats['aggregate s']:>13.2f}{stats['render s']:>11.2f}{stats['bytes'] / 2 ** 20:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+import numpy as np
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.synthetic import write_dataset
+
+DEPLOY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "deploy.py")
+
+
+def simulate(data_dir, cache_mb, sessions, steps, seed):
+    # Each AppTest is one browser session; popular filter combinations are
+    # drawn more often (Zipf-like), as with real dashboard traffic.
+    os.chdir(data_dir)
+    os.environ["FIGURE_CACHE_MB"] = str(cache_mb)
+    os.environ["PREFETCH_WORKERS"] = "0"  # measures the cache on its own
+    os.environ["DASHBOARD_DIAGNOSTICS"] = "1"  # the cache counters are shown there
+    rng = np.random.default_rng(seed)
+    apps = [AppTest.from_file(DEPLOY, default_timeout=600) for _ in range(sessions)]
+    for app in apps:
+        app.run()
+    genders, ages, months = (app.sidebar.multiselect[i].options for i in range(3))
+    combos = [(g, [a], [m]) for g in [[]] + [[g] for g in genders] for a in ages for m in months]
+    popularity = 1 / np.arange(1, len(combos) + 1)
+    popularity /= popularity.sum()
+
+    latencies = []
+    for _ in range(steps):
+        app = apps[rng.integers(sessions)]
+        gender, age, month = combos[rng.choice(len(combos), p=popularity)]
+        section_radio = app.main.radio[0]
+        section_radio.set_value(section_radio.options[rng.integers(len(section_radio.options))])
+        app.sidebar.multiselect[0].set_value(gender)
+        app.sidebar.multiselect[1].set_value(age)
+        app.sidebar.multiselect[2].set_value(month)
+        start = time.perf_counter()
+        app.run()
+        latencies.append(time.perf_counter() - start)
+        assert not app.exception, app.exception
+
+    # The cache lives inside the app's resource cache; read its counters
+    # from the Diagnostics page.
+    apps[0].sidebar.radio[0].set_value("Diagnostics").run()
+    titles = [header.value for header in apps[0].subheader]
+    stats = apps[0].dataframe[titles.index("Figure cache")].value['value']
+    return np.array(latencies) * 1e3, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulated multi-session load on the dashboard with and without the figure cache.")
+    parser.add_argument("--rows", type=int, default=682_400)
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--steps", type=int, default=300)
+    parser.add_argument("--cache-mb", type=int, default=256)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_dataset(os.path.join(tmp, "sampled_data.csv"), args.rows)
+        print(f"{args.rows:,} rows, {args.sessions} sessions, {args.steps} reruns")
+        print(f"{'figure cache':<14}{'p50 ms':>9}{'p95 ms':>9}{'hit rate':>10}{'cached MB':>11}")
+        for cache_mb in (0, args.cache_mb):
+            # A fresh interpreter per run, so both start from empty caches
+            with multiprocessing.get_context("spawn").Pool(1) as pool:
+                latencies, stats = pool.apply(simulate, (tmp, cache_mb, args.sessions, args.steps, 0))
+            label = "off" if cache_mb == 0 else f"{cache_mb} MB"
+            print(f"{label:<14}{np.percentile(latencies, 50):>9.1f}{np.percentile(latencies, 95):>9.1f}"
+                  f"{stats['hit rate']:>10.2f}{stats['MB']:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
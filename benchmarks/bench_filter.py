@@ -0,0 +1,56 @@
+import argparse
+import itertools
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import make_dataset
+from data_store import optimize_dtypes
+from filter_index import FilterIndex
+
+
+def mask_filter(df, gender, age_category, month):
+    if gender == "All":
+        return df[(df['age_category'] == age_category) & (df['month_name'] == month)]
+    return df[(df['gender'] == gender) & (df['age_category'] == age_category) & (df['month_name'] == month)]
+
+
+def time_selections(select, selections, repeat):
+    timings = []
+    for selection in selections:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            select(*selection)
+        timings.append((time.perf_counter() - start) / repeat)
+    return np.array(timings) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Filter latency of boolean masks vs the prebuilt FilterIndex.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[68_240, 682_400, 2_729_600])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        df = optimize_dtypes(make_dataset(rows))
+        start = time.perf_counter()
+        index = FilterIndex(df)
+        build = time.perf_counter() - start
+
+        selections = list(itertools.product(["All"] + index.options['gender'],
+                                            index.options['age_category'],
+                                            index.options['month_name']))
+        for selection in selections[:: max(1, len(selections) // 10)]:
+            expected = mask_filter(df, *selection)
+            assert len(index.select(*selection)) == len(expected), selection
+
+        masks = time_selections(lambda *s: mask_filter(df, *s), selections, args.repeat)
+        indexed = time_selections(index.select, selections, args.repeat)
+        print(f"\n{rows:,} rows, {len(selections)} selections, index built in {build:.3f}s")
+        print(f"{'filter':<14}{'p50 ms':>10}{'p95 ms':>10}")
+        for name, timings in [("masks", masks), ("FilterIndex", indexed)]:
+            print(f"{name:<14}{np.percentile(timings, 50):>10.3f}{np.percentile(timings, 95):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import make_dataset
+from bitmap_index import RANGE_COLUMNS
+from data_store import DASHBOARD_COLUMNS, optimize_dtypes
+from filter_index import FILTER_KEYS, FilterIndex
+
+# Filters of 1 to 5 conditions (multi-selects on the filter keys, ranges on
+# numeric columns) evaluated with chained pandas masks and with the bitmap
+# index, over the same rows. Both must select the same row numbers.
+
+
+def random_conditions(index, rng, n_conditions):
+    categories, ranges = {}, {}
+    for col in rng.permutation(FILTER_KEYS + RANGE_COLUMNS)[:n_conditions]:
+        if col in FILTER_KEYS:
+            labels = index.options[col]
+            categories[col] = list(rng.choice(labels, rng.integers(1, len(labels) + 1), replace=False))
+        else:
+            low, high = sorted(np.quantile(index.data[col], rng.uniform(size=2)))
+            ranges[col] = (low, high)
+    return categories, ranges
+
+
+def mask_rows(data, categories, ranges):
+    mask = np.ones(len(data), dtype=bool)
+    for col, labels in categories.items():
+        mask &= data[col].isin(labels).to_numpy()
+    for col, (low, high) in ranges.items():
+        if data[col].dtype.kind == "f":
+            # Bounds in the column's own precision, as BitmapIndex.between compares them
+            low, high = data[col].dtype.type(low), data[col].dtype.type(high)
+        mask &= data[col].between(low, high).to_numpy()
+    return np.flatnonzero(mask)
+
+
+def timed(call):
+    start = time.perf_counter()
+    result = call()
+    return result, (time.perf_counter() - start) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pandas masks vs the bitmap index for filters of 1 to 5 conditions.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[682_400, 2_729_600])
+    parser.add_argument("--filters", type=int, default=50, help="random filters per condition count")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        index = FilterIndex(optimize_dtypes(make_dataset(rows))[DASHBOARD_COLUMNS])
+        # The same rows with object columns, as read straight from the CSV
+        objects = index.data.astype({col: object for col in FILTER_KEYS})
+        bitmaps = index.bitmaps
+        start = time.perf_counter()
+        for col in FILTER_KEYS:
+            bitmaps.categories(col, [])
+        for col in RANGE_COLUMNS:
+            bitmaps.between(col, 0, 0)
+        build = time.perf_counter() - start
+
+        rng = np.random.default_rng(args.seed)
+        print(f"\n{rows:,} rows, bitmaps and sorted columns built in {build:.2f}s, "
+              f"{args.filters} random filters per condition count")
+        print(f"{'conditions':<12}{'object mask':>13}{'category mask':>15}{'bitmap':>10}{'speedup':>9}{'rows':>10}")
+        for n_conditions in range(1, 6):
+            timings = {"object": [], "category": [], "bitmap": []}
+            selected = []
+            for _ in range(args.filters):
+                categories, ranges = random_conditions(index, rng, n_conditions)
+                expected, elapsed = timed(lambda: mask_rows(objects, categories, ranges))
+                timings["object"].append(elapsed)
+                _, elapsed = timed(lambda: mask_rows(index.data, categories, ranges))
+                timings["category"].append(elapsed)
+                actual, elapsed = timed(lambda: bitmaps.rows(categories, ranges))
+                timings["bitmap"].append(elapsed)
+                assert np.array_equal(expected, actual), (categories, ranges)
+                selected.append(len(actual))
+            p50 = {name: np.percentile(values, 50) for name, values in timings.items()}
+            print(f"{n_conditions:<12}{p50['object']:>10.2f} ms{p50['category']:>12.2f} ms{p50['bitmap']:>7.2f} ms"
+                  f"{p50['category'] / p50['bitmap']:>8.1f}x{np.median(selected):>10,.0f}")
+
+
+if __name__ == "__main__":
+    main()
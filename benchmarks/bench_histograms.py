@@ -0,0 +1,57 @@
+import argparse
+import time
+
+import numpy as np
+import plotly.express as px
+
+from benchmarks.synthetic import make_dataset
+from data_store import optimize_dtypes
+from filter_index import FilterIndex
+from histograms import HistogramBins, histogram
+
+# (x, color) of the raw-row histograms on page 1
+CHARTS = [
+    ("stress_level", "activity_type"),
+    ("resting_heart_rate", None),
+    ("stress_level", None),
+    ("stress_level", "health_condition"),
+    ("bmi", "health_condition"),
+    ("duration_minutes", "intensity"),
+    ("calories_burned", "type_wight"),
+    ("daily_steps", "type_wight"),
+]
+
+
+def measure(build):
+    start = time.perf_counter()
+    payload = len(build().to_json())
+    return time.perf_counter() - start, payload
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Payload and build time of px.histogram vs server-side binning.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[68_240, 682_400, 2_729_600])
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        df = optimize_dtypes(make_dataset(rows))
+        index = FilterIndex(df)
+        bins = HistogramBins(df)
+        selection = index.select("All", index.options['age_category'][0], index.options['month_name'][0])
+
+        print(f"\n{rows:,} rows, {len(selection):,} rows selected")
+        print(f"{'chart':<38}{'px ms':>9}{'px KB':>10}{'binned ms':>11}{'binned KB':>11}")
+        for x, color in CHARTS:
+            edges = bins.edges_for(x)
+            fig = histogram(selection, x, edges, color=color, barmode="group")
+            assert sum(np.sum(trace.y) for trace in fig.data) == selection[x].notna().sum()
+
+            px_time, px_bytes = measure(lambda: px.histogram(selection, x=x, color=color, barmode="group"))
+            binned_time, binned_bytes = measure(lambda: histogram(selection, x, edges, color=color, barmode="group"))
+            name = x if color is None else f"{x} by {color}"
+            print(f"{name:<38}{px_time * 1e3:>9.1f}{px_bytes / 1024:>10.1f}"
+                  f"{binned_time * 1e3:>11.1f}{binned_bytes / 1024:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.checks import QUERIES, assert_same_snapshot
+from benchmarks.synthetic import make_dataset, write_partition
+from data_store import DASHBOARD_COLUMNS, append_rows, optimize_dtypes
+from incremental import LiveDataset, Snapshot, read_partition
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merging appended partitions vs rebuilding the index and cube.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[68_240, 682_400, 2_729_600])
+    parser.add_argument("--batches", type=int, default=5)
+    parser.add_argument("--batch-frac", type=float, default=0.01)
+    parser.add_argument("--missing-every", type=int, default=50, help="every n-th row gets no gender; 0 for none")
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        df = optimize_dtypes(make_dataset(rows))[DASHBOARD_COLUMNS].copy()
+        if args.missing_every:
+            # Rows with a missing filter key are never selectable but must not move the others
+            df.iloc[::args.missing_every, df.columns.get_loc("gender")] = np.nan
+        batch_rows = max(1, int(rows * args.batch_frac))
+        n_base = rows - args.batches * batch_rows
+        base = df.iloc[:n_base].copy()
+        base.attrs["version"] = "base"
+
+        with tempfile.TemporaryDirectory() as directory:
+            live = LiveDataset(base, directory)
+            merge_times, rebuild_times = [], []
+            data = base
+            for part in range(args.batches):
+                batch = df.iloc[n_base + part * batch_rows:n_base + (part + 1) * batch_rows].copy()
+                if part == args.batches - 1:
+                    # A value no earlier row has, to exercise label growth
+                    batch["activity_type"] = batch["activity_type"].cat.add_categories(["Rowing"])
+                    batch.iloc[::7, batch.columns.get_loc("activity_type")] = "Rowing"
+                path = write_partition(directory, part, batch)
+                # Full rebuilds see the same parsed rows as the merge
+                data = append_rows(data, read_partition(path))
+
+                start = time.perf_counter()
+                merged = live.refresh()
+                merge_times.append(time.perf_counter() - start)
+                assert merged == len(batch)
+
+                start = time.perf_counter()
+                rebuilt = Snapshot.build(data)
+                rebuild_times.append(time.perf_counter() - start)
+
+            assert live.refresh() == 0
+            assert live.snapshot.version == f"base+{args.batches}"
+            checked = assert_same_snapshot(rebuilt, live.snapshot)
+
+        print(f"\n{n_base:,} base rows + {args.batches} x {batch_rows:,} appended rows; "
+              f"{checked} selections x {len(QUERIES)} aggregations match a full rebuild")
+        print(f"{'update':<14}{'mean s':>10}{'max s':>10}")
+        for name, timings in [("full rebuild", rebuild_times), ("merge", merge_times)]:
+            print(f"{name:<14}{np.mean(timings):>10.3f}{np.max(timings):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
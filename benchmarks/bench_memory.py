@@ -0,0 +1,150 @@
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.isolated import run_isolated
+from benchmarks.synthetic import write_dataset
+from charts import Selection, all_filters
+from data_store import CATEGORICAL_COLUMNS, convert_csv
+from incremental import Snapshot
+
+# Memory held by one dashboard process and group-by speed, for the plain
+# layout pd.read_csv produces (object strings, int64, float64) against the
+# compact one (categorical codes, downcast numbers, selections as row
+# positions into one shared frame). The dataset is loaded from a converted
+# store with Snapshot.load, as deploy.py does, and the memory a fresh process
+# keeps for it is measured alongside the arrays reachable from it.
+
+GROUPBYS = [["activity_type"], ["activity_type", "fitness_level"], ["age_category", "month_name", "gender"]]
+
+
+def plain_layout(data):
+    # What pd.read_csv returns for the same rows
+    plain = {}
+    for col in data.columns:
+        values = data[col]
+        if isinstance(values.dtype, pd.CategoricalDtype) or col == "date":
+            plain[col] = values.astype(str).astype(object)
+        elif pd.api.types.is_integer_dtype(values):
+            plain[col] = values.astype(np.int64)
+        else:
+            plain[col] = values.astype(np.float64)
+    return pd.DataFrame(plain)
+
+
+def footprint(value, seen):
+    # Bytes of the arrays and frames reachable from value and not in seen
+    if isinstance(value, np.ndarray):
+        while isinstance(value.base, np.ndarray):
+            value = value.base
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(np.sum(value.memory_usage(deep=True, index=False)))
+    if isinstance(value, pd.Index):
+        return value.memory_usage(deep=True)
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sum(footprint(v, seen) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(footprint(v, seen) for v in value)
+    if hasattr(value, "__dict__"):
+        return sum(footprint(v, seen) for v in vars(value).values())
+    return 0
+
+
+def codes_mean(data, by, column):
+    # Mean per group straight from the categorical codes
+    codes = [data[col].cat.codes.to_numpy().astype(np.int64) for col in by]
+    shape = tuple(len(data[col].cat.categories) for col in by)
+    flat = np.ravel_multi_index(codes, shape)
+    values = data[column].to_numpy(np.float64)
+    counts = np.bincount(flat, minlength=int(np.prod(shape)))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.bincount(flat, weights=values, minlength=len(counts)) / counts
+
+
+def best_of(call, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1e3
+
+
+def mb(n_bytes):
+    return n_bytes / 2**20
+
+
+def report(rows, csv_path, store_path):
+    dataset = Snapshot.load(store_path, csv_path)
+    compact = dataset.index.data
+    plain = plain_layout(compact)
+    for col in CATEGORICAL_COLUMNS:
+        if col in compact.columns:
+            dataset.index.bitmaps.categories(col, [])
+
+    print(f"\n{rows:,} rows, {len(compact.columns)} dashboard columns")
+    print(f"{'column':<22}{'plain':>12}{'compact':>22}")
+    plain_bytes, compact_bytes = plain.memory_usage(deep=True), compact.memory_usage(deep=True)
+    for col in compact.columns:
+        print(f"{col:<22}{mb(plain_bytes[col]):>9.1f} MB{mb(compact_bytes[col]):>9.1f} MB  {str(compact[col].dtype):<11}")
+    print(f"{'frame':<22}{mb(plain_bytes.sum()):>9.1f} MB{mb(compact_bytes.sum()):>9.1f} MB")
+
+    # One process holds the sorted index frame plus every derived structure;
+    # sessions share them through st.cache_resource
+    seen = set()
+    parts = {name: footprint(getattr(dataset, name), seen) for name in ("index", "cube", "bins", "participants", "sketches")}
+    print("per process: " + ", ".join(f"{name} {mb(n):.1f} MB" for name, n in parts.items())
+          + f", total {mb(sum(parts.values())):.1f} MB")
+    held = run_isolated("from incremental import Snapshot", f"Snapshot.load({store_path!r}, {csv_path!r})")
+    print(f"Snapshot.load in a fresh process: {held['held_mb']:.1f} MB resident afterwards, "
+          f"{held['rss_mb']:.1f} MB peak while loading, {held['seconds']:.2f} s")
+
+    # A filtered copy per selection, as before, against row positions
+    copies, positions = [], []
+    for filters in all_filters(dataset.index):
+        selection = Selection(dataset, *filters)
+        n = len(selection.rows)
+        copies.append(plain_bytes.sum() * n / rows)
+        positions.append(0 if isinstance(selection.positions, slice) else selection.positions.nbytes)
+    multi = Selection(dataset, [], dataset.index.options['age_category'][:2], dataset.index.options['month_name'][:6])
+    print(f"selection: plain copy {mb(np.mean(copies)):.2f} MB on average vs {mb(np.mean(positions)):.2f} MB "
+          f"of positions; a 2 age x 6 month multi-select keeps {mb(multi.positions.nbytes):.1f} MB of positions "
+          f"for {len(multi.positions):,} rows ({mb(plain_bytes.sum() * len(multi.positions) / rows):.1f} MB copied plain)")
+
+    print(f"{'group by':<40}{'plain object':>14}{'categorical':>14}{'codes':>10}")
+    for by in GROUPBYS:
+        expected = plain.groupby(by)["calories_burned"].mean()
+        actual = codes_mean(compact, by, "calories_burned")
+        assert np.allclose(np.sort(expected.to_numpy()), np.sort(actual[~np.isnan(actual)]), rtol=1e-6)
+        timings = (
+            best_of(lambda: plain.groupby(by)["calories_burned"].mean()),
+            best_of(lambda: compact.groupby(by, observed=True)["calories_burned"].mean()),
+            best_of(lambda: codes_mean(compact, by, "calories_burned")),
+        )
+        print(f"{' x '.join(by):<40}" + "".join(f"{t:>11.1f} ms" if i < 2 else f"{t:>7.1f} ms"
+                                               for i, t in enumerate(timings)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory per dashboard process and group-by speed, plain vs compact.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[682_400, 2_729_600])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            csv_path = write_dataset(os.path.join(tmp, f"data_{rows}.csv"), rows)
+            store_path = os.path.join(tmp, f"data_{rows}.feather")
+            convert_csv(csv_path, store_path)
+            report(rows, csv_path, store_path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import argparse
+import os
+import time
+
+import numpy as np
+
+from aggregates import AggregateCube
+from benchmarks.synthetic import make_dataset
+from data_store import optimize_dtypes
+from parallel_aggregates import make_executor
+
+
+def timed(build, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        cube = build()
+        timings.append(time.perf_counter() - start)
+    return cube, min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate cube build time across process-pool sizes.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[682_400, 2_729_600])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    print(f"{os.cpu_count()} CPUs available")
+
+    for rows in args.rows:
+        df = optimize_dtypes(make_dataset(rows))
+        serial, serial_time = timed(lambda: AggregateCube(df), args.repeat)
+        print(f"\n{rows:,} rows")
+        print(f"{'workers':<10}{'cold s':>10}{'warm s':>10}{'speedup':>10}")
+        print(f"{'serial':<10}{serial_time:>10.3f}{serial_time:>10.3f}{1:>10.2f}")
+        for workers in args.workers:
+            # cold: the pool is started for the build, as deploy.py does once
+            cube, cold = timed(lambda: AggregateCube(df, workers=workers), 1)
+            with make_executor(workers) as executor:
+                AggregateCube(df, workers=workers, executor=executor)  # start the workers
+                cube, warm = timed(lambda: AggregateCube(df, workers=workers, executor=executor), args.repeat)
+            for grouping, table in serial.tables.items():
+                assert np.allclose(table, cube.tables[grouping]), (workers, grouping)
+            print(f"{workers:<10}{cold:>10.3f}{warm:>10.3f}{serial_time / warm:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
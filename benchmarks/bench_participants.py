@@ -0,0 +1,65 @@
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import make_dataset
+from data_store import optimize_dtypes
+from participants import TIMELINE_COLUMNS, WINDOWS, ParticipantIndex
+
+
+def mask_timeline(df, participant_id):
+    history = df[df['participant_id'] == participant_id].sort_values('date', kind='stable').set_index('date')
+    timeline = {}
+    for col in TIMELINE_COLUMNS:
+        values = history[col].astype(float)
+        timeline[col] = values.groupby(level=0).mean()
+        for window in WINDOWS:
+            timeline[f"{col}_{window}d"] = values.rolling(f"{window}D").mean().groupby(level=0).last()
+    return timeline
+
+
+def time_lookups(lookup, participants):
+    timings = []
+    for participant_id in participants:
+        start = time.perf_counter()
+        lookup(participant_id)
+        timings.append(time.perf_counter() - start)
+    return np.array(timings) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency of random participant timeline lookups.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[682_400, 2_729_600])
+    parser.add_argument("--lookups", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        df = optimize_dtypes(make_dataset(rows))
+        start = time.perf_counter()
+        index = ParticipantIndex(df)
+        build = time.perf_counter() - start
+
+        rng = np.random.default_rng(args.seed)
+        participants = rng.choice(index.ids, args.lookups)
+        for participant_id in participants[:10]:
+            expected, actual = mask_timeline(df, participant_id), index.timeline(participant_id)
+            for col, values in expected.items():
+                assert np.allclose(values.to_numpy(), actual[col].to_numpy(), equal_nan=True), (participant_id, col)
+
+        results = [
+            ("mask rows", time_lookups(lambda p: df[df['participant_id'] == p], participants)),
+            ("mask + rolling", time_lookups(lambda p: mask_timeline(df, p), participants)),
+            ("index rows", time_lookups(index.history, participants)),
+            ("index + rolling", time_lookups(index.timeline, participants)),
+        ]
+        print(f"\n{rows:,} rows, {len(index.ids):,} participants, {args.lookups} random lookups, "
+              f"index built in {build:.2f}s")
+        print(f"{'lookup':<18}{'p50 ms':>10}{'p95 ms':>10}")
+        for name, timings in results:
+            print(f"{name:<18}{np.percentile(timings, 50):>10.3f}{np.percentile(timings, 95):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import make_dataset
+from charts import CHARTS, Selection
+from data_store import DASHBOARD_COLUMNS, optimize_dtypes
+from figure_cache import FigureCache
+from incremental import Snapshot
+from prefetch import MONTHS, Prefetcher, adjacent_selections
+
+# A user clicking through one dashboard section, with and without the
+# prefetcher: each click builds the section's charts through the figure
+# cache (as a rerun does, minus Streamlit), then the user reads the page for
+# --think seconds while the prefetcher works. "months" steps through the
+# months for each gender and age category; "random" jumps anywhere, which
+# mostly wastes the prefetched work.
+
+
+def clicks(index, pattern, count, rng):
+    genders = [[]] + [[g] for g in index.options['gender']]
+    ages = index.options['age_category']
+    if pattern == "months":
+        steps = [(gender, [age], [month]) for gender in genders for age in ages for month in MONTHS]
+        return steps[:count]
+    return [(genders[rng.integers(len(genders))], [ages[rng.integers(len(ages))]], [MONTHS[rng.integers(12)]])
+            for _ in range(count)]
+
+
+def session(dataset, chart_ids, steps, think, workers):
+    cache = FigureCache()
+    cache.invalidate(dataset.version)
+    prefetcher = Prefetcher(cache, workers) if workers else None
+    latencies = []
+    for gender, age, month in steps:
+        start = time.perf_counter()
+        if prefetcher:
+            prefetcher.start_rerun("user")
+        selection = Selection(dataset, gender, age, month)
+        for chart_id in chart_ids:
+            cache.get_or_build(chart_id, selection.filters, lambda: CHARTS[chart_id].build(selection))
+        latencies.append(time.perf_counter() - start)
+        if prefetcher:
+            prefetcher.finish_rerun("user")
+            adjacent = adjacent_selections(gender, age, month, dataset.index.options['gender'])
+            prefetcher.schedule("user", dataset, adjacent, chart_ids)
+        time.sleep(think)
+    stats = prefetcher.stats() if prefetcher else {}
+    if prefetcher:
+        prefetcher.shutdown()
+    return np.array(latencies) * 1e3, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Foreground latency with and without prefetching adjacent selections.")
+    parser.add_argument("--rows", type=int, default=682_400)
+    parser.add_argument("--section", default="activity_section")
+    parser.add_argument("--clicks", type=int, default=36)
+    parser.add_argument("--think", type=float, nargs="+", default=[1.0, 0.0], help="seconds between clicks")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    dataset = Snapshot.build(optimize_dtypes(make_dataset(args.rows))[DASHBOARD_COLUMNS])
+    chart_ids = [chart_id for chart_id in CHARTS if chart_id.startswith(args.section + ".")]
+    session(dataset, chart_ids, clicks(dataset.index, "months", 2, None), 0, 0)  # warm up
+
+    print(f"{args.rows:,} rows, {len(chart_ids)} charts in {args.section}, {args.clicks} clicks, "
+          f"{args.workers} prefetch worker(s)")
+    print(f"{'pattern':<9}{'think s':>8}{'prefetch':>10}{'p50 ms':>9}{'mean ms':>9}{'p95 ms':>9}{'built':>7}{'hit rate':>10}"
+          f"{'unused':>8}{'cancelled':>11}")
+    for pattern in ("months", "random"):
+        for think in args.think:
+            for workers in (0, args.workers):
+                steps = clicks(dataset.index, pattern, args.clicks, np.random.default_rng(args.seed))
+                latencies, stats = session(dataset, chart_ids, steps, think, workers)
+                line = (f"{pattern:<9}{think:>8.1f}{'on' if workers else 'off':>10}"
+                        f"{np.percentile(latencies, 50):>9.1f}{latencies.mean():>9.1f}"
+                        f"{np.percentile(latencies, 95):>9.1f}")
+                if stats:
+                    line += (f"{stats['charts built']:>7}{stats['hit rate']:>10.2f}{stats['unused']:>8}"
+                             f"{stats['selections cancelled']:>11}")
+                print(line)
+
+
+if __name__ == "__main__":
+    main()
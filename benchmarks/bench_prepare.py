@@ -0,0 +1,57 @@
+import argparse
+import filecmp
+import os
+import tempfile
+
+from benchmarks.isolated import run_isolated
+from benchmarks.synthetic import write_dataset
+
+# The in-memory preparation cell from "Streamlite Deployment.ipynb"
+NOTEBOOK = """
+import numpy as np
+import pandas as pd
+
+def notebook(source, output):
+    df = pd.read_csv(source)
+    num_participants = 3000
+    df["row_number"] = np.arange(len(df))
+    df["participant_id"] = (df["row_number"] % num_participants) + 1
+    df.drop(columns=["row_number"], inplace=True)
+    sample_participants = df["participant_id"].drop_duplicates().sample(frac=0.1, random_state=42)
+    sample_df = df[df["participant_id"].isin(sample_participants)]
+    sample_df.to_csv(output, index=False)
+    return {"rows_in": len(df)}
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput and peak memory of the notebook preparation vs prepare_data.py.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[682_400, 2_729_600])
+    parser.add_argument("--chunk-rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            source = write_dataset(os.path.join(tmp, f"source_{rows}.csv"), rows)
+            expected = os.path.join(tmp, "notebook.csv")
+            actual = os.path.join(tmp, "streamed.csv")
+            partitions = os.path.join(tmp, f"partitions_{rows}")
+            runs = {
+                "notebook (in memory)": (NOTEBOOK, f"notebook({source!r}, {expected!r})"),
+                "prepare_data (streamed)": ("from prepare_data import prepare",
+                                            f"prepare({source!r}, {actual!r}, {partitions!r}, "
+                                            f"chunk_rows={args.chunk_rows})"),
+            }
+
+            print(f"\n{rows:,} rows, {os.path.getsize(source) / 2**20:.0f} MB source")
+            print(f"{'pipeline':<26}{'seconds':>9}{'rows/s':>12}{'peak RSS MB':>14}")
+            for name, (setup, call) in runs.items():
+                result = run_isolated(setup, call, "result")
+                rate = result["report"]["rows_in"] / result["seconds"]
+                print(f"{name:<26}{result['seconds']:>9.2f}{rate:>12,.0f}{result['rss_mb']:>14.1f}")
+            assert filecmp.cmp(expected, actual, shallow=False), "streamed output differs from the notebook"
+            print("streamed output is byte-identical to the notebook's")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import argparse
+import time
+
+from benchmarks.synthetic import make_dataset
+from charts import CHARTS, Selection, all_filters
+from data_store import DASHBOARD_COLUMNS, optimize_dtypes
+from incremental import Snapshot
+from profiling import NULL_PROFILER, Profiler
+
+# Cost of the profiling layer: per span, and over the data preparation of
+# every chart for every selection (plotly figures are left out, since they
+# would hide the overhead), uninstrumented vs profiling off vs on.
+
+
+def span_cost(profiler, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        with profiler.span("chart", "prepare") as span:
+            span["rows"] = 0
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def prepare_all(dataset, profiler):
+    start = time.perf_counter()
+    for filters in all_filters(dataset.index):
+        selection = Selection(dataset, *filters)
+        for chart_id, chart in CHARTS.items():
+            if profiler is None:
+                chart.prepare(selection)
+                continue
+            with profiler.span(chart_id, "prepare") as span:
+                rows_read = selection.rows_read
+                chart.prepare(selection)
+                span["rows"] = selection.rows_read - rows_read
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Overhead of the profiling layer, off and on.")
+    parser.add_argument("--rows", type=int, default=682_400)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    span_off, span_on = span_cost(NULL_PROFILER, 200_000), span_cost(Profiler(), 200_000)
+    print(f"per span: off {span_off:.3f} us, on {span_on:.3f} us")
+
+    dataset = Snapshot.build(optimize_dtypes(make_dataset(args.rows))[DASHBOARD_COLUMNS])
+    prepare_all(dataset, None)  # warm up
+    timings = {"uninstrumented": [], "profiling off": [], "profiling on": []}
+    for _ in range(args.repeat):
+        # Interleaved so drift affects every variant alike
+        timings["uninstrumented"].append(prepare_all(dataset, None))
+        timings["profiling off"].append(prepare_all(dataset, NULL_PROFILER))
+        timings["profiling on"].append(prepare_all(dataset, Profiler()))
+    base = min(timings["uninstrumented"])
+    calls = len(all_filters(dataset.index)) * len(CHARTS)
+    print(f"\n{args.rows:,} rows, {calls:,} chart preparations per pass, best of {args.repeat} passes")
+    for name, values in timings.items():
+        print(f"{name:<16}{min(values) * 1e3:>10.1f} ms{(min(values) / base - 1) * 100:>+8.2f}%")
+    print(f"spans alone: {calls * span_off / 1e3:.1f} ms off, {calls * span_on / 1e3:.1f} ms on "
+          f"({calls * span_off / 1e4 / base:.3f}% / {calls * span_on / 1e4 / base:.3f}% of a pass)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import make_dataset
+from charts import Selection, all_filters, summary_estimates, summary_scans
+from data_store import DASHBOARD_COLUMNS, optimize_dtypes
+from incremental import Snapshot
+from sketches import SketchCube
+
+# Accuracy and latency of the sketch estimates against exact scans, over
+# every sidebar selection. Fails if a quantile falls outside its bound, a
+# participant count is off by more than its standard errors allow (over 10%
+# of selections beyond 2, or any beyond 4) or a merged sketch differs from
+# one built from all rows.
+
+QUANTILES = (0.1, 0.5, 0.9)
+COLUMNS = ["resting_heart_rate", "daily_steps", "hours_sleep", "bmi"]
+
+
+def check_merge(data, sketches):
+    # Merging the last quarter of the rows matches sketching them all, also
+    # when the merged rows have no values for the quantile columns
+    split = len(data) * 3 // 4
+    missing = data.astype({col: np.float64 for col in sketches.columns})
+    missing.iloc[split:, [missing.columns.get_loc(col) for col in sketches.columns]] = np.nan
+    for rows, expected in [(data, sketches), (missing, SketchCube(missing, sketches.labels, sketches.columns))]:
+        head = SketchCube(rows.iloc[:split], sketches.labels, sketches.columns)
+        merged = head.merge(rows.iloc[split:], sketches.labels)
+        assert np.array_equal(merged.registers, expected.registers)
+        for col in expected.columns:
+            assert merged.offsets[col] == expected.offsets[col], col
+            n_slots = expected.counts[col].shape[-1]
+            assert np.array_equal(merged.counts[col][..., :n_slots], expected.counts[col]), col
+            assert not merged.counts[col][..., n_slots:].any(), col
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sketch estimates against exact scans for every sidebar selection.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[68_240, 682_400, 2_729_600])
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        data = optimize_dtypes(make_dataset(rows))[DASHBOARD_COLUMNS]
+        dataset = Snapshot.build(data)
+        start = time.perf_counter()
+        sketches = SketchCube(data, dataset.cube.labels, COLUMNS)
+        build = time.perf_counter() - start
+        check_merge(data, sketches)
+
+        errors, misses, checked = [], 0, 0
+        timings = {"exact": [], "sketch": []}
+        for filters in all_filters(dataset.index):
+            selection = Selection(dataset, *filters)
+            view = sketches.select(*filters)
+            start = time.perf_counter()
+            exact = summary_scans(selection)
+            timings["exact"].append(time.perf_counter() - start)
+            start = time.perf_counter()
+            summary_estimates(selection)
+            timings["sketch"].append(time.perf_counter() - start)
+
+            if exact["total_participants"]:
+                estimate, error = view.distinct()
+                errors.append((estimate - exact["total_participants"]) / error)
+            for col in COLUMNS:
+                values = selection.rows[col].dropna().to_numpy(np.float64)
+                if not len(values):
+                    continue
+                for q in QUANTILES:
+                    estimate, bound = view.quantile(col, q)
+                    # Interpolated between ranks, like the page's pandas median
+                    expected = np.quantile(values, q)
+                    checked += 1
+                    if abs(estimate - expected) > bound * (1 + 1e-9):
+                        misses += 1
+                        print(f"  out of bound: {filters} {col} q={q} {estimate:.3f} vs {expected:.3f}")
+
+        errors = np.abs(errors)
+        exact_ms, sketch_ms = (np.array(timings[name]) * 1e3 for name in ("exact", "sketch"))
+        print(f"\n{rows:,} rows, {len(exact_ms)} selections, sketches built in {build:.2f}s, merge matches rebuild")
+        print(f"distinct participants: |error| p50 {np.percentile(errors, 50):.2f}, max {errors.max():.2f} "
+              f"standard errors; {np.mean(errors <= 2):.0%} within 2")
+        print(f"quantiles: {checked - misses}/{checked} within the {sketches.relative_accuracy:.0%} bound")
+        print(f"summary numbers: exact p50 {np.percentile(exact_ms, 50):.3f} ms, "
+              f"sketch p50 {np.percentile(sketch_ms, 50):.3f} ms")
+        assert not misses
+        assert np.mean(errors <= 2) >= 0.9 and errors.max() <= 4, "participant counts off by too many standard errors"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.synthetic import write_dataset
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Time to first chart of a freshly started dashboard process. Each mode runs
+# in a new interpreter: it imports Streamlit (the server), optionally warms
+# up as `python warm_cache.py --serve` does, then runs the first session and
+# records when its first chart was handed to Streamlit. --root points at
+# another checkout (e.g. a `git worktree` of an older commit) to measure it
+# with the same data; modes that checkout does not support are skipped.
+SCRIPT = """
+import json, os, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {root!r})
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+if {serve!r}:
+    import warm_cache
+    from figure_cache import FigureCache, max_bytes_from_env
+    snapshot, _ = warm_cache.load_snapshot(directory=os.environ["WARM_CACHE_DIR"])
+    warm_cache.figure_cache = FigureCache(max_bytes_from_env())
+    warm_cache.build_figures(snapshot, warm_cache.figure_cache)
+boot = time.perf_counter()
+plotly_loaded = "plotly.express" in sys.modules
+
+first_chart = []
+plotly_chart = st.plotly_chart
+def timed_plotly_chart(*args, **kwargs):
+    result = plotly_chart(*args, **kwargs)
+    if not first_chart:
+        first_chart.append(time.perf_counter())
+    return result
+st.plotly_chart = timed_plotly_chart
+
+app = AppTest.from_file(os.path.join({root!r}, "deploy.py"), default_timeout=600)
+session = time.perf_counter()
+app.run()
+done = time.perf_counter()
+assert not app.exception, app.exception
+print(json.dumps({{"boot_s": boot - start, "first_chart_s": first_chart[0] - session, "first_page_s": done - session,
+                  "plotly_at_boot": plotly_loaded}}))
+"""
+
+# mode -> (warm cache directory used, cache present before the process
+# starts, warm up before the first session)
+MODES = {
+    "cold": (False, False, False),
+    "warm cache, first boot": (True, False, False),
+    "warm cache, restart": (True, True, False),
+    "serve (warm in-process)": (True, True, True),
+}
+
+
+def run_mode(root, data_dir, cache_dir, mode):
+    use_cache, cache_present, serve = MODES[mode]
+    if not cache_present:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    env = dict(os.environ, PREFETCH_WORKERS="0")
+    env.pop("WARM_CACHE_DIR", None)
+    if use_cache:
+        env["WARM_CACHE_DIR"] = cache_dir
+    out = subprocess.run([sys.executable, "-c", SCRIPT.format(root=root, serve=serve)], cwd=data_dir, env=env,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time to first chart of a fresh dashboard process, cold and warm.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[68_240, 682_400])
+    parser.add_argument("--root", default=ROOT, help="checkout whose deploy.py is measured")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    root = os.path.abspath(args.root)
+    modes = [mode for mode in MODES
+             if mode == "cold" or os.path.exists(os.path.join(root, "warm_cache.py"))]
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        cache_dir = os.path.join(data_dir, "warm_cache")
+        for rows in args.rows:
+            write_dataset(os.path.join(data_dir, "sampled_data.csv"), rows)
+            print(f"\n{rows:,} rows, {root}, best of {args.repeat}")
+            print(f"{'mode':<26}{'boot s':>9}{'first chart s':>15}{'boot + chart s':>16}{'first page s':>14}"
+                  f"{'plotly at boot':>16}")
+            for mode in modes:
+                results = [run_mode(root, data_dir, cache_dir, mode) for _ in range(args.repeat)]
+                best = min(results, key=lambda result: result["boot_s"] + result["first_chart_s"])
+                print(f"{mode:<26}{best['boot_s']:>9.2f}{best['first_chart_s']:>15.2f}"
+                      f"{best['boot_s'] + best['first_chart_s']:>16.2f}{best['first_page_s']:>14.2f}"
+                      f"{str(best['plotly_at_boot']):>16}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from aggregates import FrameView
+
+# Comparisons shared by the tests and the benchmarks that check their
+# results: the chart aggregations from raw rows against the cube, and two
+# snapshots of the same rows against each other.
+
+# The aggregations page1()/page2() run on every rerun
+QUERIES = [
+    ("mean", "avg_heart_rate"), ("mean", "daily_steps"), ("mean", "hours_sleep"),
+    ("mean", "calories_burned"), ("mean", "bmi"), ("mean", "duration_minutes"),
+    ("mean", "hydration_level"),
+    ("value_counts", "type_wight"), ("value_counts", "health_condition"),
+    ("value_counts", "activity_type"), ("value_counts", "fitness_level"),
+    ("value_counts", "age_category"), ("value_counts", "gender"),
+    ("agg", "activity_type", "duration_minutes", "sum"),
+    ("agg", "activity_type", "calories_burned", "sum"),
+    ("agg", "activity_type", "duration_minutes", "mean"),
+    ("agg", "activity_type", "calories_burned", "mean"),
+    ("agg", ["activity_type", "gender"], "duration_minutes", "sum"),
+    ("agg", "age_category", "duration_minutes", "sum"),
+    ("agg", "age_category", "calories_burned", "sum"),
+    ("agg", "activity_type", "daily_steps", "sum"),
+    ("agg", "activity_type", "hydration_level", "mean"),
+    ("agg", "activity_type", "resting_heart_rate", "mean"),
+    ("agg", "activity_type", "bmi", "mean"),
+    ("agg", "activity_type", "intensity", "count"),
+    ("agg", ["activity_type", "fitness_level"], "duration_minutes", "sum"),
+    ("agg", "activity_type", "stress_level", "mean"),
+    ("agg", ["gender", "stress_level"], "stress_level", "count"),
+    ("agg", ["gender"], "resting_heart_rate", "mean"),
+    ("agg", "age_category", "stress_level", "mean"),
+    ("agg", "age_category", "resting_heart_rate", "mean"),
+    ("agg", "health_condition", "hydration_level", "mean"),
+    ("agg", "fitness_level", "stress_level", "mean"),
+    ("agg", "health_condition", "calories_burned", "sum"),
+    ("agg", "activity_type", "duration_minutes", "std"),
+]
+
+
+def run(view, query):
+    kind, *args = query
+    return getattr(view, kind)(*args)
+
+
+def assert_same(expected, actual, query, selection):
+    if isinstance(expected, pd.Series):
+        assert list(expected.index) == list(actual.index), (selection, query)
+        assert np.allclose(expected.to_numpy(float), actual.to_numpy(float), equal_nan=True), (selection, query)
+    else:
+        assert np.isclose(expected, actual, equal_nan=True), (selection, query)
+
+
+def assert_same_snapshot(expected, actual):
+    assert expected.index.options == actual.index.options
+    assert np.array_equal(expected.participants.key, actual.participants.key)
+    for col, values in expected.participants.values.items():
+        assert np.array_equal(values, actual.participants.values[col], equal_nan=True), col
+    selections = list(itertools.product(["All"] + expected.index.options['gender'],
+                                        expected.index.options['age_category'],
+                                        expected.index.options['month_name']))
+    for selection in selections:
+        want, got = expected.index.select(*selection), actual.index.select(*selection)
+        pd.testing.assert_frame_equal(want.reset_index(drop=True), got.reset_index(drop=True), check_dtype=False)
+        for query in QUERIES:
+            assert_same(run(expected.cube.select(*selection), query), run(actual.cube.select(*selection), query),
+                        query, selection)
+            assert_same(run(FrameView(want), query), run(actual.cube.select(*selection), query), query, selection)
+        want, got = expected.sketches.select(*selection), actual.sketches.select(*selection)
+        assert np.allclose(want.distinct(), got.distinct()), selection
+        for col in expected.sketches.columns:
+            assert np.allclose(want.quantile(col, 0.5), got.quantile(col, 0.5), equal_nan=True), (col, selection)
+    return len(selections)
@@ -0,0 +1,32 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The measured call runs in a fresh interpreter so its time and peak RSS are
+# not skewed by earlier runs sharing the same heap. ru_maxrss survives
+# fork+exec from a (large) parent, so the child reads the high-water mark of
+# its own address space instead. held_mb is what stays resident while the
+# result is alive, including memory the allocators keep after freeing.
+SCRIPT = """
+import json, time
+def status_kb(field):
+    with open("/proc/self/status") as status:
+        return next(int(line.split()[1]) for line in status if line.startswith(field))
+{setup}
+before, resident = status_kb("VmHWM"), status_kb("VmRSS")
+start = time.perf_counter()
+result = {call}
+elapsed = time.perf_counter() - start
+after, held = status_kb("VmHWM"), status_kb("VmRSS")
+print(json.dumps({{"seconds": elapsed, "rss_mb": (after - before) / 1024, "held_mb": (held - resident) / 1024,
+                  "report": {report}}}))
+"""
+
+
+def run_isolated(setup, call, report="None"):
+    out = subprocess.run([sys.executable, "-c", SCRIPT.format(setup=setup, call=call, report=report)],
+                         cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
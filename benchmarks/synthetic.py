@@ -0,0 +1,105 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Synthetic rows with the same schema as sampled_data.csv, for benchmarking
+# the dashboard without the real dataset.
+
+GENDERS = ["Female", "Male", "Other"]
+AGE_CATEGORIES = ["Young Adult", "Adult", "Older Adult"]
+ACTIVITY_TYPES = ["Basketball", "Cycling", "Dancing", "HIIT", "Running",
+                  "Swimming", "Tennis", "Walking", "Weight Training", "Yoga"]
+INTENSITIES = ["Low", "Medium", "High"]
+HEALTH_CONDITIONS = ["No health condition", "Hypertension", "Diabetes", "Asthma"]
+SMOKING_STATUSES = ["Never", "Former", "Current"]
+FITNESS_LEVELS = ["Beginner", "Intermediate", "Advanced"]
+TYPE_WIGHT = ["Underweight", "Optimum range", "Overweight", "Obese"]
+MONTH_NAMES = ["January", "February", "March", "April", "May", "June", "July",
+               "August", "September", "October", "November", "December"]
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+CALENDAR = pd.date_range("2024-01-01", "2024-12-31")
+
+
+def _labels(values, codes):
+    return pd.Categorical.from_codes(codes, categories=values)
+
+
+def make_dataset(n_rows, seed=0, num_participants=3000):
+    # String columns are generated as categoricals so multi-million row
+    # datasets fit in memory; to_csv writes them out as plain strings.
+    rng = np.random.default_rng(seed)
+    participant_id = (np.arange(n_rows) % num_participants) + 1
+
+    # Per-participant attributes, so each participant looks consistent across rows
+    p_age = rng.integers(18, 65, num_participants + 1)
+    p_gender = rng.integers(0, len(GENDERS), num_participants + 1)
+    p_height = np.round(rng.uniform(1.5, 2.0, num_participants + 1), 3)
+    p_rhr = np.round(rng.uniform(55, 80, num_participants + 1) * 2) / 2
+    p_condition = rng.choice(len(HEALTH_CONDITIONS), num_participants + 1, p=[0.55, 0.2, 0.15, 0.1])
+    p_smoking = rng.integers(0, len(SMOKING_STATUSES), num_participants + 1)
+    p_systolic = np.round(rng.uniform(100, 140, num_participants + 1), 1)
+    p_diastolic = np.round(rng.uniform(65, 90, num_participants + 1), 1)
+
+    age = p_age[participant_id]
+    height = p_height[participant_id]
+    day_of_year = rng.integers(0, len(CALENDAR), n_rows)
+    dates = CALENDAR[day_of_year]
+    weight = np.round(rng.uniform(45, 130, n_rows), 1)
+    bmi = weight / height ** 2
+    duration = rng.integers(20, 121, n_rows)
+    met = rng.integers(3, 12, n_rows).astype(float)
+    hours_sleep = np.round(rng.uniform(4, 10, n_rows), 1)
+
+    age_category = np.where(age < 30, 0, np.where(age < 50, 1, 2))
+    type_wight = np.select([bmi < 18.5, bmi < 25, bmi < 30], [0, 1, 2], 3)
+
+    return pd.DataFrame({
+        "participant_id": participant_id,
+        "date": _labels(CALENDAR.strftime("%Y-%m-%d"), day_of_year),
+        "age": age,
+        "gender": _labels(GENDERS, p_gender[participant_id]),
+        "height_m": height,
+        "weight_kg": weight,
+        "activity_type": _labels(ACTIVITY_TYPES, rng.integers(0, len(ACTIVITY_TYPES), n_rows)),
+        "duration_minutes": duration,
+        "intensity": _labels(INTENSITIES, rng.integers(0, len(INTENSITIES), n_rows)),
+        "calories_burned": met * weight * duration / 60,
+        "avg_heart_rate": rng.integers(90, 180, n_rows),
+        "hours_sleep": hours_sleep,
+        "stress_level": rng.integers(1, 11, n_rows),
+        "daily_steps": rng.integers(2000, 20000, n_rows),
+        "hydration_level": np.round(rng.uniform(1.5, 3.5, n_rows), 1),
+        "bmi": bmi,
+        "resting_heart_rate": p_rhr[participant_id],
+        "blood_pressure_systolic": p_systolic[participant_id],
+        "blood_pressure_diastolic": p_diastolic[participant_id],
+        "health_condition": _labels(HEALTH_CONDITIONS, p_condition[participant_id]),
+        "smoking_status": _labels(SMOKING_STATUSES, p_smoking[participant_id]),
+        "fitness_level": _labels(FITNESS_LEVELS, rng.integers(0, len(FITNESS_LEVELS), n_rows)),
+        "year": dates.year,
+        "month": dates.month,
+        "day": dates.day,
+        "month_name": _labels(MONTH_NAMES, dates.month - 1),
+        "day_name": _labels(DAY_NAMES, dates.weekday),
+        "weekday": dates.weekday,
+        "quarter": _labels(["Q1", "Q2", "Q3", "Q4"], dates.quarter - 1),
+        "age_category": _labels(AGE_CATEGORIES, age_category),
+        "MET": met,
+        "fraction_of_sleep": np.round(hours_sleep / 8 * 100, 2),
+        "type_wight": _labels(TYPE_WIGHT, type_wight),
+    })
+
+
+def write_dataset(path, n_rows, seed=0):
+    make_dataset(n_rows, seed=seed).to_csv(path, index=False)
+    return path
+
+
+def write_partition(directory, part, rows):
+    # Written under a hidden name and renamed, as a real writer would
+    path = os.path.join(directory, f"part-{part:05d}.csv")
+    hidden = os.path.join(directory, f".part-{part:05d}.csv")
+    rows.to_csv(hidden, index=False)
+    os.replace(hidden, path)
+    return path
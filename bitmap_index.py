@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+
+# Row sets for arbitrary filter combinations over one fixed row order (a
+# FilterIndex's sorted rows). Every label of a categorical column has a
+# bitmap with one bit per row (np.packbits); a multi-select ORs the bitmaps
+# of its labels. A numeric column keeps its row numbers sorted by value, so
+# a narrow range is two binary searches and one scatter into a fresh bitmap.
+# Conditions on different columns are ANDed. Both structures are built per
+# column on first use.
+
+RANGE_COLUMNS = ["bmi", "daily_steps", "stress_level"]
+
+
+class BitmapIndex:
+
+    def __init__(self, data):
+        self.data = data
+        self.n_rows = len(data)
+        self.bitmaps = {}
+        self.sorted = {}
+        self.bounds = {}
+
+    def _bitmaps_for(self, column):
+        if column not in self.bitmaps:
+            codes, labels = pd.factorize(self.data[column])
+            self.bitmaps[column] = {label: np.packbits(codes == code) for code, label in enumerate(labels)}
+        return self.bitmaps[column]
+
+    def _values(self, column):
+        # Floats keep their own dtype, so that range bounds are rounded to it
+        # exactly once (see between); anything else is compared as float64
+        values = self.data[column]
+        if pd.api.types.is_float_dtype(values.dtype) and isinstance(values.dtype, np.dtype):
+            return values.to_numpy()
+        return values.to_numpy(np.float64, na_value=np.nan)
+
+    def _sorted_for(self, column):
+        # (values in ascending order, their row numbers); missing values sort last
+        if column not in self.sorted:
+            values = self._values(column)
+            order = np.argsort(values, kind="stable")
+            self.sorted[column] = (values[order], order)
+        return self.sorted[column]
+
+    def value_range(self, column):
+        # (min, max) of a numeric column, for range sliders; cheaper than sorting
+        if column not in self.bounds:
+            values = self.data[column].to_numpy(np.float64, na_value=np.nan)
+            present = values[~np.isnan(values)]
+            self.bounds[column] = (present.min(), present.max()) if len(present) else (np.nan, np.nan)
+        return self.bounds[column]
+
+    def categories(self, column, labels):
+        bits = np.zeros(-(-self.n_rows // 8), dtype=np.uint8)
+        bitmaps = self._bitmaps_for(column)
+        for label in labels:
+            if label in bitmaps:
+                bits |= bitmaps[label]
+        return bits
+
+    def between(self, column, low, high):
+        # Rows with low <= value <= high. Both paths compare in the column's
+        # dtype: a float32 value of 22.4 must match a bound of 22.4, which it
+        # would not once widened to float64.
+        values, order = self._sorted_for(column)
+        low, high = values.dtype.type(low), values.dtype.type(high)
+        start, stop = np.searchsorted(values, low, side="left"), np.searchsorted(values, high, side="right")
+        if stop - start > self.n_rows // 5:
+            # Scattering many row numbers costs more than one sequential comparison
+            column_values = self._values(column)
+            return np.packbits((column_values >= low) & (column_values <= high))
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[order[start:stop]] = True
+        return np.packbits(mask)
+
+    def match(self, categories=None, ranges=None):
+        # Bitmap of the rows matching every condition: categories maps a
+        # column to the labels to keep, ranges maps a column to (low, high)
+        bits = None
+        conditions = [(self.categories, col, (labels,)) for col, labels in (categories or {}).items()]
+        conditions += [(self.between, col, bounds) for col, bounds in (ranges or {}).items()]
+        for condition, col, args in conditions:
+            col_bits = condition(col, *args)
+            bits = col_bits if bits is None else np.bitwise_and(bits, col_bits, out=bits)
+        return bits
+
+    def rows(self, categories=None, ranges=None):
+        # Row numbers, ascending, of the rows matching every condition
+        bits = self.match(categories, ranges)
+        if bits is None:
+            return np.arange(self.n_rows)
+        return np.flatnonzero(np.unpackbits(bits, count=self.n_rows).view(bool))
@@ -0,0 +1,422 @@
+import itertools
+
+import pandas as pd
+
+from aggregates import FrameView
+from histograms import bin_data, histogram_figure
+from lazy_import import LazyModule
+from profiling import NULL_PROFILER
+
+# The data work behind every dashboard chart, without Streamlit. A Chart
+# splits into `prepare`, which reads the selection's rows / cube view and
+# returns the (small) data to plot, and `figure`, which turns that data into
+# a plotly figure. deploy.py lays the charts out; benchmarks and exporters
+# can call them directly.
+
+# Imported when the first figure is built, not with this module
+px = LazyModule("plotly.express")
+
+HEALTH_CONDITION_COLORS = ['#636EFA', '#00CC96', '#AB63FA', '#FF7F0E']
+FITNESS_LEVEL_COLORS = ['#EF553B', '#00CC96', '#636EFA']
+
+
+class Selection:
+    # One sidebar selection of a dataset (anything with index, cube, bins and
+    # sketches, such as incremental.Snapshot). gender, age_category and month
+    # are each one label, a list of labels or "All"; ranges maps numeric
+    # columns to inclusive (low, high) bounds. The selected rows are kept as
+    # positions into the shared index data and only copied out on demand,
+    # one column at a time where possible.
+
+    def __init__(self, dataset, gender, age_category, month, ranges=None):
+        ranges = dict(ranges or {})
+        self.filters = tuple(tuple(v) if isinstance(v, list) else v for v in (gender, age_category, month))
+        if ranges:
+            self.filters += (tuple(sorted(ranges.items())),)
+        self.data = dataset.index.data
+        self.positions = dataset.index.positions(gender, age_category, month, ranges)
+        self._rows = None
+        self.rows_read = 0  # row values copied out, for profiling
+        if ranges:
+            # Cells do not split on numeric values, so aggregate the rows themselves
+            self.view = FrameView(self.rows)
+            self.sketch = None
+        else:
+            self.view = dataset.cube.select(gender, age_category, month)
+            self.sketch = dataset.sketches.select(gender, age_category, month)
+        self.bins = dataset.bins
+
+    def __len__(self):
+        if isinstance(self.positions, slice):
+            return len(range(*self.positions.indices(len(self.data))))
+        return len(self.positions)
+
+    @property
+    def rows(self):
+        if self._rows is None:
+            self._rows = self.data.iloc[self.positions]
+            self.rows_read += len(self._rows)
+        return self._rows
+
+    def columns(self, *names):
+        # Only the named columns of the selected rows
+        self.rows_read += len(self)
+        return self.data.iloc[self.positions, self.data.columns.get_indexer(list(names))]
+
+    def column(self, name):
+        self.rows_read += len(self)
+        return self.data[name].to_numpy()[self.positions]
+
+    def head(self, n=5):
+        if isinstance(self.positions, slice):
+            return self.data.iloc[self.positions][:n]
+        return self.data.iloc[self.positions[:n]]
+
+
+def default_filters(index):
+    # The sidebar's initial (gender, age_category, month): every gender, the
+    # first age category and month listed
+    return [], index.options['age_category'][:1], index.options['month_name'][:1]
+
+
+def all_filters(index):
+    # Every (gender, age_category, month) the sidebar can select
+    return list(itertools.product(["All"] + index.options['gender'],
+                                  index.options['age_category'],
+                                  index.options['month_name']))
+
+
+class Chart:
+
+    def __init__(self, chart_id, prepare, figure):
+        self.chart_id = chart_id
+        self.prepare = prepare
+        self.figure = figure
+
+    def build(self, selection, profiler=NULL_PROFILER):
+        with profiler.span(self.chart_id, "prepare") as span:
+            rows_read = selection.rows_read
+            prepared = self.prepare(selection)
+            span["rows"] = selection.rows_read - rows_read
+        with profiler.span(self.chart_id, "figure"):
+            return self.figure(prepared)
+
+
+class Binned:
+    # `prepare` of a server-binned histogram of x, split by color if given.
+    # The columns are attributes so that export_reports.py can bin every
+    # selection in one pass instead of calling this once per selection.
+
+    def __init__(self, x, color=None):
+        self.x = x
+        self.color = color
+
+    def __call__(self, s):
+        return bin_data(s.columns(*filter(None, (self.x, self.color))), self.x, s.bins.edges_for(self.x), self.color)
+
+
+def overview_metrics(s):
+    return {
+        "Average Heart Rate (bpm)": s.view.mean('avg_heart_rate'),
+        "Average Daily Steps": s.view.mean('daily_steps'),
+        "Average Sleep Hours": s.view.mean('hours_sleep'),
+        "Average Calories Burned": s.view.mean('calories_burned'),
+        "Average BMI": s.view.mean('bmi'),
+    }
+
+
+def summary_stats(s):
+    return {
+        "avg_duration": s.view.mean('duration_minutes'),
+        "avg_calories": s.view.mean('calories_burned'),
+        "avg_steps": s.view.mean('daily_steps'),
+        "avg_hydration": s.view.mean('hydration_level'),
+        "top_activity_type": s.view.value_counts('activity_type').idxmax(),
+    }
+
+
+def summary_scans(s):
+    # The summary numbers that need a pass over the selected rows
+    return {
+        "total_participants": pd.Series(s.column('participant_id')).nunique(),
+        "median_resting_heart_rate": pd.Series(s.column('resting_heart_rate')).median(),
+    }
+
+
+def summary_estimates(s):
+    # summary_scans from the sketches, as (estimate, error bound)
+    return {
+        "total_participants": s.sketch.distinct(),
+        "median_resting_heart_rate": s.sketch.quantile('resting_heart_rate', 0.5),
+    }
+
+
+# Non-chart numbers shown on the pages, by id
+METRICS = {
+    "overview_section.metrics": overview_metrics,
+    "summary_section.stats": summary_stats,
+    "summary_section.scans": summary_scans,
+    "summary_section.estimates": summary_estimates,
+}
+
+CHART_LIST = [
+    # Overview
+    Chart("overview_section.fig_bmi",
+          lambda s: s.view.value_counts('type_wight'),
+          lambda counts: px.pie(names=counts.index, values=counts.values, title="BMI Category Distribution")),
+    Chart("overview_section.fig_health",
+          lambda s: s.view.value_counts('health_condition'),
+          lambda counts: px.pie(names=counts.index, values=counts.values, title="Health Condition Distribution")),
+    Chart("overview_section.fig_activity_type",
+          lambda s: s.view.value_counts('activity_type'),
+          lambda counts: px.bar(x=counts.index, y=counts.values, title="activity_type Level Distribution")),
+
+    # Activity Analysis
+    Chart("activity_section.fig_duration",
+          lambda s: s.view.agg('activity_type', 'duration_minutes', 'sum').reset_index(name='total_duration'),
+          lambda stats: px.histogram(stats, x='activity_type', y='total_duration',
+                                     title="Total Duration per Activity Type",
+                                     labels={'total_duration': 'Total Duration (Minutes)', 'activity_type': 'Activity Type'},
+                                     color='activity_type', barmode='group')),
+    Chart("activity_section.fig_calories",
+          lambda s: s.view.agg('activity_type', 'calories_burned', 'sum').reset_index(name='total_calories_burned'),
+          lambda stats: px.histogram(stats, x='activity_type', y='total_calories_burned',
+                                     title="Total Calories Burned per Activity Type",
+                                     labels={'total_calories_burned': 'Total Calories Burned', 'activity_type': 'Activity Type'},
+                                     color='activity_type', barmode='group')),
+    Chart("activity_section.fig_activity_distribution",
+          lambda s: s.view.value_counts('activity_type'),
+          lambda counts: px.pie(names=counts.index, values=counts.values,
+                                title="Activity Type Distribution", color=counts.index)),
+    Chart("activity_section.fig_avg_duration",
+          lambda s: s.view.agg('activity_type', 'duration_minutes', 'mean').reset_index(name='avg_duration'),
+          lambda stats: px.histogram(stats, x='activity_type', y='avg_duration',
+                                     title="Average Duration per Activity Type",
+                                     labels={'avg_duration': 'Average Duration (Minutes)', 'activity_type': 'Activity Type'},
+                                     color='activity_type', barmode='group')),
+    Chart("activity_section.fig_avg_calories",
+          lambda s: s.view.agg('activity_type', 'calories_burned', 'mean').reset_index(name='avg_calories_burned'),
+          lambda stats: px.histogram(stats, x='activity_type', y='avg_calories_burned',
+                                     title="Average Calories Burned per Activity Type",
+                                     labels={'avg_calories_burned': 'Average Calories Burned', 'activity_type': 'Activity Type'},
+                                     color='activity_type', barmode='group')),
+    Chart("activity_section.fig_activity_gender",
+          lambda s: s.view.agg(['activity_type', 'gender'], 'duration_minutes', 'sum').reset_index(name='total_duration'),
+          lambda stats: px.histogram(stats, x='activity_type', y='total_duration',
+                                     color='gender', title="Activity Type by Gender",
+                                     labels={'total_duration': 'Total Duration (Minutes)', 'activity_type': 'Activity Type'},
+                                     barmode='group')),
+    Chart("activity_section.fig_age_duration",
+          lambda s: s.view.agg('age_category', 'duration_minutes', 'sum').reset_index(name='total_duration'),
+          lambda stats: px.histogram(stats, x='age_category', y='total_duration',
+                                     title="Duration by Age Category",
+                                     labels={'total_duration': 'Total Duration (Minutes)', 'age_category': 'Age Category'},
+                                     color='age_category', barmode='group')),
+    Chart("activity_section.fig_age_calories",
+          lambda s: s.view.agg('age_category', 'calories_burned', 'sum').reset_index(name='total_calories_burned'),
+          lambda stats: px.histogram(stats, x='age_category', y='total_calories_burned',
+                                     title="Calories Burned by Age Category",
+                                     labels={'total_calories_burned': 'Total Calories Burned', 'age_category': 'Age Category'},
+                                     color='age_category', barmode='group')),
+    Chart("activity_section.fig_steps_activity",
+          lambda s: s.view.agg('activity_type', 'daily_steps', 'sum').reset_index(name='total_steps'),
+          lambda stats: px.histogram(stats, x='activity_type', y='total_steps',
+                                     title="Total Steps by Activity Type",
+                                     labels={'total_steps': 'Total Steps', 'activity_type': 'Activity Type'},
+                                     color='activity_type', barmode='group')),
+    Chart("activity_section.fig_stress_activity",
+          Binned('stress_level', 'activity_type'),
+          lambda binned: histogram_figure(binned, 'stress_level', 'activity_type', barmode='group',
+                                          title="Stress Level vs Activity Type",
+                                          labels={'stress_level': 'Stress Level', 'activity_type': 'Activity Type'})),
+    Chart("activity_section.fig_hydration",
+          lambda s: s.view.agg('activity_type', 'hydration_level', 'mean').reset_index(),
+          lambda stats: px.pie(stats, names='activity_type', values='hydration_level',
+                               title="Hydration Level Distribution by Activity Type", color='activity_type')),
+    Chart("activity_section.fig_rhr",
+          lambda s: s.view.agg('activity_type', 'resting_heart_rate', 'mean').reset_index(),
+          lambda stats: px.pie(stats, names='activity_type', values='resting_heart_rate',
+                               title="Resting Heart Rate Distribution by Activity Type", color='activity_type')),
+    Chart("activity_section.fig_bmi",
+          lambda s: s.view.agg('activity_type', 'bmi', 'mean').reset_index(name='avg_bmi'),
+          lambda stats: px.bar(stats, x='activity_type', y='avg_bmi',
+                               title="BMI by Activity Type",
+                               labels={'avg_bmi': 'Average BMI', 'activity_type': 'Activity Type'},
+                               color='activity_type', barmode='group')),
+    Chart("activity_section.fig_intensity",
+          lambda s: s.view.agg('activity_type', 'intensity', 'count').reset_index(),
+          lambda stats: px.bar(stats, x='activity_type', y='intensity',
+                               title="Intensity Distribution by Activity Type",
+                               labels={'intensity': 'Intensity', 'activity_type': 'Activity Type'},
+                               color='activity_type', barmode='group')),
+    Chart("activity_section.fig_fitness_level",
+          lambda s: s.view.agg(['activity_type', 'fitness_level'], 'duration_minutes', 'sum').reset_index(name='total_duration'),
+          lambda stats: px.bar(stats, x='activity_type', y='total_duration', color='fitness_level',
+                               title="Fitness Level by Activity Type",
+                               labels={'total_duration': 'Total Duration (Minutes)', 'activity_type': 'Activity Type'},
+                               barmode='group')),
+
+    # Heart Rate & Stress Analysis
+    Chart("heart_rate_section.fig_rhr_dist",
+          Binned('resting_heart_rate'),
+          lambda binned: histogram_figure(binned, 'resting_heart_rate',
+                                          title="Resting Heart Rate Distribution",
+                                          labels={'resting_heart_rate': 'Resting Heart Rate'},
+                                          template='plotly_dark', text_auto=True)),
+    Chart("heart_rate_section.fig_heart_rate_activity",
+          lambda s: s.view.agg('activity_type', 'resting_heart_rate', 'mean').reset_index(name='avg_heart_rate'),
+          lambda stats: px.bar(stats, x='activity_type', y='avg_heart_rate',
+                               title="Average Heart Rate by Activity Type",
+                               labels={'avg_heart_rate': 'Average Heart Rate', 'activity_type': 'Activity Type'},
+                               color='activity_type', barmode='group',
+                               template='plotly_dark', text_auto=True)),
+    Chart("heart_rate_section.fig_stress_dist",
+          Binned('stress_level'),
+          lambda binned: histogram_figure(binned, 'stress_level',
+                                          title="Stress Level Distribution",
+                                          labels={'stress_level': 'Stress Level'},
+                                          template='plotly_dark', text_auto=True)),
+    Chart("heart_rate_section.fig_stress_activity",
+          lambda s: s.view.agg('activity_type', 'stress_level', 'mean').reset_index(name='avg_stress_level'),
+          lambda stats: px.bar(stats, x='activity_type', y='avg_stress_level',
+                               title="Average Stress Level by Activity Type",
+                               labels={'avg_stress_level': 'Average Stress Level', 'activity_type': 'Activity Type'},
+                               color='activity_type', barmode='group',
+                               template='plotly_dark', text_auto=True)),
+    Chart("heart_rate_section.fig_stress_gender",
+          lambda s: s.view.agg(['gender', 'stress_level'], 'stress_level', 'count').reset_index(name='count'),
+          lambda stats: px.bar(stats, x='gender', y='count', color='stress_level',
+                               title="Stress Level Distribution by Gender",
+                               labels={'count': 'Count', 'gender': 'Gender'},
+                               barmode='group', template='plotly_dark', text_auto=True)),
+    Chart("heart_rate_section.fig_heart_rate_gender",
+          lambda s: s.view.agg(['gender'], 'resting_heart_rate', 'mean').reset_index(name='avg_heart_rate'),
+          lambda stats: px.bar(stats, x='gender', y='avg_heart_rate',
+                               title="Average Heart Rate by Gender",
+                               labels={'avg_heart_rate': 'Average Heart Rate', 'gender': 'Gender'},
+                               color='gender', barmode='group', template='plotly_dark', text_auto=True)),
+    Chart("heart_rate_section.fig_stress_age",
+          lambda s: s.view.agg('age_category', 'stress_level', 'mean').reset_index(name='avg_stress_level'),
+          lambda stats: px.bar(stats, x='age_category', y='avg_stress_level',
+                               title="Average Stress Level by Age Category",
+                               labels={'avg_stress_level': 'Average Stress Level', 'age_category': 'Age Category'},
+                               color='age_category', barmode='group',
+                               template='plotly_dark', text_auto=True)),
+    Chart("heart_rate_section.fig_heart_rate_age",
+          lambda s: s.view.agg('age_category', 'resting_heart_rate', 'mean').reset_index(name='avg_heart_rate'),
+          lambda stats: px.bar(stats, x='age_category', y='avg_heart_rate',
+                               title="Average Heart Rate by Age Category",
+                               labels={'avg_heart_rate': 'Average Heart Rate', 'age_category': 'Age Category'},
+                               color='age_category', barmode='group',
+                               template='plotly_dark', text_auto=True)),
+
+    # Health Condition & Fitness Level
+    Chart("health_condition_section.fig_health_condition",
+          lambda s: s.view.value_counts('health_condition'),
+          lambda counts: px.pie(names=counts.index, values=counts.values,
+                                title="Health Condition Distribution", color=counts.index,
+                                color_discrete_sequence=HEALTH_CONDITION_COLORS, template='plotly_dark')),
+    Chart("health_condition_section.fig_fitness_level",
+          lambda s: s.view.value_counts('fitness_level'),
+          lambda counts: px.pie(names=counts.index, values=counts.values,
+                                title="Fitness Level Distribution", color=counts.index,
+                                color_discrete_sequence=FITNESS_LEVEL_COLORS, template='plotly_dark')),
+    Chart("health_condition_section.fig_stress_health_condition",
+          Binned('stress_level', 'health_condition'),
+          lambda binned: histogram_figure(binned, 'stress_level', 'health_condition',
+                                          title="Stress Level by Health Condition",
+                                          labels={'stress_level': 'Stress Level', 'health_condition': 'Health Condition'},
+                                          template='plotly_dark', barmode='group', text_auto=True,
+                                          color_discrete_sequence=HEALTH_CONDITION_COLORS)),
+    Chart("health_condition_section.fig_bmi_health_condition",
+          Binned('bmi', 'health_condition'),
+          lambda binned: histogram_figure(binned, 'bmi', 'health_condition',
+                                          title="BMI by Health Condition",
+                                          labels={'bmi': 'BMI', 'health_condition': 'Health Condition'},
+                                          template='plotly_dark', barmode='group', text_auto=True,
+                                          color_discrete_sequence=HEALTH_CONDITION_COLORS)),
+    Chart("health_condition_section.fig_duration_fitness",
+          Binned('duration_minutes', 'intensity'),
+          lambda binned: histogram_figure(binned, 'duration_minutes', 'intensity',
+                                          title="Duration by Intensity",
+                                          labels={'duration_minutes': 'Duration (Minutes)', 'intensity': 'Intensity'},
+                                          template='plotly_dark', barmode='group', text_auto=True,
+                                          color_discrete_sequence=FITNESS_LEVEL_COLORS)),
+    Chart("health_condition_section.fig_calories_fitness",
+          Binned('calories_burned', 'type_wight'),
+          lambda binned: histogram_figure(binned, 'calories_burned', 'type_wight',
+                                          title="Calories Burned by type wight",
+                                          labels={'calories_burned': 'Calories Burned', 'type_wight': 'type wight'},
+                                          template='plotly_dark', barmode='group', text_auto=True,
+                                          color_discrete_sequence=FITNESS_LEVEL_COLORS)),
+    Chart("health_condition_section.fig_steps_fitness",
+          Binned('daily_steps', 'type_wight'),
+          lambda binned: histogram_figure(binned, 'daily_steps', 'type_wight',
+                                          title="Steps by type_wight",
+                                          labels={'daily_steps': 'Daily Steps', 'type_wight': 'type wight'},
+                                          template='plotly_dark', barmode='group', text_auto=True,
+                                          color_discrete_sequence=FITNESS_LEVEL_COLORS)),
+    Chart("health_condition_section.fig_hydration_health_condition",
+          lambda s: s.view.agg('health_condition', 'hydration_level', 'mean').reset_index(),
+          lambda stats: px.pie(stats, names='health_condition', values='hydration_level',
+                               title="Hydration Level by Health Condition", color='health_condition',
+                               color_discrete_sequence=HEALTH_CONDITION_COLORS, template='plotly_dark')),
+
+    # Engagement Insights
+    Chart("engagement_section.fig_age_category",
+          lambda s: s.view.value_counts('age_category'),
+          lambda counts: px.pie(names=counts.index, values=counts.values,
+                                title="Age Category Distribution", color=counts.index,
+                                template='plotly_dark', color_discrete_sequence=px.colors.qualitative.Set3)),
+    Chart("engagement_section.fig_gender",
+          lambda s: s.view.value_counts('gender'),
+          lambda counts: px.pie(names=counts.index, values=counts.values,
+                                title="Gender Distribution", color=counts.index,
+                                template='plotly_dark', color_discrete_sequence=px.colors.qualitative.Set1)),
+    Chart("engagement_section.fig_activity_type",
+          lambda s: s.view.value_counts('activity_type'),
+          lambda counts: px.bar(x=counts.index, y=counts.values,
+                                title="Most Popular Activity Types", labels={'x': 'Activity Type', 'y': 'Frequency'},
+                                template='plotly_dark', color=counts.index,
+                                color_discrete_sequence=px.colors.qualitative.Set2, barmode='group')),
+
+    # Health & Fitness Insights
+    Chart("health_fitness_section.fig_stress_fitness_level",
+          lambda s: s.view.agg('fitness_level', 'stress_level', 'mean').reset_index(),
+          lambda stats: px.bar(stats, x='fitness_level', y='stress_level',
+                               title="Average Stress Level by Fitness Level",
+                               labels={'stress_level': 'Average Stress Level', 'fitness_level': 'Fitness Level'},
+                               template='plotly_dark', color='fitness_level',
+                               color_discrete_sequence=px.colors.qualitative.Set3)),
+    Chart("health_fitness_section.fig_health_condition",
+          lambda s: s.view.value_counts('health_condition'),
+          lambda counts: px.pie(names=counts.index, values=counts.values,
+                                title="Health Condition Distribution", color=counts.index,
+                                template='plotly_dark', color_discrete_sequence=px.colors.qualitative.Pastel)),
+    Chart("health_fitness_section.fig_health_condition_calories",
+          lambda s: s.view.agg('health_condition', 'calories_burned', 'sum').reset_index(),
+          lambda stats: px.bar(stats, x='health_condition', y='calories_burned',
+                               title="Total Calories Burned by Health Condition",
+                               labels={'calories_burned': 'Total Calories Burned', 'health_condition': 'Health Condition'},
+                               template='plotly_dark', color='health_condition',
+                               color_discrete_sequence=px.colors.qualitative.Set2)),
+]
+
+CHARTS = {chart.chart_id: chart for chart in CHART_LIST}
+
+TIMELINE_LABELS = {
+    'daily_steps': 'Daily Steps',
+    'hours_sleep': 'Hours of Sleep',
+    'avg_heart_rate': 'Average Heart Rate',
+    'stress_level': 'Stress Level',
+}
+
+
+def timeline_figure(timeline, column):
+    # Daily values as markers, rolling means (participants.ParticipantIndex.timeline) as lines
+    label = TIMELINE_LABELS.get(column, column)
+    rolling = [col for col in timeline.columns if col.startswith(f"{column}_") and col.endswith("d")]
+    fig = px.line(timeline, x='date', y=rolling, title=label, template='plotly_dark',
+                  labels={'date': 'Date', 'value': label, 'variable': ''})
+    fig.add_scatter(x=timeline['date'], y=timeline[column], mode='markers', name='daily')
+    return fig
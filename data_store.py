@@ -0,0 +1,126 @@
+import argparse
+import os
+
+import pandas as pd
+
+CSV_PATH = "sampled_data.csv"
+STORE_PATH = "sampled_data.feather"
+
+CATEGORICAL_COLUMNS = [
+    "gender", "age_category", "month_name", "activity_type", "health_condition",
+    "fitness_level", "intensity", "type_wight", "smoking_status", "day_name", "quarter",
+]
+
+DATE_COLUMNS = ["date"]
+
+# Columns read by deploy.py; everything else stays on disk
+DASHBOARD_COLUMNS = [
+    "participant_id", "date", "gender", "age_category", "month_name", "activity_type",
+    "intensity", "health_condition", "fitness_level", "type_wight",
+    "duration_minutes", "calories_burned", "avg_heart_rate", "hours_sleep",
+    "stress_level", "daily_steps", "hydration_level", "bmi", "resting_heart_rate",
+]
+
+
+def to_datetime(column):
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        # Parse each distinct value once; pd.to_datetime would keep it categorical
+        codes = column.cat.codes.to_numpy()
+        dates = pd.to_datetime(column.cat.categories).take(codes, allow_fill=True, fill_value=pd.NaT)
+        return pd.Series(dates, index=column.index, name=column.name)
+    return pd.to_datetime(column)
+
+
+def optimize_dtypes(data):
+    data = data.copy()
+    for col in data.columns:
+        if col in CATEGORICAL_COLUMNS:
+            data[col] = data[col].astype("category")
+        elif col in DATE_COLUMNS:
+            data[col] = to_datetime(data[col])
+        elif pd.api.types.is_integer_dtype(data[col]):
+            data[col] = pd.to_numeric(data[col], downcast="integer")
+        elif pd.api.types.is_float_dtype(data[col]):
+            # float32 only where every value keeps its first 7 digits
+            data[col] = pd.to_numeric(data[col], downcast="float")
+    return data
+
+
+def convert_csv(csv_path=CSV_PATH, store_path=STORE_PATH):
+    data = optimize_dtypes(pd.read_csv(csv_path))
+    if store_path.endswith(".parquet"):
+        data.to_parquet(store_path, index=False)
+    else:
+        # Uncompressed Feather can be memory-mapped straight into Arrow buffers
+        data.to_feather(store_path, compression="uncompressed")
+    return store_path
+
+
+def read_store(store_path=STORE_PATH, columns=DASHBOARD_COLUMNS):
+    if store_path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        table = pq.read_table(store_path, columns=columns, memory_map=True)
+    else:
+        import pyarrow.feather as feather
+        table = feather.read_table(store_path, columns=columns, memory_map=True)
+    # split_blocks keeps numeric columns zero-copy instead of consolidating them
+    return table.to_pandas(split_blocks=True)
+
+
+def read_csv(csv_path=CSV_PATH, columns=DASHBOARD_COLUMNS):
+    header = pd.read_csv(csv_path, nrows=0).columns
+    usecols = [col for col in header if columns is None or col in columns]
+    dtype = {col: "category" for col in usecols if col in CATEGORICAL_COLUMNS}
+    return optimize_dtypes(pd.read_csv(csv_path, usecols=usecols, dtype=dtype))
+
+
+def append_rows(data, rows):
+    # Concatenate keeping categorical columns categorical. Values not seen
+    # before are appended to the categories, so existing codes stay valid.
+    rows = rows[[col for col in data.columns if col in rows.columns]]
+    data_cols, row_cols = {}, {}
+    for col in data.columns:
+        if not isinstance(data[col].dtype, pd.CategoricalDtype) or col not in rows.columns:
+            continue
+        categories = data[col].cat.categories
+        values = pd.Index(pd.unique(rows[col].dropna().to_numpy()))
+        extra = values[~values.isin(categories)]
+        if len(extra):
+            categories = categories.append(extra)
+            data_cols[col] = data[col].cat.add_categories(extra)
+        row_cols[col] = pd.Categorical(rows[col], categories=categories)
+    return pd.concat([data.assign(**data_cols), rows.assign(**row_cols)], ignore_index=True)
+
+
+def file_version(path):
+    stat = os.stat(path)
+    return f"{os.path.basename(path)}:{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def store_is_current(store_path=STORE_PATH, csv_path=CSV_PATH):
+    # A store older than the CSV was converted from an earlier version of it
+    if not os.path.exists(store_path):
+        return False
+    return not os.path.exists(csv_path) or os.stat(csv_path).st_mtime_ns <= os.stat(store_path).st_mtime_ns
+
+
+def load_frame(store_path=STORE_PATH, csv_path=CSV_PATH, columns=DASHBOARD_COLUMNS):
+    data = None
+    if store_is_current(store_path, csv_path):
+        try:
+            data, path = read_store(store_path, columns), store_path
+        except ImportError:
+            pass  # pyarrow not installed, fall back to the CSV
+    if data is None:
+        data, path = read_csv(csv_path, columns), csv_path
+    # Changes whenever the underlying file does; used to invalidate caches
+    data.attrs["version"] = file_version(path)
+    return data
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert the dashboard CSV into a typed columnar store.")
+    parser.add_argument("csv_path", nargs="?", default=CSV_PATH)
+    parser.add_argument("store_path", nargs="?", default=STORE_PATH)
+    args = parser.parse_args()
+    print(f"Wrote {convert_csv(args.csv_path, args.store_path)}")
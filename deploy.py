@@ -1,460 +1,427 @@
 
+import calendar
+import os
+import time
+import uuid
+from collections import deque
 import streamlit as st
+import numpy as np
 import pandas as pd
-import plotly.express as px
-
-@st.cache_data
-def load_data():
-    data = pd.read_csv("sampled_data.csv")
-    return data
-
-df = load_data()
+from data_store import CSV_PATH, STORE_PATH, load_frame
+from bitmap_index import RANGE_COLUMNS
+from figure_cache import FigureCache, max_bytes_from_env
+from incremental import LiveDataset, Snapshot
+from charts import CHARTS, METRICS, TIMELINE_LABELS, Selection, default_filters, timeline_figure
+from profiling import NULL_PROFILER, Profiler
+from prefetch import Prefetcher, adjacent_selections
+import warm_cache
+
+rerun_start = time.perf_counter()
+
+# Profiling is off unless the page is opened with ?diagnostics=1 or the
+# server runs with DASHBOARD_DIAGNOSTICS=1; the Diagnostics page only exists then
+diagnostics = st.query_params.get("diagnostics") == "1" or os.environ.get("DASHBOARD_DIAGNOSTICS") == "1"
+profiler = Profiler() if diagnostics else NULL_PROFILER
+
+# The cached frames are shared by every session: with copy-on-write, slices
+# and column subsets of them are views, and nothing derived can write back
+pd.set_option("mode.copy_on_write", True)
+
+# The data files read; `python warm_cache.py --serve` sets them to its --store and --csv
+STORE_PATH = os.environ.get("DATA_STORE_PATH", STORE_PATH)
+CSV_PATH = os.environ.get("DATA_CSV_PATH", CSV_PATH)
+
+# Processes used to build the aggregate cube; 1 builds it in-process
+AGGREGATE_WORKERS = int(os.environ.get("AGGREGATE_WORKERS", "1"))
+
+@st.cache_resource
+def load_snapshot():
+    # Shared rather than copied per caller: the sorted frame in the index is
+    # the one full copy of the rows a process keeps
+    return Snapshot.load(STORE_PATH, CSV_PATH, workers=AGGREGATE_WORKERS)
+
+# Set to load the dataset from (and save it to) the warm cache in this
+# directory instead of building it from the data file; see warm_cache.py
+WARM_CACHE_DIR = os.environ.get("WARM_CACHE_DIR")
+
+@st.cache_resource
+def load_warm_snapshot():
+    snapshot, _ = warm_cache.load_snapshot(STORE_PATH, CSV_PATH, WARM_CACHE_DIR, workers=AGGREGATE_WORKERS)
+    return snapshot
+
+@st.cache_resource
+def load_figure_cache():
+    # `python warm_cache.py --serve` fills one with the default selection's figures before serving
+    if warm_cache.figure_cache is not None:
+        return warm_cache.figure_cache
+    return FigureCache(max_bytes=max_bytes_from_env())
+
+# Threads building likely next selections in the background; 0 turns prefetching off
+PREFETCH_WORKERS = int(os.environ.get("PREFETCH_WORKERS", max(1, (os.cpu_count() or 1) // 2)))
+
+@st.cache_resource
+def load_prefetcher():
+    figure_cache = load_figure_cache()
+    # Without a figure cache there is nowhere to put prefetched figures
+    return Prefetcher(figure_cache, PREFETCH_WORKERS) if PREFETCH_WORKERS and figure_cache.max_bytes else None
+
+@st.cache_resource
+def load_live_dataset(directory):
+    return LiveDataset(load_frame(STORE_PATH, CSV_PATH), directory,
+                       interval=float(os.environ.get("INCREMENTAL_INTERVAL", "30")),
+                       workers=AGGREGATE_WORKERS).start()
+
+incremental_dir = os.environ.get("INCREMENTAL_DIR")
+with profiler.span("dataset", "load") as span:
+    if incremental_dir:
+        # New partitions are merged in the background; a rerun works on one snapshot
+        dataset = load_live_dataset(incremental_dir).snapshot
+    elif WARM_CACHE_DIR:
+        dataset = load_warm_snapshot()
+    else:
+        dataset = load_snapshot()
+    span["rows"] = len(dataset.index.data)
+index = dataset.index
+figure_cache = load_figure_cache()
+figure_cache.invalidate(dataset.version)
+prefetcher = load_prefetcher()
+prefetch_owner = st.session_state.setdefault("prefetch_owner", uuid.uuid4().hex)
+if prefetcher:
+    # Prefetching pauses while any session reruns; this session's pending
+    # prefetches are dropped
+    prefetcher.start_rerun(prefetch_owner)
 
 st.title("FitLife Health and Fitness Tracking Dashboard")
 st.write("Explore your health and fitness data with interactive visualizations.")
 
 st.sidebar.header("Filters")
-gender_options = ["All"] + list(df['gender'].unique())
-gender = st.sidebar.selectbox("Select gender" , gender_options)
-age_category = st.sidebar.selectbox("Select the age category" , df['age_category'].unique())
-month = st.sidebar.selectbox("Select month name " , df['month_name'].unique())
-
-if gender == "All":
-    filtered_data = df[
-        (df['age_category'] == age_category) &
-        (df['month_name'] == month)
-    ]
+# An empty multi-select keeps every value
+default_gender, default_age_category, default_month = default_filters(index)
+gender = st.sidebar.multiselect("Select gender", index.options['gender'], default=default_gender, placeholder="All")
+age_category = st.sidebar.multiselect("Select the age category", index.options['age_category'],
+                                      default=default_age_category, placeholder="All")
+months = sorted(index.options['month_name'], key=lambda name: list(calendar.month_name).index(name))
+if st.sidebar.checkbox("Select a month range"):
+    first, last = st.sidebar.select_slider("Select months", months, value=(months[0], months[-1]))
+    month = months[months.index(first):months.index(last) + 1]
 else:
-    filtered_data = df[
-        (df['gender'] == gender) &
-        (df['age_category'] == age_category) &
-        (df['month_name'] == month)
-    ]
-
-def page1():
-    tab1, tab2, tab3, tab4 = st.tabs([
-        "Overview", "Activity Analysis", "Heart Rate & Stress Analysis",
-        "Health Condition & Fitness Level"])
-    
-    with tab1:
-        st.header("Overview - Key Health & Fitness Metrics")
-        
-        avg_heart_rate = filtered_data['avg_heart_rate'].mean()
-        avg_steps = filtered_data['daily_steps'].mean()
-        avg_sleep = filtered_data['hours_sleep'].mean()
-        avg_calories_burned = filtered_data['calories_burned'].mean()
-        avg_bmi = filtered_data['bmi'].mean()
-
-        st.metric("Average Heart Rate (bpm)", round(avg_heart_rate, 2))
-        st.metric("Average Daily Steps", round(avg_steps, 2))
-        st.metric("Average Sleep Hours", round(avg_sleep, 2))
-        st.metric("Average Calories Burned", round(avg_calories_burned, 2))
-        st.metric("Average BMI", round(avg_bmi, 2))
-        
-        bmi_categories = filtered_data['type_wight']
-        bmi_category_counts = bmi_categories.value_counts()
-
-        fig_bmi = px.pie(names=bmi_category_counts.index, values=bmi_category_counts.values, title="BMI Category Distribution")
-        st.plotly_chart(fig_bmi)
-        
-        health_condition_counts = filtered_data['health_condition'].value_counts()
-
-        fig_health = px.pie(names=health_condition_counts.index, values=health_condition_counts.values, title="Health Condition Distribution")
-        st.plotly_chart(fig_health)
-        
-        activity_type_counts = filtered_data['activity_type'].value_counts()
-
-        fig_activity_type = px.bar(x=activity_type_counts.index, y=activity_type_counts.values, title="activity_type Level Distribution")
-        st.plotly_chart(fig_activity_type)
-
-        st.subheader("Filtered Data Preview")
-        st.write(filtered_data.head())
-
-
-    with tab2:
-        st.header("Activity Analysis")
-        
-        col1, col2, col3 = st.columns([1,1,1])
-        col4, col5, col6 = st.columns([1,1,1])
-        
-        with col1:
-            activity_stats = filtered_data.groupby('activity_type').agg(
-                total_duration=('duration_minutes', 'sum')
-            ).reset_index()
-            fig_duration = px.histogram(activity_stats, x='activity_type', y='total_duration',
-                                  title="Total Duration per Activity Type",
-                                  labels={'total_duration': 'Total Duration (Minutes)', 'activity_type': 'Activity Type'},
-                                  color='activity_type', barmode='group')
-            st.plotly_chart(fig_duration)
-            
-
-        with col2:
-            fig_calories = px.histogram(filtered_data.groupby('activity_type').agg(
-                total_calories_burned=('calories_burned', 'sum')
-            ).reset_index(), x='activity_type', y='total_calories_burned',
-                                  title="Total Calories Burned per Activity Type",
-                                  labels={'total_calories_burned': 'Total Calories Burned', 'activity_type': 'Activity Type'},
-                                  color='activity_type', barmode='group')
-            st.plotly_chart(fig_calories)
-
-        with col3:
-            activity_type_counts = filtered_data['activity_type'].value_counts()
-            fig_activity_distribution = px.pie(names=activity_type_counts.index, values=activity_type_counts.values,
-                                               title="Activity Type Distribution", color=activity_type_counts.index)
-            st.plotly_chart(fig_activity_distribution)
-        
-        with col4:
-            activity_avg_duration = filtered_data.groupby('activity_type').agg(
-                avg_duration=('duration_minutes', 'mean')
-            ).reset_index()
-            fig_avg_duration = px.histogram(activity_avg_duration, x='activity_type', y='avg_duration',
-                                      title="Average Duration per Activity Type",
-                                      labels={'avg_duration': 'Average Duration (Minutes)', 'activity_type': 'Activity Type'},
-                                      color='activity_type', barmode='group')
-            st.plotly_chart(fig_avg_duration)
-
-        with col5:
-            activity_avg_calories = filtered_data.groupby('activity_type').agg(
-                avg_calories_burned=('calories_burned', 'mean')
-            ).reset_index()
-            fig_avg_calories = px.histogram(activity_avg_calories, x='activity_type', y='avg_calories_burned',
-                                      title="Average Calories Burned per Activity Type",
-                                      labels={'avg_calories_burned': 'Average Calories Burned', 'activity_type': 'Activity Type'},
-                                      color='activity_type', barmode='group')
-            st.plotly_chart(fig_avg_calories)
-
-        with col6:
-            activity_gender_stats = filtered_data.groupby(['activity_type', 'gender']).agg(
-                total_duration=('duration_minutes', 'sum')
-            ).reset_index()
-            fig_activity_gender = px.histogram(activity_gender_stats, x='activity_type', y='total_duration',
-                                         color='gender', title="Activity Type by Gender",
-                                         labels={'total_duration': 'Total Duration (Minutes)', 'activity_type': 'Activity Type'},
-                                         barmode='group')
-            st.plotly_chart(fig_activity_gender)
-
-        with col1:
-            age_duration_stats = filtered_data.groupby('age_category').agg(
-                total_duration=('duration_minutes', 'sum')
-            ).reset_index()
-            fig_age_duration = px.histogram(age_duration_stats, x='age_category', y='total_duration',
-                                      title="Duration by Age Category",
-                                      labels={'total_duration': 'Total Duration (Minutes)', 'age_category': 'Age Category'},
-                                      color='age_category', barmode='group')
-            st.plotly_chart(fig_age_duration)
-
-        with col2:
-            age_calories_stats = filtered_data.groupby('age_category').agg(
-                total_calories_burned=('calories_burned', 'sum')
-            ).reset_index()
-            fig_age_calories = px.histogram(age_calories_stats, x='age_category', y='total_calories_burned',
-                                      title="Calories Burned by Age Category",
-                                      labels={'total_calories_burned': 'Total Calories Burned', 'age_category': 'Age Category'},
-                                      color='age_category', barmode='group')
-            st.plotly_chart(fig_age_calories)
-
-        with col3:
-            steps_activity_stats = filtered_data.groupby('activity_type').agg(
-                total_steps=('daily_steps', 'sum')
-            ).reset_index()
-            fig_steps_activity = px.histogram(steps_activity_stats, x='activity_type', y='total_steps',
-                                        title="Total Steps by Activity Type",
-                                        labels={'total_steps': 'Total Steps', 'activity_type': 'Activity Type'},
-                                        color='activity_type', barmode='group')
-            st.plotly_chart(fig_steps_activity)
-
-        with col4:
-            fig_stress_activity = px.histogram(filtered_data, x='stress_level', color='activity_type',barmode='group',
-                                               title="Stress Level vs Activity Type",
-                                               labels={'stress_level': 'Stress Level', 'activity_type': 'Activity Type'})
-            st.plotly_chart(fig_stress_activity)
-        
-
-        with col5:
-            hydration_distribution = filtered_data.groupby('activity_type')['hydration_level'].mean().reset_index()
-            fig_hydration = px.pie(hydration_distribution, names='activity_type', values='hydration_level',
-                                   title="Hydration Level Distribution by Activity Type", color='activity_type')
-            st.plotly_chart(fig_hydration)
-
-        with col6:
-            resting_heart_rate_distribution = filtered_data.groupby('activity_type')['resting_heart_rate'].mean().reset_index()
-            fig_rhr = px.pie(resting_heart_rate_distribution, names='activity_type', values='resting_heart_rate',
-                             title="Resting Heart Rate Distribution by Activity Type", color='activity_type')
-            st.plotly_chart(fig_rhr)
-
-        with col1:
-            fig_bmi = px.bar(filtered_data.groupby('activity_type').agg(
-                avg_bmi=('bmi', 'mean')
-            ).reset_index(), x='activity_type', y='avg_bmi',
-                             title="BMI by Activity Type",
-                             labels={'avg_bmi': 'Average BMI', 'activity_type': 'Activity Type'},
-                             color='activity_type', barmode='group')
-            st.plotly_chart(fig_bmi)
-
-        with col2:
-            intensity_distribution = filtered_data.groupby('activity_type')['intensity'].count().reset_index()
-            fig_intensity = px.bar(intensity_distribution, x='activity_type', y='intensity',
-                                   title="Intensity Distribution by Activity Type",
-                                   labels={'intensity': 'Intensity', 'activity_type': 'Activity Type'},
-                                   color='activity_type', barmode='group')
-            st.plotly_chart(fig_intensity)
-
-        with col3:
-            fig_fitness_level = px.bar(filtered_data.groupby(['activity_type', 'fitness_level']).agg(
-                total_duration=('duration_minutes', 'sum')
-            ).reset_index(), x='activity_type', y='total_duration', color='fitness_level',
-                                       title="Fitness Level by Activity Type",
-                                       labels={'total_duration': 'Total Duration (Minutes)', 'activity_type': 'Activity Type'},
-                                       barmode='group')
-            st.plotly_chart(fig_fitness_level)
-
-    with tab3:
-        st.header("Heart Rate & Stress Analysis")
-        
-        col1, col2, col3 = st.columns(3)
-        col4, col5, col6 = st.columns(3)
-        
-        with col1:
-            fig_rhr_dist = px.histogram(filtered_data, x='resting_heart_rate', 
-                                        title="Resting Heart Rate Distribution",
-                                        labels={'resting_heart_rate': 'Resting Heart Rate'},
-                                        template='plotly_dark', text_auto=True)
-            st.plotly_chart(fig_rhr_dist)
-    
-        with col2:
-            heart_rate_activity_stats = filtered_data.groupby('activity_type').agg(
-                avg_heart_rate=('resting_heart_rate', 'mean')
-            ).reset_index()
-            fig_heart_rate_activity = px.bar(heart_rate_activity_stats, x='activity_type', y='avg_heart_rate',
-                                             title="Average Heart Rate by Activity Type",
-                                             labels={'avg_heart_rate': 'Average Heart Rate', 'activity_type': 'Activity Type'},
-                                             color='activity_type', barmode='group', 
-                                             template='plotly_dark', text_auto=True)
-            st.plotly_chart(fig_heart_rate_activity)
-    
-        with col3:
-            fig_stress_dist = px.histogram(filtered_data, x='stress_level', 
-                                           title="Stress Level Distribution",
-                                           labels={'stress_level': 'Stress Level'},
-                                           template='plotly_dark', text_auto=True)
-            st.plotly_chart(fig_stress_dist)
-    
-        with col4:
-            stress_activity_stats = filtered_data.groupby('activity_type').agg(
-                avg_stress_level=('stress_level', 'mean')
-            ).reset_index()
-            fig_stress_activity = px.bar(stress_activity_stats, x='activity_type', y='avg_stress_level',
-                                         title="Average Stress Level by Activity Type",
-                                         labels={'avg_stress_level': 'Average Stress Level', 'activity_type': 'Activity Type'},
-                                         color='activity_type', barmode='group', 
-                                         template='plotly_dark', text_auto=True)
-            st.plotly_chart(fig_stress_activity)
-    
-        
-    
-        with col6:
-            stress_gender_stats = filtered_data.groupby(['gender', 'stress_level']).agg(
-                count=('stress_level', 'count')
-            ).reset_index()
-            fig_stress_gender = px.bar(stress_gender_stats, x='gender', y='count', color='stress_level',
-                                       title="Stress Level Distribution by Gender",
-                                       labels={'count': 'Count', 'gender': 'Gender'},
-                                       barmode='group', template='plotly_dark', text_auto=True)
-            st.plotly_chart(fig_stress_gender)
-    
-        with col1:
-            heart_rate_gender_stats = filtered_data.groupby(['gender']).agg(
-                avg_heart_rate=('resting_heart_rate', 'mean')
-            ).reset_index()
-            fig_heart_rate_gender = px.bar(heart_rate_gender_stats, x='gender', y='avg_heart_rate',
-                                           title="Average Heart Rate by Gender",
-                                           labels={'avg_heart_rate': 'Average Heart Rate', 'gender': 'Gender'},
-                                           color='gender', barmode='group', template='plotly_dark', text_auto=True)
-            st.plotly_chart(fig_heart_rate_gender)
-    
-        with col2:
-            stress_age_stats = filtered_data.groupby('age_category').agg(
-                avg_stress_level=('stress_level', 'mean')
-            ).reset_index()
-            fig_stress_age = px.bar(stress_age_stats, x='age_category', y='avg_stress_level',
-                                    title="Average Stress Level by Age Category",
-                                    labels={'avg_stress_level': 'Average Stress Level', 'age_category': 'Age Category'},
-                                    color='age_category', barmode='group', 
-                                    template='plotly_dark', text_auto=True)
-            st.plotly_chart(fig_stress_age)
+    month = st.sidebar.multiselect("Select month name ", months, default=default_month,
+                                   placeholder="All")
+
+ranges = {}
+with st.sidebar.expander("Numeric ranges"):
+    for column in RANGE_COLUMNS:
+        low, high = index.bitmaps.value_range(column)
+        if np.isnan(low):
+            continue
+        as_int = pd.api.types.is_integer_dtype(index.data[column])
+        low, high = (int(low), int(high)) if as_int else (float(low), float(high))
+        bounds = st.slider(column.replace('_', ' ').capitalize(), low, high, (low, high))
+        # Untouched sliders select everything, which keeps the aggregate cube usable
+        if bounds != (low, high):
+            ranges[column] = bounds
+
+with profiler.span("selection", "filter") as span:
+    selection = Selection(dataset, gender, age_category, month, ranges)
+    span["rows"] = len(selection)
+filters = selection.filters
+
+lazy_sections = st.sidebar.checkbox("Render only the selected section", value=True)
+approximate = st.sidebar.checkbox("Approximate first paint", help="Show sketch estimates with error bounds "
+                                  "first and replace them with exact values once the rows are scanned")
+
+def render_figure(chart_id, cache_key, fig):
+    if profiler.enabled:
+        size = figure_cache.size_of(chart_id, cache_key, dataset.version)
+        size = len(fig.to_json()) if size is None else size
+    with profiler.span(chart_id, "render") as span:
+        st.plotly_chart(fig)
+        if profiler.enabled:
+            span["bytes"] = size
+
+rendered_charts = []
+
+def plotly_chart(chart_id):
+    rendered_charts.append(chart_id)
+    chart = CHARTS[chart_id]
+    fig = figure_cache.get_or_build(chart_id, filters, lambda: chart.build(selection, profiler), dataset.version)
+    render_figure(chart_id, filters, fig)
+
+def metric(metric_id):
+    with profiler.span(metric_id, "prepare") as span:
+        rows_read = selection.rows_read
+        values = METRICS[metric_id](selection)
+        span["rows"] = selection.rows_read - rows_read
+    return values
+
+def run_section(name, section):
+    with profiler.span(name, "section"):
+        section()
+
+def render_sections(sections):
+    # Several charts and summary numbers have nothing to show without rows
+    if len(selection) == 0:
+        st.write("No rows match the filters.")
+        return
+    if lazy_sections:
+        name = st.radio("Select section:", list(sections), horizontal=True, label_visibility="collapsed")
+        run_section(name, sections[name])
+    else:
+        for tab, (name, section) in zip(st.tabs(list(sections)), sections.items()):
+            with tab:
+                run_section(name, section)
+
+def overview_section():
+    st.header("Overview - Key Health & Fitness Metrics")
+
+    for label, value in metric("overview_section.metrics").items():
+        st.metric(label, round(value, 2))
+
+    plotly_chart("overview_section.fig_bmi")
+    plotly_chart("overview_section.fig_health")
+    plotly_chart("overview_section.fig_activity_type")
+
+    st.subheader("Filtered Data Preview")
+    st.write(selection.head())
+
+def activity_section():
+    st.header("Activity Analysis")
     
-        with col3:
-            heart_rate_age_stats = filtered_data.groupby('age_category').agg(
-                avg_heart_rate=('resting_heart_rate', 'mean')
-            ).reset_index()
-            fig_heart_rate_age = px.bar(heart_rate_age_stats, x='age_category', y='avg_heart_rate',
-                                        title="Average Heart Rate by Age Category",
-                                        labels={'avg_heart_rate': 'Average Heart Rate', 'age_category': 'Age Category'},
-                                        color='age_category', barmode='group', 
-                                        template='plotly_dark', text_auto=True)
-            st.plotly_chart(fig_heart_rate_age)
+    col1, col2, col3 = st.columns([1,1,1])
+    col4, col5, col6 = st.columns([1,1,1])
+
+    with col1:
+        plotly_chart("activity_section.fig_duration")
+    with col2:
+        plotly_chart("activity_section.fig_calories")
+    with col3:
+        plotly_chart("activity_section.fig_activity_distribution")
+    with col4:
+        plotly_chart("activity_section.fig_avg_duration")
+    with col5:
+        plotly_chart("activity_section.fig_avg_calories")
+    with col6:
+        plotly_chart("activity_section.fig_activity_gender")
+    with col1:
+        plotly_chart("activity_section.fig_age_duration")
+    with col2:
+        plotly_chart("activity_section.fig_age_calories")
+    with col3:
+        plotly_chart("activity_section.fig_steps_activity")
+    with col4:
+        plotly_chart("activity_section.fig_stress_activity")
+    with col5:
+        plotly_chart("activity_section.fig_hydration")
+    with col6:
+        plotly_chart("activity_section.fig_rhr")
+    with col1:
+        plotly_chart("activity_section.fig_bmi")
+    with col2:
+        plotly_chart("activity_section.fig_intensity")
+    with col3:
+        plotly_chart("activity_section.fig_fitness_level")
+
+def heart_rate_section():
+    st.header("Heart Rate & Stress Analysis")
     
-        
+    col1, col2, col3 = st.columns(3)
+    col4, col5, col6 = st.columns(3)
+
+    with col1:
+        plotly_chart("heart_rate_section.fig_rhr_dist")
+    with col2:
+        plotly_chart("heart_rate_section.fig_heart_rate_activity")
+    with col3:
+        plotly_chart("heart_rate_section.fig_stress_dist")
+    with col4:
+        plotly_chart("heart_rate_section.fig_stress_activity")
+    with col6:
+        plotly_chart("heart_rate_section.fig_stress_gender")
+    with col1:
+        plotly_chart("heart_rate_section.fig_heart_rate_gender")
+    with col2:
+        plotly_chart("heart_rate_section.fig_stress_age")
+    with col3:
+        plotly_chart("heart_rate_section.fig_heart_rate_age")
+
+def health_condition_section():
+    st.header("Health Condition & Fitness Level Analysis")
+
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        plotly_chart("health_condition_section.fig_health_condition")
+    with col2:
+        plotly_chart("health_condition_section.fig_fitness_level")
+    with col3:
+        plotly_chart("health_condition_section.fig_stress_health_condition")
+    with col1:
+        plotly_chart("health_condition_section.fig_bmi_health_condition")
+    with col2:
+        plotly_chart("health_condition_section.fig_duration_fitness")
+    with col3:
+        plotly_chart("health_condition_section.fig_calories_fitness")
+    with col1:
+        plotly_chart("health_condition_section.fig_steps_fitness")
+    with col2:
+        plotly_chart("health_condition_section.fig_hydration_health_condition")
+
+def summary_section():
+    st.header("Summary Statistics")
+
+    participants_line = st.empty()
+    median_line = st.empty()
+    if approximate and selection.sketch is not None:
+        estimates = metric("summary_section.estimates")
+        participants, error = estimates['total_participants']
+        participants_line.subheader(f"Total Participants: ~{participants:,.0f} (± {error:,.0f})")
+        median, bound = estimates['median_resting_heart_rate']
+        median_line.subheader(f"Median Resting Heart Rate: ~{median:.1f} (± {bound:.1f}) bpm")
+
+    stats = metric("summary_section.stats")
+    st.subheader(f"Average Workout Duration: {stats['avg_duration']:.2f} minutes")
+    st.subheader(f"Average Calories Burned: {stats['avg_calories']:.2f} kcal")
+    st.subheader(f"Average Daily Steps: {stats['avg_steps']:.0f} steps")
+    st.subheader(f"Average Hydration Level: {stats['avg_hydration']:.2f}")
+
+    st.write("---")
+
+    st.subheader("Most Popular Activity Type:")
+    st.write(stats['top_activity_type'])
+
+    st.write("---")
+
+    # Exact values replace the estimates once the selected rows are scanned
+    scans = metric("summary_section.scans")
+    participants_line.subheader(f"Total Participants: {scans['total_participants']}")
+    median_line.subheader(f"Median Resting Heart Rate: {scans['median_resting_heart_rate']:.1f} bpm")
+
+def engagement_section():
+    st.header("Engagement Insights")
+
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        plotly_chart("engagement_section.fig_age_category")
+    with col2:
+        plotly_chart("engagement_section.fig_gender")
+    with col3:
+        plotly_chart("engagement_section.fig_activity_type")
+
+def timeline_chart(chart_id, timeline, column):
+    with profiler.span(chart_id, "figure") as span:
+        span["rows"] = len(timeline)
+        return timeline_figure(timeline, column)
+
+def participant_section():
+    st.header("Participant Timeline")
+
+    # Participants in the sidebar selection; their timeline covers the whole year
+    participants = sorted(pd.unique(selection.column('participant_id')))
+    if not participants:
+        st.write("No participants in this selection.")
+        return
+    participant = st.selectbox("Select participant", participants)
+    timeline = dataset.participants.timeline(participant)
+    st.caption(f"{len(timeline)} recorded days, with 7 and 30 day rolling means")
+
+    cols = st.columns(2)
+    for i, column in enumerate(TIMELINE_LABELS):
+        with cols[i % 2]:
+            chart_id = f"participant_section.{column}"
+            fig = figure_cache.get_or_build(chart_id, (participant,), lambda: timeline_chart(chart_id, timeline, column),
+                                            dataset.version)
+            render_figure(chart_id, (participant,), fig)
+
+def health_fitness_section():
+    st.header("Health & Fitness Insights")
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        plotly_chart("health_fitness_section.fig_stress_fitness_level")
+    with col2:
+        plotly_chart("health_fitness_section.fig_health_condition")
+
+    plotly_chart("health_fitness_section.fig_health_condition_calories")
+
+PAGE1_SECTIONS = {
+    "Overview": overview_section,
+    "Activity Analysis": activity_section,
+    "Heart Rate & Stress Analysis": heart_rate_section,
+    "Health Condition & Fitness Level": health_condition_section,
+}
 
-    with tab4:
-        st.header("Health Condition & Fitness Level Analysis")
-    
-        col1, col2, col3 = st.columns(3)
-    
-        health_condition_colors = ['#636EFA', '#00CC96', '#AB63FA', '#FF7F0E']  
-        fitness_level_colors = ['#EF553B', '#00CC96', '#636EFA']  
-    
-        with col1:
-            health_condition_counts = filtered_data['health_condition'].value_counts()
-            fig_health_condition = px.pie(names=health_condition_counts.index, values=health_condition_counts.values,
-                                          title="Health Condition Distribution", color=health_condition_counts.index,
-                                          color_discrete_sequence=health_condition_colors, template='plotly_dark')
-            st.plotly_chart(fig_health_condition)
-    
-        with col2:
-            fitness_level_counts = filtered_data['fitness_level'].value_counts()
-            fig_fitness_level = px.pie(names=fitness_level_counts.index, values=fitness_level_counts.values,
-                                        title="Fitness Level Distribution", color=fitness_level_counts.index,
-                                        color_discrete_sequence=fitness_level_colors, template='plotly_dark')
-            st.plotly_chart(fig_fitness_level)
-    
-        with col3:
-            fig_stress_health_condition = px.histogram(filtered_data, x='stress_level', color='health_condition',
-                                                       title="Stress Level by Health Condition",
-                                                       labels={'stress_level': 'Stress Level', 'health_condition': 'Health Condition'},
-                                                       template='plotly_dark', barmode='group', text_auto=True,
-                                                       color_discrete_sequence=health_condition_colors)
-            st.plotly_chart(fig_stress_health_condition)
-    
-        with col1:
-            fig_bmi_health_condition = px.histogram(filtered_data, x='bmi', color='health_condition',
-                                                    title="BMI by Health Condition",
-                                                    labels={'bmi': 'BMI', 'health_condition': 'Health Condition'},
-                                                    template='plotly_dark', barmode='group', text_auto=True,
-                                                    color_discrete_sequence=health_condition_colors)
-            st.plotly_chart(fig_bmi_health_condition)
-    
-        with col2:
-            fig_duration_fitness = px.histogram(filtered_data, x='duration_minutes', color='intensity',
-                                                title="Duration by Intensity",
-                                                labels={'duration_minutes': 'Duration (Minutes)', 'intensity': 'Intensity'},
-                                                template='plotly_dark', barmode='group', text_auto=True,
-                                                color_discrete_sequence=fitness_level_colors)
-            st.plotly_chart(fig_duration_fitness)
-    
-        with col3:
-            fig_calories_fitness = px.histogram(filtered_data, x='calories_burned', color='type_wight',
-                                                title="Calories Burned by type wight",
-                                                labels={'calories_burned': 'Calories Burned', 'type_wight': 'type wight'},
-                                                template='plotly_dark', barmode='group', text_auto=True,
-                                                color_discrete_sequence=fitness_level_colors)
-            st.plotly_chart(fig_calories_fitness)
-    
-        with col1:
-            fig_steps_fitness = px.histogram(filtered_data, x='daily_steps', color='type_wight',
-                                             title="Steps by type_wight",
-                                             labels={'daily_steps': 'Daily Steps', 'type_wight': 'type wight'},
-                                             template='plotly_dark', barmode='group', text_auto=True,
-                                             color_discrete_sequence=fitness_level_colors)
-            st.plotly_chart(fig_steps_fitness)
-    
-        with col2:
-            hydration_health_condition_stats = filtered_data.groupby('health_condition')['hydration_level'].mean().reset_index()
-            fig_hydration_health_condition = px.pie(hydration_health_condition_stats, names='health_condition', values='hydration_level',
-                                                    title="Hydration Level by Health Condition", color='health_condition', 
-                                                    color_discrete_sequence=health_condition_colors, template='plotly_dark')
-            st.plotly_chart(fig_hydration_health_condition)
+PAGE2_SECTIONS = {
+    "Summary Statistics": summary_section,
+    "Engagement Insights": engagement_section,
+    "Health & Fitness Insights": health_fitness_section,
+    "Participant Timeline": participant_section,
+}
+
+def page1():
+    render_sections(PAGE1_SECTIONS)
 
 def page2():
     st.title("Business Insights")
-
-    tabs = st.tabs(["Summary Statistics", "Engagement Insights", "Health & Fitness Insights"])
-
-    with tabs[0]:
-        st.header("Summary Statistics")
-
-        total_participants = len(filtered_data['participant_id'].unique())
-        st.subheader(f"Total Participants: {total_participants}")
-
-        avg_duration = filtered_data['duration_minutes'].mean()
-        st.subheader(f"Average Workout Duration: {avg_duration:.2f} minutes")
-
-        avg_calories = filtered_data['calories_burned'].mean()
-        st.subheader(f"Average Calories Burned: {avg_calories:.2f} kcal")
-
-        avg_steps = filtered_data['daily_steps'].mean()
-        st.subheader(f"Average Daily Steps: {avg_steps:.0f} steps")
-
-        avg_hydration = filtered_data['hydration_level'].mean()
-        st.subheader(f"Average Hydration Level: {avg_hydration:.2f}")
-
-        st.write("---")
-
-        activity_type_counts = filtered_data['activity_type'].value_counts()
-        st.subheader("Most Popular Activity Type:")
-        st.write(activity_type_counts.idxmax())  
-
-        st.write("---")
-
-    with tabs[1]:
-        st.header("Engagement Insights")
-
-        col1, col2, col3 = st.columns(3)
-
-        with col1:
-            age_category_counts = filtered_data['age_category'].value_counts()
-            fig_age_category = px.pie(names=age_category_counts.index, values=age_category_counts.values,
-                                      title="Age Category Distribution", color=age_category_counts.index, 
-                                      template='plotly_dark', color_discrete_sequence=px.colors.qualitative.Set3)
-            st.plotly_chart(fig_age_category)
-
-        with col2:
-            gender_counts = filtered_data['gender'].value_counts()
-            fig_gender = px.pie(names=gender_counts.index, values=gender_counts.values,
-                                title="Gender Distribution", color=gender_counts.index,
-                                template='plotly_dark', color_discrete_sequence=px.colors.qualitative.Set1)
-            st.plotly_chart(fig_gender)
-
-        with col3:
-            activity_type_counts = filtered_data['activity_type'].value_counts()
-            fig_activity_type = px.bar(x=activity_type_counts.index, y=activity_type_counts.values, 
-                                       title="Most Popular Activity Types", labels={'x': 'Activity Type', 'y': 'Frequency'},
-                                       template='plotly_dark', color=activity_type_counts.index,
-                                       color_discrete_sequence=px.colors.qualitative.Set2, barmode='group')
-            st.plotly_chart(fig_activity_type)
-
-    with tabs[2]:
-        st.header("Health & Fitness Insights")
-
-        col1, col2 = st.columns(2)
-
-        with col1:
-            stress_fitness_level = filtered_data.groupby('fitness_level')['stress_level'].mean().reset_index()
-            fig_stress_fitness_level = px.bar(stress_fitness_level, x='fitness_level', y='stress_level',
-                                              title="Average Stress Level by Fitness Level",
-                                              labels={'stress_level': 'Average Stress Level', 'fitness_level': 'Fitness Level'},
-                                              template='plotly_dark', color='fitness_level',
-                                              color_discrete_sequence=px.colors.qualitative.Set3)
-            st.plotly_chart(fig_stress_fitness_level)
-
-        with col2:
-            health_condition_counts = filtered_data['health_condition'].value_counts()
-            fig_health_condition = px.pie(names=health_condition_counts.index, values=health_condition_counts.values,
-                                          title="Health Condition Distribution", color=health_condition_counts.index,
-                                          template='plotly_dark', color_discrete_sequence=px.colors.qualitative.Pastel)
-            st.plotly_chart(fig_health_condition)
-
-        health_condition_calories = filtered_data.groupby('health_condition')['calories_burned'].sum().reset_index()
-        fig_health_condition_calories = px.bar(health_condition_calories, x='health_condition', y='calories_burned',
-                                               title="Total Calories Burned by Health Condition",
-                                               labels={'calories_burned': 'Total Calories Burned', 'health_condition': 'Health Condition'},
-                                               template='plotly_dark', color='health_condition',
-                                               color_discrete_sequence=px.colors.qualitative.Set2)
-        st.plotly_chart(fig_health_condition_calories)
+    render_sections(PAGE2_SECTIONS)
+
+def diagnostics_page():
+    st.title("Diagnostics")
+    profiles = st.session_state.get("profiles")
+    if not profiles:
+        st.write("Open Page 1 or Page 2 to profile a rerun.")
+        return
+    last = profiles[-1]
+    profile = last['profiler']
+    st.caption(f"Last profiled rerun: {last['page']}, {last['mode']}. Stages nest, so their times overlap.")
+
+    st.subheader("Stages")
+    st.dataframe(profile.stage_totals().round(1))
+    st.subheader("Sections")
+    st.dataframe(profile.by_name("section").round(1))
+    st.subheader("Charts")
+    st.caption("Cached charts were served from the figure cache and only rendered")
+    st.dataframe(profile.chart_table().round(2))
+    st.download_button("Download trace", profile.trace(), file_name="dashboard-trace.json", mime="application/json",
+                       help="Chrome trace event format; open it in Perfetto or chrome://tracing")
+
+    st.subheader("Recent reruns")
+    st.dataframe(pd.DataFrame([{
+        'page': entry['page'], 'mode': entry['mode'], 'rerun ms': entry['ms'],
+        'charts': int((entry['profiler'].frame()['stage'] == "render").sum()),
+        'KB': entry['profiler'].frame()['bytes'].sum() / 1024,
+    } for entry in reversed(profiles)]).round(1))
+    st.subheader("Figure cache")
+    st.dataframe(pd.Series(figure_cache.stats(), name='value').round(2))
+    if prefetcher:
+        st.subheader("Prefetch")
+        st.caption("Hit rate counts prefetched charts that were later shown; wasted ones were evicted "
+                   "or invalidated unused")
+        st.dataframe(pd.Series(prefetcher.stats(), name='value').round(2))
 
 pages = {
     'Page 1': page1,
     'Page 2':page2
 }
+if diagnostics:
+    pages['Diagnostics'] = diagnostics_page
 pg = st.sidebar.radio('Select Page:', pages.keys())
 pages[pg]()
+
+if prefetcher:
+    # Queued after the page is rendered, so the rerun itself never waits on it
+    prefetcher.finish_rerun(prefetch_owner)
+    adjacent = adjacent_selections(gender, age_category, month, index.options['gender'])
+    prefetcher.schedule(prefetch_owner, dataset, adjacent, rendered_charts, ranges)
+
+if profiler.enabled and pg != 'Diagnostics':
+    profiler.record("rerun", "rerun", rerun_start)
+    mode = "selected section" if lazy_sections else "all sections"
+    profiles = st.session_state.setdefault("profiles", deque(maxlen=20))
+    profiles.append({'page': pg, 'mode': mode, 'ms': profiler.frame()['ms'].iloc[-1], 'profiler': profiler})
+    trace_dir = os.environ.get("DASHBOARD_TRACE_DIR")
+    if trace_dir:
+        path = os.path.join(trace_dir, f"trace-{time.time_ns()}.json")
+        with open(path, "w") as f:
+            f.write(profiler.trace())
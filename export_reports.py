@@ -0,0 +1,212 @@
+import argparse
+import json
+import os
+import re
+import time
+
+import numpy as np
+import plotly.io as pio
+
+from aggregates import codes_against
+from charts import CHARTS, METRICS, Binned, Selection, all_filters
+from data_store import CSV_PATH, STORE_PATH, load_frame
+from filter_index import FILTER_KEYS
+from histograms import binned_cell, bin_counts_by_cell
+from incremental import Snapshot
+from parallel_aggregates import make_executor
+
+# Headless export of the dashboard for every (gender, age_category, month)
+# combination the sidebar offers, gender "All" included. The numbers behind
+# every chart come from one pass over the rows rather than one filter per
+# combination: the aggregate cube is a single multi-key reduction over
+# (age_category, month_name, gender, *grouping); histograms bin all rows at
+# once with the combination as an extra key; participant counts and median
+# resting heart rates come from one groupby on the filter keys (and one on
+# age_category and month_name for gender "All"). Worker processes then only
+# turn the small per-combination results into figures and write one HTML
+# page or JSON document per combination.
+
+OUTPUT_DIR = "reports"
+FORMATS = ["html", "json"]
+PLOTLY_CDN = "cdn"
+
+SCAN_METRIC = "summary_section.scans"
+# Sketch estimates only stand in for the exact scans on a first paint
+SKIPPED_METRICS = {"summary_section.estimates"}
+
+
+def _cells(snapshot):
+    # Every index row's (age_category, month_name, gender) cell number in the
+    # cube's label space, -1 where a filter key is missing
+    data, labels = snapshot.index.data, snapshot.cube.labels
+    codes = [codes_against(data[col], labels[col]) for col in FILTER_KEYS]
+    shape = tuple(len(labels[col]) for col in FILTER_KEYS)
+    valid = np.logical_and.reduce([col_codes >= 0 for col_codes in codes])
+    cells = np.full(len(data), -1, dtype=np.int64)
+    cells[valid] = np.ravel_multi_index([col_codes[valid] for col_codes in codes], shape)
+    return cells, shape
+
+
+def _cell(snapshot, shape, gender, age_category, month):
+    # Index into tables shaped (*shape, ...) for one combination
+    labels = snapshot.cube.labels
+    age, month = labels["age_category"].get_loc(age_category), labels["month_name"].get_loc(month)
+    if gender == "All":
+        return age, month, slice(None)
+    return age, month, labels["gender"].get_loc(gender)
+
+
+def _histograms(snapshot, cells, shape):
+    # (x, color) -> (counts, first rows, names) shaped by cell
+    histograms = {}
+    for chart in CHARTS.values():
+        if isinstance(chart.prepare, Binned) and (chart.prepare.x, chart.prepare.color) not in histograms:
+            x, color = chart.prepare.x, chart.prepare.color
+            counts, first, names = bin_counts_by_cell(snapshot.index.data, x, snapshot.bins.edges_for(x),
+                                                      cells, int(np.prod(shape)), color)
+            histograms[(x, color)] = (counts.reshape(shape + counts.shape[1:]),
+                                      first.reshape(shape + first.shape[1:]), names)
+    return histograms
+
+
+def _scans(snapshot):
+    # summary_scans for every combination, gender "All" under the key "All"
+    data = snapshot.index.data
+    scans = {}
+    for keys in (FILTER_KEYS, FILTER_KEYS[:2]):
+        stats = data.groupby(keys, observed=True).agg(total_participants=("participant_id", "nunique"),
+                                                      median_resting_heart_rate=("resting_heart_rate", "median"))
+        for key, row in stats.iterrows():
+            age, month, gender = key if len(key) == 3 else key + ("All",)
+            scans[(gender, age, month)] = {"total_participants": int(row["total_participants"]),
+                                           "median_resting_heart_rate": row["median_resting_heart_rate"]}
+    return scans
+
+
+def combination_data(snapshot, filters=None):
+    # [(filters, rows, {chart_id: prepared}, {metric_id: values}), ...] for
+    # every combination; cube-backed charts read only their cube view
+    filters = filters or all_filters(snapshot.index)
+    cells, shape = _cells(snapshot)
+    histograms = _histograms(snapshot, cells, shape)
+    scans = _scans(snapshot)
+
+    combinations = []
+    for gender, age, month in filters:
+        selection = Selection(snapshot, gender, age, month)
+        if len(selection) == 0:
+            # Several charts and summary numbers have nothing to show without rows
+            combinations.append(((gender, age, month), 0, {}, {}))
+            continue
+        cell = _cell(snapshot, shape, gender, age, month)
+        charts = {}
+        for chart_id, chart in CHARTS.items():
+            if isinstance(chart.prepare, Binned):
+                counts, first, names = histograms[(chart.prepare.x, chart.prepare.color)]
+                counts, first = counts[cell], first[cell]
+                if gender == "All":
+                    counts, first = counts.sum(axis=0), first.min(axis=0)
+                charts[chart_id] = binned_cell(snapshot.bins.edges_for(chart.prepare.x), counts, first, names)
+            else:
+                charts[chart_id] = chart.prepare(selection)
+        metrics = {metric_id: metric(selection) for metric_id, metric in METRICS.items()
+                   if metric_id not in SKIPPED_METRICS | {SCAN_METRIC}}
+        metrics[SCAN_METRIC] = scans[(gender, age, month)]
+        if selection.rows_read:
+            # Every chart and metric must come from the one pass above
+            raise RuntimeError(f"{selection.rows_read} rows read for {(gender, age, month)} outside the one pass")
+        combinations.append(((gender, age, month), len(selection), charts, metrics))
+    return combinations
+
+
+def combination_path(filters, fmt):
+    return os.path.join(*(re.sub(r"[^\w.-]+", "_", str(value)) for value in filters)) + f".{fmt}"
+
+
+def _html(filters, rows, figures, metrics):
+    title = " / ".join(f"{key}: {value}" for key, value in zip(["gender"] + FILTER_KEYS[:2], filters))
+    summary = f"{rows:,} rows" if rows else "No rows match the filters."
+    parts = [f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{title}</title></head><body>",
+             f"<h1>{title}</h1><p>{summary}</p><table>"]
+    for values in metrics.values():
+        parts += [f"<tr><th>{name}</th><td>{value:,.2f}</td></tr>" if isinstance(value, float)
+                  else f"<tr><th>{name}</th><td>{value}</td></tr>" for name, value in values.items()]
+    parts.append("</table>")
+    for i, fig in enumerate(figures.values()):
+        parts.append(pio.to_html(fig, full_html=False, include_plotlyjs=PLOTLY_CDN if i == 0 else False))
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def _json(filters, rows, figures, metrics):
+    return pio.json.to_json_plotly({
+        "filters": dict(zip(["gender"] + FILTER_KEYS[:2], filters)), "rows": rows, "metrics": metrics,
+        "charts": {chart_id: fig.to_plotly_json() for chart_id, fig in figures.items()},
+    })
+
+
+def render_combination(combination, output_dir, fmt):
+    # Runs in a worker: build the figures of one combination and write them.
+    # Returns (path, bytes written, seconds).
+    start = time.perf_counter()
+    filters, rows, charts, metrics = combination
+    figures = {chart_id: CHARTS[chart_id].figure(prepared) for chart_id, prepared in charts.items()}
+    text = (_html if fmt == "html" else _json)(filters, rows, figures, metrics)
+    path = os.path.join(output_dir, combination_path(filters, fmt))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return path, len(text.encode("utf-8")), time.perf_counter() - start
+
+
+def export(data, output_dir=OUTPUT_DIR, fmt="html", workers=1, filters=None):
+    start = time.perf_counter()
+    snapshot = Snapshot.build(data, data.attrs.get("version"))
+    built = time.perf_counter()
+    combinations = combination_data(snapshot, filters)
+    aggregated = time.perf_counter()
+
+    os.makedirs(output_dir, exist_ok=True)
+    args = [(combination, output_dir, fmt) for combination in combinations]
+    if workers > 1:
+        with make_executor(workers) as executor:
+            results = list(executor.map(render_combination, *zip(*args),
+                                        chunksize=max(1, len(args) // (workers * 4))))
+    else:
+        results = [render_combination(*arg) for arg in args]
+    wall = time.perf_counter() - start
+
+    stats = {
+        "combinations": len(combinations), "charts": len(combinations) * len(CHARTS), "rows": len(data),
+        "workers": workers, "format": fmt, "wall s": wall, "combinations per s": len(combinations) / wall,
+        "index s": built - start, "aggregate s": aggregated - built, "render s": wall - (aggregated - start),
+        "render task s": sum(seconds for _, _, seconds in results),
+        "bytes": sum(size for _, size, _ in results),
+    }
+    index = [{"gender": filters[0], "age_category": filters[1], "month_name": filters[2], "rows": rows,
+              "path": os.path.relpath(path, output_dir)}
+             for (filters, rows, _, _), (path, _, _) in zip(combinations, results)]
+    with open(os.path.join(output_dir, "index.json"), "w") as f:
+        json.dump({"stats": stats, "combinations": index}, f, indent=1)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the dashboard for every gender, age category and month.")
+    parser.add_argument("--store", default=STORE_PATH)
+    parser.add_argument("--csv", default=CSV_PATH)
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    parser.add_argument("--format", choices=FORMATS, default="html")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    data = load_frame(args.store, args.csv)
+    stats = export(data, args.output_dir, args.format, args.workers)
+    print(f"Exported {stats['combinations']} combinations ({stats['charts']:,} charts, "
+          f"{stats['bytes'] / 2 ** 20:.1f} MB) to {args.output_dir} in {stats['wall s']:.2f} s: "
+          f"{stats['combinations per s']:.1f} combinations/s")
+    print(f"index {stats['index s']:.2f} s, aggregates {stats['aggregate s']:.2f} s, "
+          f"figures {stats['render s']:.2f} s ({stats['render task s']:.2f} s of tasks in {stats['workers']} workers)")
+
+
+if __name__ == "__main__":
+    main()
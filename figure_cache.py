@@ -0,0 +1,122 @@
+import os
+import threading
+from collections import OrderedDict
+
+from lazy_import import LazyModule
+
+# Built figures shared by every session, keyed by (chart id, filter
+# selection, dataset version) and evicted least-recently-used once the
+# serialized size of the cached figures exceeds max_bytes. Figures put by
+# the prefetcher remember their build time until first used, so prefetch
+# hits and work thrown away unused can be counted.
+
+pio = LazyModule("plotly.io")
+
+
+def max_bytes_from_env():
+    # FIGURE_CACHE_MB, 256 by default; 0 disables the cache
+    return int(os.environ.get("FIGURE_CACHE_MB", "256")) * 2**20
+
+
+class FigureCache:
+
+    def __init__(self, max_bytes=256 * 2**20):
+        self.max_bytes = max_bytes
+        self.version = None
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.prefetch_hits = 0
+        self.prefetch_wasted = 0
+        self.prefetch_wasted_s = 0.0
+        self._lock = threading.Lock()
+
+    def _discard(self, entry):
+        # Called with the lock held for every entry leaving the cache
+        self.bytes -= entry[1]
+        if entry[2] is not None:
+            self.prefetch_wasted += 1
+            self.prefetch_wasted_s += entry[2]
+
+    def invalidate(self, version):
+        with self._lock:
+            if version != self.version:
+                self.version = version
+                for entry in self.entries.values():
+                    self._discard(entry)
+                self.entries.clear()
+                self.bytes = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            if entry[2] is not None:
+                self.prefetch_hits += 1
+                self.entries[key] = entry[:2] + (None,)
+            return entry[0]
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self.entries
+
+    def put(self, key, fig, prefetch_s=None):
+        # prefetch_s: build time of a figure nobody has asked for yet
+        size = len(pio.to_json(fig, validate=False))
+        with self._lock:
+            if size > self.max_bytes or key[2] != self.version:
+                return size  # too large, or built from a dataset that has since changed
+            if key in self.entries:
+                self._discard(self.entries.pop(key))
+            self.entries[key] = (fig, size, prefetch_s)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self._discard(evicted)
+                self.evictions += 1
+        return size
+
+    def key(self, chart_id, filters, version=None):
+        return (chart_id, filters, self.version if version is None else version)
+
+    def get_or_build(self, chart_id, filters, build, version=None):
+        # version: that of the dataset `build` reads, which may already be
+        # older than the cache's if a newer snapshot arrived mid-rerun
+        if not self.max_bytes:
+            with self._lock:
+                self.misses += 1
+            return build()
+        key = self.key(chart_id, filters, version)
+        fig = self.get(key)
+        if fig is None:
+            # Built outside the lock so a slow chart never blocks other sessions
+            fig = build()
+            self.put(key, fig)
+        return fig
+
+    def size_of(self, chart_id, filters, version=None):
+        # Serialized size of a cached figure, or None if it is not cached
+        with self._lock:
+            entry = self.entries.get(self.key(chart_id, filters, version))
+            return None if entry is None else entry[1]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'MB': self.bytes / 2**20,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit rate': self.hits / lookups if lookups else 0.0,
+                'prefetch hits': self.prefetch_hits,
+                'prefetch wasted': self.prefetch_wasted,
+                'prefetch wasted s': self.prefetch_wasted_s,
+            }
@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+
+from bitmap_index import BitmapIndex
+from data_store import append_rows
+
+FILTER_KEYS = ["age_category", "month_name", "gender"]
+
+
+def selected_values(value):
+    # A sidebar filter value as a list of labels, or None for every label:
+    # one label, a list of labels, "All", or an empty list
+    if isinstance(value, (list, tuple)):
+        return list(value) or None
+    return None if value == "All" else [value]
+
+
+def category_codes(column):
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column.cat.codes.to_numpy(), column.cat.categories
+    codes, uniques = pd.factorize(column, sort=True)
+    return codes, uniques
+
+
+class FilterIndex:
+    # Rows sorted on (age_category, month_name, gender) so that every
+    # single-valued selection, including gender "All", is one contiguous row
+    # range. Multi-selects and numeric ranges go through the bitmap index.
+
+    def __init__(self, data, options=None, presorted=False):
+        self.options = options or {col: list(data[col].dropna().unique()) for col in FILTER_KEYS}
+        key, codes, labels = self._sort_key(data)
+        if not presorted:
+            # Sorted on the same key merge() relies on, which puts missing values first
+            order = np.argsort(key, kind="stable")
+            data = data.take(order).reset_index(drop=True)
+            key, codes = key[order], [col_codes[order] for col_codes in codes]
+        self.data = data
+        self.bitmaps = BitmapIndex(data)
+        starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]]) if len(key) else np.array([], dtype=np.int64)
+        stops = np.r_[starts[1:], len(key)]
+
+        self.ranges = {}
+        self.all_ranges = {}
+        for start, stop in zip(starts, stops):
+            if any(col_codes[start] < 0 for col_codes in codes):
+                continue  # missing key values can never be selected
+            age, month, gender = (col_labels[col_codes[start]] for col_codes, col_labels in zip(codes, labels))
+            self.ranges[(gender, age, month)] = (start, stop)
+            first, _ = self.all_ranges.get((age, month), (start, stop))
+            self.all_ranges[(age, month)] = (first, stop)
+
+    @staticmethod
+    def _sort_key(data):
+        # One integer per row that orders rows like sorting on FILTER_KEYS
+        codes, labels = zip(*(category_codes(data[col]) for col in FILTER_KEYS))
+        key = np.zeros(len(data), dtype=np.int64)
+        for col_codes, col_labels in zip(codes, labels):
+            key = key * (len(col_labels) + 1) + col_codes + 1
+        return key, codes, labels
+
+    def merge(self, rows):
+        # New index over the existing rows plus `rows`, placing the new rows
+        # into the sorted layout with a merge instead of sorting everything
+        # again. Needs categorical filter keys, whose codes follow the sort.
+        if not all(isinstance(self.data[col].dtype, pd.CategoricalDtype) for col in FILTER_KEYS):
+            return FilterIndex(pd.concat([self.data, rows], ignore_index=True))
+        options = {col: values + [v for v in rows[col].dropna().unique() if v not in values]
+                   for col, values in self.options.items()}
+        data = append_rows(self.data, rows)
+        n_old = len(self.data)
+        key, _, _ = self._sort_key(data)
+        old_key, new_key = key[:n_old], key[n_old:]
+        new_order = np.argsort(new_key, kind="stable")
+        new_key = new_key[new_order]
+
+        # Equal keys keep the existing rows first, as a stable sort would
+        positions = np.empty(len(data), dtype=np.intp)
+        positions[np.arange(n_old) + np.searchsorted(new_key, old_key, side="left")] = np.arange(n_old)
+        positions[np.arange(len(new_key)) + np.searchsorted(old_key, new_key, side="right")] = n_old + new_order
+        return FilterIndex(data.take(positions).reset_index(drop=True), options, presorted=True)
+
+    def positions(self, gender, age_category, month, ranges=None):
+        # The selected rows of self.data as a slice or an array of row
+        # numbers; ranges maps numeric columns to inclusive (low, high) bounds
+        values = dict(zip(FILTER_KEYS, map(selected_values, (age_category, month, gender))))
+        ages, months, genders = values.values()
+        if not ranges and ages and months and len(ages) == len(months) == 1 and (genders is None or len(genders) == 1):
+            if genders is None:
+                start, stop = self.all_ranges.get((ages[0], months[0]), (0, 0))
+            else:
+                start, stop = self.ranges.get((genders[0], ages[0], months[0]), (0, 0))
+            return slice(start, stop)
+        categories = {col: labels for col, labels in values.items() if labels is not None}
+        return self.bitmaps.rows(categories, ranges)
+
+    def select(self, gender, age_category, month, ranges=None):
+        return self.data.iloc[self.positions(gender, age_category, month, ranges)]
@@ -0,0 +1,150 @@
+import numpy as np
+import pandas as pd
+
+from filter_index import category_codes
+from lazy_import import LazyModule
+
+# Histograms binned on the server: the browser receives one bar per bin (per
+# colour) instead of every raw value, so the payload depends on the bin count.
+
+go = LazyModule("plotly.graph_objects")
+
+DEFAULT_BINS = 30
+# Integer columns spanning fewer values than this get one bin per value
+MAX_DISCRETE_VALUES = 50
+# First-row marker of a (group, colour) pair with no rows, see bin_counts_by_cell
+NO_ROW = np.iinfo(np.int64).max
+
+
+def _nice_width(span, bins):
+    raw = span / max(bins, 1)
+    magnitude = 10 ** np.floor(np.log10(raw))
+    for step in (1, 2, 2.5, 5, 10):
+        if step * magnitude >= raw:
+            return step * magnitude
+    return 10 * magnitude
+
+
+def bin_edges(values, bins=DEFAULT_BINS):
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return np.array([0.0, 1.0])
+    low, high = values.min(), values.max()
+    if high - low < MAX_DISCRETE_VALUES and np.all(values == np.round(values)):
+        return np.arange(low - 0.5, high + 1.5)
+    if bins == "fd":
+        # Freedman-Diaconis: width from the interquartile range
+        q1, q3 = np.percentile(values, [25, 75])
+        width = 2 * (q3 - q1) / len(values) ** (1 / 3)
+        bins = (high - low) / width if width > 0 else DEFAULT_BINS
+    if high == low:
+        return np.array([low - 0.5, low + 0.5])
+    width = _nice_width(high - low, bins)
+    start = np.floor(low / width) * width
+    stop = np.ceil(high / width) * width
+    if stop <= high:
+        stop += width
+    return start + width * np.arange(round((stop - start) / width) + 1)
+
+
+def bin_counts(values, edges, color_codes=None, n_colors=1):
+    values = np.asarray(values, dtype=np.float64)
+    n_bins = len(edges) - 1
+    positions = np.searchsorted(edges, values, side="right") - 1
+    positions[values == edges[-1]] = n_bins - 1
+    valid = (positions >= 0) & (positions < n_bins)
+    if color_codes is None:
+        return np.bincount(positions[valid], minlength=n_bins)[None, :]
+    valid &= color_codes >= 0
+    flat = color_codes[valid].astype(np.int64) * n_bins + positions[valid]
+    return np.bincount(flat, minlength=n_colors * n_bins).reshape(n_colors, n_bins)
+
+
+class HistogramBins:
+    # Bin edges per column, computed once from the full dataset so that every
+    # selection of the same chart shares the same bins
+
+    def __init__(self, data, bins=DEFAULT_BINS):
+        self.data = data
+        self.bins = bins
+        self.edges = {}
+
+    def edges_for(self, column):
+        if column not in self.edges:
+            self.edges[column] = bin_edges(self.data[column].to_numpy(np.float64, na_value=np.nan), self.bins)
+        return self.edges[column]
+
+
+def bin_data(data, x, edges, color=None):
+    # (edges, [(colour value, counts per bin), ...]) for one histogram
+    values = data[x].to_numpy(np.float64, na_value=np.nan)
+    if color is None:
+        return edges, [(None, bin_counts(values, edges)[0])]
+    codes, names = category_codes(data[color])
+    counts = bin_counts(values, edges, codes, len(names))
+    # Same trace order as plotly express: first appearance in the data
+    order = pd.unique(codes[codes >= 0])
+    return edges, [(names[code], counts[code]) for code in order]
+
+
+def bin_counts_by_cell(data, x, edges, cells, n_cells, color=None):
+    # Histograms of many row groups in one pass; cells holds every row's
+    # group number (-1 for none). Returns counts per (group, colour, bin), the
+    # first row of every (group, colour) pair (NO_ROW where it never occurs)
+    # and the colour names; binned_cell turns one group into bin_data's result.
+    values = data[x].to_numpy(np.float64, na_value=np.nan)
+    if color is None:
+        codes, names = np.zeros(len(data), dtype=np.int64), [None]
+    else:
+        codes, names = category_codes(data[color])
+    flat = np.where((cells >= 0) & (codes >= 0), cells.astype(np.int64) * len(names) + codes, -1)
+    counts = bin_counts(values, edges, flat, n_cells * len(names)).reshape(n_cells, len(names), -1)
+    first = np.full(n_cells * len(names), NO_ROW)
+    present, rows = np.unique(flat, return_index=True)
+    first[present[present >= 0]] = rows[present >= 0]
+    return counts, first.reshape(n_cells, len(names)), names
+
+
+def binned_cell(edges, counts, first, names):
+    # (edges, groups) like bin_data, from one group's counts and first rows,
+    # possibly combined over several groups (summed counts, minimum first row)
+    if names[0] is None:
+        return edges, [(None, counts[0])]
+    order = [code for code in np.argsort(first, kind="stable") if first[code] != NO_ROW]
+    return edges, [(names[code], counts[code]) for code in order]
+
+
+def histogram_figure(binned, x, color=None, title=None, labels=None, template=None,
+                     text_auto=False, barmode="relative", color_discrete_sequence=None):
+    edges, groups = binned
+    labels = labels or {}
+    x_label = labels.get(x, x)
+    centers = (edges[:-1] + edges[1:]) / 2
+    widths = np.diff(edges)
+    customdata = np.column_stack([edges[:-1], edges[1:]])
+    hovertemplate = f"{x_label}=%{{customdata[0]:.4g}} - %{{customdata[1]:.4g}}<br>count=%{{y}}<extra></extra>"
+
+    fig = go.Figure()
+    for i, (name, counts) in enumerate(groups):
+        marker = {}
+        if color_discrete_sequence:
+            marker["color"] = color_discrete_sequence[i % len(color_discrete_sequence)]
+        if name is not None:
+            hover = f"{labels.get(color, color)}={name}<br>" + hovertemplate
+        else:
+            hover = hovertemplate
+        fig.add_trace(go.Bar(
+            x=centers, y=counts, width=None if barmode == "group" else widths,
+            name=None if name is None else str(name), customdata=customdata, hovertemplate=hover, marker=marker,
+            texttemplate="%{y}" if text_auto else None, showlegend=name is not None,
+        ))
+    fig.update_layout(
+        title=title, template=template, barmode=barmode, bargap=0 if color is None else None,
+        xaxis_title=x_label, yaxis_title="count", legend_title_text=labels.get(color, color) if color else None,
+    )
+    return fig
+
+
+def histogram(data, x, edges, color=None, **layout):
+    return histogram_figure(bin_data(data, x, edges, color), x, color, **layout)
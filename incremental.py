@@ -0,0 +1,127 @@
+import glob
+import logging
+import os
+import threading
+
+import pandas as pd
+
+from aggregates import AggregateCube
+from data_store import CSV_PATH, DASHBOARD_COLUMNS, STORE_PATH, load_frame, read_csv, read_store
+from filter_index import FilterIndex
+from histograms import HistogramBins
+from participants import ParticipantIndex
+from sketches import SketchCube
+
+# Incremental mode: new tracking rows are dropped into an append-only
+# directory as partition files (e.g. the
+# month_name=<value>/part-<run>-NNNNN.csv files written by prepare_data.py).
+# A background thread picks up files it has not seen yet and merges only
+# their rows into the filter index and the aggregate cube. Every merge produces a new Snapshot that replaces the old
+# one with a single assignment, so a rerun that already holds a snapshot is
+# never blocked or shown a half-merged state.
+#
+# Writers must move complete files into place (write then rename). Only
+# .csv/.feather/.parquet files are read and names starting with "." are
+# ignored, so a temporary name like ".part.csv" stays invisible until renamed.
+
+PARTITION_SUFFIXES = (".csv", ".feather", ".parquet")
+
+logger = logging.getLogger(__name__)
+
+
+def read_partition(path, columns=DASHBOARD_COLUMNS):
+    if path.endswith(".csv"):
+        return read_csv(path, columns)
+    return read_store(path, columns)
+
+
+class PartitionWatcher:
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.seen = set()
+
+    def poll(self):
+        return sorted(
+            path for path in glob.glob(os.path.join(self.directory, "**", "*"), recursive=True)
+            if path.endswith(PARTITION_SUFFIXES) and not os.path.basename(path).startswith(".")
+            and path not in self.seen
+        )
+
+    def mark_seen(self, paths):
+        self.seen.update(paths)
+
+
+class Snapshot:
+
+    def __init__(self, index, cube, bins, participants, sketches, version):
+        self.index = index
+        self.cube = cube
+        self.bins = bins
+        self.participants = participants
+        self.sketches = sketches
+        self.version = version
+
+    @classmethod
+    def build(cls, data, version=None, workers=1):
+        index = FilterIndex(data)
+        cube = AggregateCube(data, workers=workers)
+        return cls(index, cube, HistogramBins(index.data), ParticipantIndex(data),
+                   SketchCube(data, cube.labels), version)
+
+    @classmethod
+    def load(cls, store_path=STORE_PATH, csv_path=CSV_PATH, workers=1):
+        # What deploy.py holds: the loaded frame is dropped once the index has
+        # its sorted copy of the rows
+        data = load_frame(store_path, csv_path)
+        return cls.build(data, data.attrs.get("version"), workers)
+
+    def merge(self, rows, version):
+        index = self.index.merge(rows)
+        cube = self.cube.merge(rows)
+        # Bin edges are recomputed lazily since new rows may widen a column's range
+        return Snapshot(index, cube, HistogramBins(index.data), self.participants.merge(rows),
+                        self.sketches.merge(rows, cube.labels), version)
+
+
+class LiveDataset:
+
+    def __init__(self, data, directory, interval=30, workers=1):
+        self.watcher = PartitionWatcher(directory)
+        self.interval = interval
+        self.base_version = data.attrs.get("version")
+        self.snapshot = Snapshot.build(data, self.base_version, workers)
+        self.partitions = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def refresh(self):
+        with self._lock:
+            paths = self.watcher.poll()
+            if not paths:
+                return 0
+            rows = pd.concat([read_partition(path) for path in paths], ignore_index=True)
+            self.snapshot = self.snapshot.merge(rows, f"{self.base_version}+{self.partitions + len(paths)}")
+            self.partitions += len(paths)
+            self.watcher.mark_seen(paths)
+            return len(rows)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                merged = self.refresh()
+                if merged:
+                    logger.info("merged %d new rows", merged)
+            except Exception:
+                logger.exception("incremental merge failed")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="incremental-merge", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
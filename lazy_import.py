@@ -0,0 +1,19 @@
+import importlib
+
+# A module bound at import time but imported on first attribute access, e.g.
+# `px = LazyModule("plotly.express")`. Code that only prepares chart data
+# (the dashboard before its first figure, warm_cache.py, the benchmarks)
+# then never pays for importing plotly.
+
+
+class LazyModule:
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            # The import system's own lock makes concurrent first uses safe
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
@@ -0,0 +1,92 @@
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from aggregates import reduce_rows
+
+# Parallel build of the aggregate cube tables. The cube's input columns
+# (label codes, measure values) are copied once into a shared memory block;
+# each worker process maps that block and reduces one contiguous row range
+# with aggregates.reduce_rows, so no rows are pickled. Only the small
+# per-range tables travel back, and they are summed into the final cube.
+
+logger = logging.getLogger(__name__)
+
+
+def _layout(columns):
+    specs, offset = [], 0
+    for key, values in columns.items():
+        offset = -(-offset // 8) * 8  # keep every array 8-byte aligned
+        specs.append((key, values.dtype.str, len(values), offset))
+        offset += values.nbytes
+    return specs, max(offset, 1)
+
+
+def _views(buffer, specs):
+    return {key: np.ndarray(length, dtype=dtype, buffer=buffer, offset=offset)
+            for key, dtype, length, offset in specs}
+
+
+def _fill(buffer, specs, columns):
+    # The views must not outlive this call, or the block cannot be closed
+    for key, values in _views(buffer, specs).items():
+        values[:] = columns[key]
+
+
+def _reduce_range(name, specs, shapes, stats, start, stop):
+    # Runs in a worker: map the block, reduce one row range, unmap
+    block = shared_memory.SharedMemory(name=name)
+    tables = reduce_rows(_views(block.buf, specs), shapes, stats, start, stop)
+    block.close()
+    return tables
+
+
+def make_executor(workers):
+    # fork where available: spawned workers re-run the __main__ module, which
+    # under Streamlit is the dashboard script itself. Workers only run
+    # reduce_rows on the shared block, so they take no locks from other threads.
+    method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context(method))
+
+
+def row_ranges(n_rows, parts):
+    bounds = np.linspace(0, n_rows, parts + 1).astype(int)
+    return [(int(start), int(stop)) for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+
+
+def reduce_parallel(columns, shapes, stats, workers, executor=None):
+    # `executor` lets callers keep warm worker processes between builds
+    n_rows = len(next(iter(columns.values()))) if columns else 0
+    ranges = row_ranges(n_rows, workers)
+    if len(ranges) < 2:
+        return reduce_rows(columns, shapes, stats)
+    specs, size = _layout(columns)
+    try:
+        block = shared_memory.SharedMemory(create=True, size=size)
+    except OSError:
+        logger.warning("shared memory unavailable, aggregating serially", exc_info=True)
+        return reduce_rows(columns, shapes, stats)
+    try:
+        _fill(block.buf, specs, columns)
+        pool = executor or make_executor(len(ranges))
+        try:
+            futures = [pool.submit(_reduce_range, block.name, specs, shapes, stats, start, stop)
+                       for start, stop in ranges]
+            tables = futures[0].result()
+            for future in futures[1:]:
+                for grouping, table in future.result().items():
+                    tables[grouping] += table
+        finally:
+            if executor is None:
+                pool.shutdown()
+        return tables
+    except BrokenProcessPool:
+        logger.warning("aggregation workers failed, aggregating serially", exc_info=True)
+        return reduce_rows(columns, shapes, stats)
+    finally:
+        block.close()
+        block.unlink()
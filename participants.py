@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+
+from data_store import to_datetime
+
+# Per-participant history. Rows are kept sorted on (participant_id, date) so
+# one participant's records are the contiguous slice offsets[i]:offsets[i + 1],
+# where i is found by binary search in the sorted participant ids; a lookup
+# never scans the other participants' rows.
+
+TIMELINE_COLUMNS = ["daily_steps", "hours_sleep", "avg_heart_rate", "stress_level"]
+WINDOWS = (7, 30)
+
+
+def _sort_key(participant_ids, days):
+    # Orders like sorting on (participant_id, date); days fit in 32 bits
+    return (participant_ids.astype(np.int64) << 32) + days.astype(np.int64)
+
+
+def rolling_means(days, values, windows=WINDOWS):
+    # For each distinct day of a sorted `days` array: the mean of that day's
+    # values and, per window w, the mean of every value in (day - w, day].
+    # Window sums come from one cumulative sum, so the cost is linear.
+    unique, first = np.unique(days, return_index=True)
+    stop = np.searchsorted(days, unique, side="right")
+    present = ~np.isnan(values)
+    sums = np.concatenate([[0.0], np.cumsum(np.where(present, values, 0.0))])
+    counts = np.concatenate([[0], np.cumsum(present)])
+
+    def mean(start):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return (sums[stop] - sums[start]) / (counts[stop] - counts[start])
+
+    rolling = {window: mean(np.searchsorted(days, unique - window + 1)) for window in windows}
+    return unique, mean(first), rolling
+
+
+class ParticipantIndex:
+
+    def __init__(self, data, columns=TIMELINE_COLUMNS):
+        self.columns = [col for col in columns if col in data.columns]
+        ids, days, values = self._arrays(data, self.columns)
+        key = _sort_key(ids, days)
+        order = np.argsort(key, kind="stable")
+        self._set(key[order], days[order], {col: v[order] for col, v in values.items()})
+
+    @staticmethod
+    def _arrays(data, columns):
+        # Rows without a participant or a date cannot go on a timeline
+        # Days since the epoch fit int32 and the timeline columns float32
+        # exactly; timeline() widens one participant's slice back to float64
+        days = to_datetime(data["date"]).to_numpy("datetime64[D]")
+        valid = ~np.isnat(days) & data["participant_id"].notna().to_numpy()
+        ids = data["participant_id"].to_numpy()[valid].astype(np.int64)
+        values = {col: data[col].to_numpy(np.float32, na_value=np.nan)[valid] for col in columns}
+        return ids, days[valid].astype(np.int32), values
+
+    def _set(self, key, days, values):
+        self.key = key
+        self.days = days
+        self.values = values
+        ids = key >> 32
+        starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]]) if len(ids) else np.array([], dtype=np.int64)
+        self.ids = ids[starts]
+        self.offsets = np.r_[starts, len(ids)]
+
+    def merge(self, rows):
+        # New index with `rows` placed into the sorted layout by a merge
+        ids, days, values = self._arrays(rows, self.columns)
+        raw_key = _sort_key(ids, days)
+        new_order = np.argsort(raw_key, kind="stable")
+        new_key = raw_key[new_order]
+
+        n_old = len(self.key)
+        positions = np.empty(n_old + len(new_key), dtype=np.intp)
+        positions[np.arange(n_old) + np.searchsorted(new_key, self.key, side="left")] = np.arange(n_old)
+        positions[np.arange(len(new_key)) + np.searchsorted(self.key, new_key, side="right")] = n_old + new_order
+
+        merged = object.__new__(ParticipantIndex)
+        merged.columns = self.columns
+        merged._set(
+            np.concatenate([self.key, raw_key])[positions],
+            np.concatenate([self.days, days])[positions],
+            {col: np.concatenate([self.values[col], values[col]])[positions] for col in self.columns},
+        )
+        return merged
+
+    def locate(self, participant_id):
+        i = np.searchsorted(self.ids, participant_id)
+        if i == len(self.ids) or self.ids[i] != participant_id:
+            return slice(0, 0)
+        return slice(self.offsets[i], self.offsets[i + 1])
+
+    def history(self, participant_id):
+        rows = self.locate(participant_id)
+        history = pd.DataFrame({col: values[rows] for col, values in self.values.items()})
+        history.insert(0, "date", self.days[rows].astype("datetime64[D]"))
+        return history
+
+    def timeline(self, participant_id, windows=WINDOWS):
+        # One row per recorded day: the day's mean and its rolling means
+        rows = self.locate(participant_id)
+        days = self.days[rows]
+        timeline = {}
+        for col, values in self.values.items():
+            unique, daily, rolling = rolling_means(days, values[rows].astype(np.float64), windows)
+            timeline[col] = daily
+            for window, means in rolling.items():
+                timeline[f"{col}_{window}d"] = means
+        timeline = pd.DataFrame(timeline)
+        timeline.insert(0, "date", np.unique(days).astype("datetime64[D]"))
+        return timeline
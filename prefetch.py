@@ -0,0 +1,188 @@
+import calendar
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from charts import CHARTS, Selection
+
+# Background builds of the figures a session is likely to ask for next.
+# After a rerun the session schedules the selections adjacent to its own
+# (next and previous month, the other genders) for the charts it just
+# showed; worker threads build them into the shared FigureCache, so the
+# next click is a cache hit. A rerun starting in any session pauses the
+# workers at their next step (a chart's data, its figure, or putting it in
+# the cache) until the rerun finishes, and drops that session's pending
+# prefetches, which no longer match what it shows.
+
+# A rerun that never reports finishing (an exception, a rerun interrupted
+# by a newer one) stops pausing the workers after this many seconds
+FOREGROUND_TIMEOUT = 10.0
+
+MONTHS = list(calendar.month_name)[1:]
+
+
+def _lower_priority():
+    # Worker thread initializer; on Linux nice values apply per thread
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+    except (AttributeError, OSError):
+        pass
+
+
+def shift_months(months, step):
+    # The same months moved `step` places in the calendar, or None past a year end
+    positions = sorted(MONTHS.index(month) + step for month in months)
+    if not positions or positions[0] < 0 or positions[-1] >= len(MONTHS):
+        return None
+    return [MONTHS[position] for position in positions]
+
+
+def adjacent_selections(gender, age_category, month, genders):
+    # Likely next (gender, age_category, month) selections, most likely
+    # first; each filter is a list of labels, empty meaning every label
+    adjacent = []
+    for step in (1, -1):
+        months = shift_months(month, step) if month and all(m in MONTHS for m in month) else None
+        if months:
+            adjacent.append((gender, age_category, months))
+    if len(gender) <= 1:
+        for other in [[]] + [[g] for g in genders]:
+            if other != list(gender):
+                adjacent.append((other, age_category, month))
+    return adjacent
+
+
+class Prefetcher:
+
+    def __init__(self, figure_cache, workers=1):
+        self.figure_cache = figure_cache
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix="prefetch", initializer=_lower_priority)
+        self.generations = {}  # owner -> current generation; older tasks are cancelled
+        self.reruns = {}  # owner -> start time of its rerun in progress
+        self.pending = {}  # owner -> scheduled tasks not finished yet
+        self.scheduled = 0
+        self.cancelled = 0
+        self.built = 0
+        self.cached = 0
+        self.build_s = 0.0
+        self.paused_s = 0.0
+        self._lock = threading.Condition()
+
+    def start_rerun(self, owner):
+        with self._lock:
+            now = time.monotonic()
+            # Reruns that never reported finishing, e.g. of closed sessions
+            for stale in [other for other, started in self.reruns.items() if now - started >= FOREGROUND_TIMEOUT]:
+                del self.reruns[stale]
+                self._release(stale)
+            self.generations[owner] = self.generations.get(owner, 0) + 1
+            self.reruns[owner] = now
+
+    def finish_rerun(self, owner):
+        with self._lock:
+            self.reruns.pop(owner, None)
+            self._release(owner)
+            self._lock.notify_all()
+
+    def _release(self, owner):
+        # With the lock held: forget an owner with no rerun in progress and
+        # no tasks left, so that every session ever seen is not kept around.
+        # Its next tasks start again from generation 0.
+        if owner not in self.reruns and not self.pending.get(owner):
+            self.generations.pop(owner, None)
+            self.pending.pop(owner, None)
+
+    def schedule(self, owner, dataset, selections, chart_ids, ranges=None):
+        # selections: (gender, age_category, month) tuples as accepted by
+        # charts.Selection; chart_ids: charts to build for each of them
+        chart_ids = [chart_id for chart_id in dict.fromkeys(chart_ids) if chart_id in CHARTS]
+        if not chart_ids or not selections:
+            return
+        with self._lock:
+            generation = self.generations.setdefault(owner, 0)
+            self.pending[owner] = self.pending.get(owner, 0) + len(selections)
+            self.scheduled += len(selections)
+        for filters in selections:
+            self.executor.submit(self._build, owner, generation, dataset, filters, chart_ids, ranges)
+
+    def _proceed(self, owner, generation):
+        # Waits out reruns in progress; False once the task is cancelled
+        with self._lock:
+            start = time.monotonic()
+            while True:
+                if self.generations.get(owner) != generation:
+                    self.cancelled += 1
+                    return False
+                now = time.monotonic()
+                running = [started for started in self.reruns.values() if now - started < FOREGROUND_TIMEOUT]
+                if not running:
+                    self.paused_s += now - start
+                    return True
+                self._lock.wait(FOREGROUND_TIMEOUT - (now - max(running)))
+
+    def _build(self, owner, generation, dataset, filters, chart_ids, ranges):
+        try:
+            self._build_charts(owner, generation, dataset, filters, chart_ids, ranges)
+        finally:
+            with self._lock:
+                self.pending[owner] -= 1
+                self._release(owner)
+
+    def _build_charts(self, owner, generation, dataset, filters, chart_ids, ranges):
+        if not self._proceed(owner, generation):
+            return
+        selection = Selection(dataset, *filters, ranges)
+        if len(selection) == 0:
+            # deploy.py shows no charts for it
+            return
+        for chart_id in chart_ids:
+            key = self.figure_cache.key(chart_id, selection.filters, dataset.version)
+            if key in self.figure_cache:
+                with self._lock:
+                    self.cached += 1
+                continue
+            chart = CHARTS[chart_id]
+            if not self._proceed(owner, generation):
+                return
+            start = time.perf_counter()
+            prepared = chart.prepare(selection)
+            elapsed = time.perf_counter() - start
+            if not self._proceed(owner, generation):
+                return
+            start = time.perf_counter()
+            fig = chart.figure(prepared)
+            elapsed += time.perf_counter() - start
+            if not self._proceed(owner, generation):
+                return
+            self.figure_cache.put(key, fig, prefetch_s=elapsed)
+            with self._lock:
+                self.built += 1
+                self.build_s += elapsed
+
+    def stats(self):
+        cache = self.figure_cache.stats()
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'selections scheduled': self.scheduled,
+                'selections cancelled': self.cancelled,
+                'charts built': self.built,
+                'charts already cached': self.cached,
+                'build s': self.build_s,
+                'paused s': self.paused_s,
+                'hits': cache['prefetch hits'],
+                'hit rate': cache['prefetch hits'] / self.built if self.built else 0.0,
+                'unused': self.built - cache['prefetch hits'],
+                'wasted': cache['prefetch wasted'],
+                'wasted s': cache['prefetch wasted s'],
+            }
+
+    def shutdown(self):
+        with self._lock:
+            for owner in self.generations:
+                self.generations[owner] += 1
+            self.reruns.clear()
+            self._lock.notify_all()
+        self.executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,104 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+# Streaming version of the preparation in "Streamlite Deployment.ipynb":
+# assign participant IDs round-robin, keep a 10% sample of participants and
+# write it out, reading the cleaned source in fixed-size chunks so peak memory
+# does not grow with the input.
+
+SOURCE_PATH = "Health_&_Fitness_Tracking_Dataset_cleaning.csv"
+OUTPUT_PATH = "sampled_data.csv"
+NUM_PARTICIPANTS = 3000
+SAMPLE_FRAC = 0.1
+RANDOM_STATE = 42
+CHUNK_ROWS = 100_000
+
+
+def sample_participants(n_participants, frac=SAMPLE_FRAC, random_state=RANDOM_STATE):
+    # Same draw as df["participant_id"].drop_duplicates().sample(...) in the
+    # notebook: the IDs first appear in order 1..n on rows 0..n-1
+    participants = pd.Series(np.arange(1, n_participants + 1))
+    return set(participants.sample(frac=frac, random_state=random_state))
+
+
+def _chunks_with_ids(chunks, num_participants):
+    offset = 0
+    for chunk in chunks:
+        chunk["participant_id"] = (np.arange(offset, offset + len(chunk)) % num_participants) + 1
+        offset += len(chunk)
+        yield chunk
+
+
+def _chain(buffered, chunks):
+    while buffered:
+        yield buffered.pop(0)
+    yield from chunks
+
+
+def _partition_path(partition_dir, partition_by, value, run_id, part):
+    # Named after the run too, so that a re-run never overwrites a file an
+    # incremental.py watcher has already merged
+    directory = os.path.join(partition_dir, f"{partition_by}={value}")
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f"part-{run_id}-{part:05d}.csv")
+
+
+def _write_partition(rows, path):
+    # Written under a hidden name and renamed, so that a watcher never
+    # merges a half-written file
+    directory, name = os.path.split(path)
+    temporary = os.path.join(directory, f".{name}")
+    rows.to_csv(temporary, index=False)
+    os.replace(temporary, path)
+
+
+def prepare(source=SOURCE_PATH, output=OUTPUT_PATH, partition_dir=None, partition_by="month_name",
+            chunk_rows=CHUNK_ROWS, num_participants=NUM_PARTICIPANTS, frac=SAMPLE_FRAC,
+            random_state=RANDOM_STATE, run_id=None):
+    run_id = run_id or f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
+    chunks = _chunks_with_ids(pd.read_csv(source, chunksize=chunk_rows), num_participants)
+
+    # The sample depends on how many distinct IDs exist, which is only known
+    # once num_participants rows (or the whole input) have been seen.
+    buffered, seen = [], 0
+    for chunk in chunks:
+        buffered.append(chunk)
+        seen += len(chunk)
+        if seen >= num_participants:
+            break
+    sampled = sample_participants(min(seen, num_participants), frac, random_state)
+
+    rows_in = rows_out = 0
+    header = True
+    for part, chunk in enumerate(_chain(buffered, chunks)):
+        rows_in += len(chunk)
+        chunk = chunk[chunk["participant_id"].isin(sampled)]
+        rows_out += len(chunk)
+        if output:
+            chunk.to_csv(output, index=False, mode="w" if header else "a", header=header)
+            header = False
+        if partition_dir:
+            for value, rows in chunk.groupby(partition_by, sort=False, dropna=False):
+                _write_partition(rows, _partition_path(partition_dir, partition_by, value, run_id, part))
+    return {"rows_in": rows_in, "rows_out": rows_out, "participants": len(sampled)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Assign participant IDs and sample participants from the cleaned dataset.")
+    parser.add_argument("source", nargs="?", default=SOURCE_PATH)
+    parser.add_argument("--output", default=OUTPUT_PATH, help="single CSV output, '' to skip")
+    parser.add_argument("--partition-dir", help="also write one CSV per partition value and chunk here")
+    parser.add_argument("--partition-by", default="month_name")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--participants", type=int, default=NUM_PARTICIPANTS)
+    parser.add_argument("--frac", type=float, default=SAMPLE_FRAC)
+    parser.add_argument("--seed", type=int, default=RANDOM_STATE)
+    args = parser.parse_args()
+    stats = prepare(args.source, args.output, args.partition_dir, args.partition_by,
+                    args.chunk_rows, args.participants, args.frac, args.seed)
+    print(f"Number of participants in sample: {stats['participants']}")
+    print(f"Kept {stats['rows_out']:,} of {stats['rows_in']:,} rows")
@@ -0,0 +1,133 @@
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+
+# Opt-in timing of one dashboard rerun. Code under measurement wraps each
+# stage in `with profiler.span(name, stage) as span:` and may set counters
+# on the span (span["rows"] = ..., span["bytes"] = ...). NULL_PROFILER,
+# used when profiling is off, hands out one shared span that records
+# nothing, so instrumented code costs a method call per stage.
+
+STAGES = ["load", "filter", "prepare", "figure", "render", "section", "rerun"]
+
+
+class _NullSpan:
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setitem__(self, key, value):
+        pass
+
+
+class _NullProfiler:
+    enabled = False
+
+    def span(self, name, stage):
+        return _NULL_SPAN
+
+    def record(self, name, stage, start, **counters):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+NULL_PROFILER = _NullProfiler()
+
+
+class _Span(dict):
+    # The counters of one timed stage; timing fields are set on exit
+
+    def __init__(self, profiler, name, stage):
+        super().__init__()
+        self.profiler = profiler
+        self.name = name
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.duration = time.perf_counter() - self.start
+        self.profiler._record(self)
+        return False
+
+
+class Profiler:
+    enabled = True
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def span(self, name, stage):
+        return _Span(self, name, stage)
+
+    def record(self, name, stage, start, **counters):
+        # A stage that began at perf_counter() value `start` and ends now
+        span = _Span(self, name, stage)
+        span.update(counters)
+        span.start = start
+        span.duration = time.perf_counter() - start
+        self._record(span)
+
+    def _record(self, span):
+        with self._lock:
+            self.spans.append({
+                "name": span.name, "stage": span.stage, "thread": threading.get_ident(),
+                "start_ms": (span.start - self.origin) * 1e3, "ms": span.duration * 1e3,
+                "rows": span.get("rows", 0), "bytes": span.get("bytes", 0),
+                "args": {k: v for k, v in span.items() if k not in ("rows", "bytes")},
+            })
+
+    def frame(self):
+        columns = ["name", "stage", "thread", "start_ms", "ms", "rows", "bytes", "args"]
+        return pd.DataFrame(self.spans, columns=columns)
+
+    @staticmethod
+    def _totals(spans, by):
+        totals = spans.groupby(by).agg(calls=("ms", "size"), ms=("ms", "sum"), rows=("rows", "sum"),
+                                       KB=("bytes", "sum"))
+        totals["KB"] /= 1024
+        return totals
+
+    def stage_totals(self):
+        # Time, calls, rows and bytes per stage; nested stages overlap
+        totals = self._totals(self.frame(), "stage")
+        return totals.reindex([stage for stage in STAGES if stage in totals.index])
+
+    def by_name(self, stage):
+        spans = self.frame()
+        return self._totals(spans[spans["stage"] == stage], "name")
+
+    def chart_table(self):
+        # One row per chart: ms per stage plus rows read and bytes sent.
+        # Charts served from the figure cache have no prepare/figure time.
+        spans = self.frame()
+        spans = spans[spans["stage"].isin(["prepare", "figure", "render"])]
+        if spans.empty:
+            return pd.DataFrame()
+        table = spans.pivot_table(index="name", columns="stage", values="ms", aggfunc="sum", fill_value=0.0)
+        counters = spans.groupby("name")[["rows", "bytes"]].sum()
+        table = table.join(counters).rename(columns={"bytes": "KB"})
+        table["KB"] /= 1024
+        table["cached"] = ~table.index.isin(spans.loc[spans["stage"] == "prepare", "name"])
+        stages = [stage for stage in ("prepare", "figure", "render") if stage in table.columns]
+        table["total ms"] = table[stages].sum(axis=1)
+        return table.sort_values("total ms", ascending=False)
+
+    def trace(self):
+        # Chrome trace event format; opens in Perfetto or chrome://tracing
+        events = [{
+            "name": span["name"], "cat": span["stage"], "ph": "X", "pid": os.getpid(), "tid": span["thread"],
+            "ts": span["start_ms"] * 1e3, "dur": span["ms"] * 1e3,
+            "args": {"rows": span["rows"], "bytes": span["bytes"], **span["args"]},
+        } for span in self.spans]
+        return json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}, default=str)
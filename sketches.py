@@ -0,0 +1,179 @@
+import numpy as np
+import pandas as pd
+
+from aggregates import codes_against
+from filter_index import FILTER_KEYS, category_codes, selected_values
+
+# Mergeable sketches per (age_category, month_name, gender) cell, for the
+# page numbers that otherwise scan every selected row:
+#   - HyperLogLog registers for the number of distinct participants
+#   - log-bucketed quantile counts (DDSketch) for medians and other quantiles
+# A selection combines its cells (max of registers, sum of counts), so an
+# estimate costs about the same as a cube lookup. Means need no sketch: the
+# aggregate cube already keeps exact per-cell counts and sums.
+
+HLL_PRECISION = 12  # 4096 registers, ~1.6% standard error
+QUANTILE_COLUMNS = ["resting_heart_rate"]
+RELATIVE_ACCURACY = 0.01
+_RANK_BITS = 52  # hash bits after the register index; exact as float64
+
+
+def hash64(values):
+    # splitmix64 finalizer; spreads consecutive ids over all 64 bits
+    x = values.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def hll_estimate(registers):
+    m = registers.shape[-1]
+    alpha = 0.7213 / (1 + 1.079 / m)
+    raw = alpha * m * m / np.sum(np.exp2(-registers.astype(np.float64)))
+    zeros = np.count_nonzero(registers == 0)
+    if raw <= 2.5 * m and zeros:
+        return m * np.log(m / zeros)  # linear counting for small cardinalities
+    return raw
+
+
+def _pad(table, shape):
+    # Copy `table` into the leading corner of a zero array of `shape`
+    padded = np.zeros(shape, dtype=table.dtype)
+    padded[tuple(slice(0, n) for n in table.shape)] = table
+    return padded
+
+
+class SketchCube:
+
+    def __init__(self, data, labels=None, columns=QUANTILE_COLUMNS, precision=HLL_PRECISION,
+                 relative_accuracy=RELATIVE_ACCURACY):
+        self.precision = precision
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.columns = [col for col in columns if col in data.columns]
+
+        self.labels, codes = {}, []
+        for col in FILTER_KEYS:
+            if labels is None:
+                col_codes, col_labels = category_codes(data[col])
+                self.labels[col] = pd.Index(col_labels, name=col)
+            else:
+                self.labels[col] = labels[col]
+                col_codes = codes_against(data[col], labels[col])
+            codes.append(col_codes)
+        shape = tuple(len(self.labels[col]) for col in FILTER_KEYS)
+        valid = np.logical_and.reduce([c >= 0 for c in codes])
+        cells = np.ravel_multi_index([c[valid] for c in codes], shape) if len(shape) else None
+
+        # HyperLogLog: the top bits of a participant's hash pick the register,
+        # the position of the first 1 bit in the next bits is its rank
+        m = 1 << precision
+        participants = data["participant_id"].to_numpy()[valid]
+        present = ~pd.isna(participants)
+        hashes = hash64(participants[present])
+        register = (hashes >> np.uint64(64 - precision)).astype(np.int64)
+        rest = (hashes >> np.uint64(64 - precision - _RANK_BITS)) & np.uint64((1 << _RANK_BITS) - 1)
+        rank = (_RANK_BITS + 1 - np.frexp(rest.astype(np.float64))[1]).astype(np.uint8)
+        registers = np.zeros(int(np.prod(shape)) * m, dtype=np.uint8)
+        np.maximum.at(registers, cells[present] * m + register, rank)
+        self.registers = registers.reshape(shape + (m,))
+
+        # Quantiles: slot 0 counts values <= 0, slot i counts values in
+        # (gamma ** (k - 1), gamma ** k] with k = offsets[col] + i - 1
+        self.offsets, self.counts = {}, {}
+        for col in self.columns:
+            values = data[col].to_numpy(np.float64, na_value=np.nan)[valid]
+            keep = ~np.isnan(values)
+            keys = self._keys(values[keep])
+            positive = keys[keys > np.iinfo(np.int64).min]
+            offset = int(positive.min()) if len(positive) else 0
+            slots = np.where(keys > np.iinfo(np.int64).min, keys - offset + 1, 0)
+            n_slots = int(slots.max()) + 1 if len(slots) else 1
+            flat = cells[keep] * n_slots + slots
+            self.offsets[col] = offset
+            self.counts[col] = np.bincount(flat, minlength=int(np.prod(shape)) * n_slots).reshape(shape + (n_slots,))
+
+    def _keys(self, values):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            keys = np.ceil(np.log(values) / np.log(self.gamma))
+        return np.where(values > 0, keys, np.iinfo(np.int64).min).astype(np.int64)
+
+    def merge(self, rows, labels):
+        # New sketches with `rows` added; `labels` must extend self.labels
+        delta = SketchCube(rows, labels, self.columns, self.precision, self.relative_accuracy)
+        merged = delta
+        merged.registers = np.maximum(_pad(self.registers, delta.registers.shape), delta.registers)
+        for col in self.columns:
+            # Align the key ranges of the sides with positive values on the
+            # smaller offset, then add the counts; a side without any (e.g. a
+            # batch where the column is all missing) only has its slot 0
+            with_values = [sketch for sketch in (self, delta) if sketch.counts[col][..., 1:].any()]
+            offset = min([sketch.offsets[col] for sketch in with_values] or [self.offsets[col]])
+            tables = []
+            for sketch in (self, delta):
+                counts = sketch.counts[col]
+                if sketch not in with_values:
+                    tables.append(counts[..., :1])
+                    continue
+                shift = sketch.offsets[col] - offset
+                shifted = np.concatenate([counts[..., :1], np.zeros(counts.shape[:-1] + (shift,), counts.dtype),
+                                          counts[..., 1:]], axis=-1)
+                tables.append(shifted)
+            n_slots = max(table.shape[-1] for table in tables)
+            merged.counts[col] = sum(_pad(table, delta.registers.shape[:-1] + (n_slots,)) for table in tables)
+            merged.offsets[col] = offset
+        return merged
+
+    def select(self, gender, age_category, month):
+        return SketchView(self, {
+            "age_category": selected_values(age_category),
+            "month_name": selected_values(month),
+            "gender": selected_values(gender),
+        })
+
+
+class SketchView:
+
+    def __init__(self, sketches, selection):
+        self.sketches = sketches
+        self.codes = {}
+        for col, values in selection.items():
+            if values is not None:
+                codes = sketches.labels[col].get_indexer(values)
+                self.codes[col] = codes[codes >= 0]
+
+    def _cells(self, table):
+        for axis, col in enumerate(FILTER_KEYS):
+            if col in self.codes:
+                table = table.take(self.codes[col], axis=axis)
+        return table.reshape(-1, table.shape[-1])
+
+    def distinct(self):
+        # (estimate, standard error) of the number of distinct participants
+        registers = self._cells(self.sketches.registers).max(axis=0, initial=0)
+        estimate = hll_estimate(registers)
+        return estimate, 1.04 / np.sqrt(len(registers)) * estimate
+
+    def quantile(self, column, q):
+        # (estimate, bound): the q-quantile, interpolated between the two
+        # nearest ranks like pandas' median, lies within bound of the estimate
+        counts = self._cells(self.sketches.counts[column]).sum(axis=0)
+        total = counts.sum()
+        if not total:
+            return np.nan, np.nan
+        cumulative = np.cumsum(counts)
+        rank = q * (total - 1)
+        low, high = (self._value_at(column, cumulative, r) for r in (np.floor(rank), np.ceil(rank)))
+        estimate = low + (rank - np.floor(rank)) * (high - low)
+        # Both ranks are within relative_accuracy of their true values, so
+        # their interpolation is too, which is slightly more of the estimate
+        accuracy = self.sketches.relative_accuracy
+        return estimate, accuracy / (1 - accuracy) * estimate
+
+    def _value_at(self, column, cumulative, rank):
+        # Estimate of the value at 0-based rank, from cumulative slot counts
+        slot = np.searchsorted(cumulative, rank, side="right")
+        if slot == 0:
+            return 0.0
+        gamma = self.sketches.gamma
+        return 2 * gamma ** (self.sketches.offsets[column] + slot - 1) / (gamma + 1)
@@ -0,0 +1,106 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregates import AggregateCube
+from benchmarks.synthetic import make_dataset
+from data_store import load_frame
+
+# The aggregate cube against the pandas expressions deploy.py evaluated on
+# the filtered rows before the cube existed, for every sidebar selection of
+# a small synthetic dataset. The frame is the one deploy.py reads (typed,
+# categorical filter and grouping columns); groupbys pass observed=True,
+# which is what they returned on the plain string columns originally read.
+
+
+def observed(counts):
+    # Categorical counts list every label; the string columns only had those present
+    return counts[counts > 0]
+
+
+# (name, original expression on filtered_data, the same from a CubeView)
+EXPRESSIONS = [
+    *[(f"mean {col}", lambda df, col=col: df[col].mean(), lambda view, col=col: view.mean(col))
+      for col in ["avg_heart_rate", "daily_steps", "hours_sleep", "calories_burned", "bmi",
+                  "duration_minutes", "hydration_level"]],
+    *[(f"value_counts {col}", lambda df, col=col: observed(df[col].value_counts()),
+       lambda view, col=col: view.value_counts(col))
+      for col in ["type_wight", "health_condition", "activity_type", "fitness_level", "age_category", "gender"]],
+    *[(f"{how} {column} by {by}",
+       lambda df, by=by, column=column, how=how: df.groupby(by, observed=True).agg(value=(column, how))["value"],
+       lambda view, by=by, column=column, how=how: view.agg(by, column, how))
+      for by, column, how in [
+          ("activity_type", "duration_minutes", "sum"), ("activity_type", "calories_burned", "sum"),
+          ("activity_type", "duration_minutes", "mean"), ("activity_type", "calories_burned", "mean"),
+          (["activity_type", "gender"], "duration_minutes", "sum"), ("age_category", "duration_minutes", "sum"),
+          ("age_category", "calories_burned", "sum"), ("activity_type", "daily_steps", "sum"),
+          ("activity_type", "bmi", "mean"), (["activity_type", "fitness_level"], "duration_minutes", "sum"),
+          ("activity_type", "avg_heart_rate", "mean"), ("activity_type", "stress_level", "mean"),
+          (["gender", "stress_level"], "stress_level", "count"), (["gender"], "resting_heart_rate", "mean"),
+          ("age_category", "stress_level", "mean"), ("age_category", "resting_heart_rate", "mean"),
+      ]],
+    ("mean hydration_level by activity_type",
+     lambda df: df.groupby("activity_type", observed=True)["hydration_level"].mean(),
+     lambda view: view.agg("activity_type", "hydration_level", "mean")),
+    ("mean resting_heart_rate by activity_type",
+     lambda df: df.groupby("activity_type", observed=True)["resting_heart_rate"].mean(),
+     lambda view: view.agg("activity_type", "resting_heart_rate", "mean")),
+    ("count intensity by activity_type",
+     lambda df: df.groupby("activity_type", observed=True)["intensity"].count(),
+     lambda view: view.agg("activity_type", "intensity", "count")),
+    ("mean hydration_level by health_condition",
+     lambda df: df.groupby("health_condition", observed=True)["hydration_level"].mean(),
+     lambda view: view.agg("health_condition", "hydration_level", "mean")),
+    ("mean stress_level by fitness_level",
+     lambda df: df.groupby("fitness_level", observed=True)["stress_level"].mean(),
+     lambda view: view.agg("fitness_level", "stress_level", "mean")),
+    ("sum calories_burned by health_condition",
+     lambda df: df.groupby("health_condition", observed=True)["calories_burned"].sum(),
+     lambda view: view.agg("health_condition", "calories_burned", "sum")),
+    ("most popular activity_type",
+     lambda df: df["activity_type"].value_counts().idxmax(),
+     lambda view: view.value_counts("activity_type").idxmax()),
+]
+
+
+@pytest.fixture(scope="module")
+def data(tmp_path_factory):
+    # Few rows per cell, so that value_counts has ties to order
+    path = tmp_path_factory.mktemp("data") / "sampled_data.csv"
+    make_dataset(1_500, num_participants=60).to_csv(path, index=False)
+    return load_frame(str(path.with_suffix(".feather")), str(path))
+
+
+def filter_rows(df, gender, age_category, month):
+    # deploy.py's original sidebar filter
+    if gender == "All":
+        return df[(df['age_category'] == age_category) & (df['month_name'] == month)]
+    return df[(df['gender'] == gender) & (df['age_category'] == age_category) & (df['month_name'] == month)]
+
+
+def assert_same(expected, actual, name):
+    if isinstance(expected, pd.Series):
+        # Labels in the same order: the charts plot them in this order
+        assert list(expected.index) == list(actual.index), name
+        assert np.allclose(expected.to_numpy(float), actual.to_numpy(float), equal_nan=True), name
+    elif isinstance(expected, str):
+        assert expected == actual, name
+    else:
+        assert np.isclose(expected, actual, equal_nan=True), name
+
+
+@pytest.mark.parametrize("gender", ["All", "Female", "Male", "Other"])
+def test_cube_matches_original_expressions(data, gender):
+    cube = AggregateCube(data)
+    for age_category, month in itertools.product(data['age_category'].cat.categories,
+                                                 data['month_name'].cat.categories):
+        filtered_data = filter_rows(data, gender, age_category, month)
+        view = cube.select(gender, age_category, month)
+        assert view.rows() == len(filtered_data)
+        for name, original, from_cube in EXPRESSIONS:
+            if not len(filtered_data) and name == "most popular activity_type":
+                continue
+            assert_same(original(filtered_data), from_cube(view), (name, gender, age_category, month))
+
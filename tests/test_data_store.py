@@ -0,0 +1,31 @@
+import os
+
+import pandas as pd
+
+from benchmarks.synthetic import make_dataset
+from data_store import convert_csv, load_frame
+
+# The typed store against the CSV it was converted from.
+
+
+def test_store_matches_csv(tmp_path):
+    csv_path, store_path = str(tmp_path / "sampled_data.csv"), str(tmp_path / "sampled_data.feather")
+    make_dataset(500).to_csv(csv_path, index=False)
+    from_csv = load_frame(store_path, csv_path)
+    convert_csv(csv_path, store_path)
+    from_store = load_frame(store_path, csv_path)
+    assert from_store.attrs["version"].startswith("sampled_data.feather:")
+    pd.testing.assert_frame_equal(from_csv, from_store, check_like=True)
+
+
+def test_csv_newer_than_store_is_read(tmp_path):
+    csv_path, store_path = str(tmp_path / "sampled_data.csv"), str(tmp_path / "sampled_data.feather")
+    make_dataset(500).to_csv(csv_path, index=False)
+    convert_csv(csv_path, store_path)
+    # The CSV is replaced after the conversion
+    make_dataset(300, seed=1).to_csv(csv_path, index=False)
+    stat = os.stat(store_path)
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    data = load_frame(store_path, csv_path)
+    assert len(data) == 300
+    assert data.attrs["version"].startswith("sampled_data.csv:")
@@ -0,0 +1,47 @@
+import json
+import os
+
+import pytest
+
+from benchmarks.synthetic import make_dataset
+from charts import CHARTS
+from data_store import DASHBOARD_COLUMNS, optimize_dtypes
+from export_reports import export
+
+# Exports of a dataset too small to have rows in every combination.
+
+
+@pytest.fixture(scope="module")
+def data():
+    return optimize_dtypes(make_dataset(300, num_participants=10))[DASHBOARD_COLUMNS]
+
+
+@pytest.fixture(scope="module")
+def filters(data):
+    # A few combinations with rows and a few without; figures for all of
+    # them would take minutes
+    rows = data.groupby(["gender", "age_category", "month_name"], observed=False).size()
+    chosen = list(rows[rows > 0].index[:2]) + list(rows[rows == 0].index[:2])
+    return [("All",) + chosen[0][1:]] + [tuple(key) for key in chosen]
+
+
+def test_combinations_without_rows_are_exported(data, filters, tmp_path):
+    stats = export(data, str(tmp_path), "json", filters=filters)
+    with open(tmp_path / "index.json") as f:
+        combinations = json.load(f)["combinations"]
+    assert len(combinations) == stats["combinations"]
+    empty = [entry for entry in combinations if entry["rows"] == 0]
+    assert len(empty) == 2
+    for entry in combinations:
+        with open(tmp_path / entry["path"]) as f:
+            report = json.load(f)
+        assert report["rows"] == entry["rows"]
+        assert len(report["charts"]) == (len(CHARTS) if entry["rows"] else 0)
+
+
+def test_html_says_when_no_rows_match(data, filters, tmp_path):
+    export(data, str(tmp_path), "html", filters=filters)
+    with open(tmp_path / "index.json") as f:
+        entry = next(entry for entry in json.load(f)["combinations"] if entry["rows"] == 0)
+    with open(os.path.join(tmp_path, entry["path"]), encoding="utf-8") as f:
+        assert "No rows match the filters." in f.read()
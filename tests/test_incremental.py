@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from benchmarks.checks import assert_same_snapshot
+from benchmarks.synthetic import make_dataset, write_partition
+from data_store import DASHBOARD_COLUMNS, append_rows, optimize_dtypes
+from incremental import LiveDataset, Snapshot, read_partition
+
+# Partitions merged into a LiveDataset against a Snapshot rebuilt from all
+# of the rows, on a small synthetic frame.
+
+BASE_ROWS = 1_400
+BATCH_ROWS = 200
+
+
+@pytest.fixture
+def data():
+    data = optimize_dtypes(make_dataset(BASE_ROWS + 3 * BATCH_ROWS, num_participants=80))[DASHBOARD_COLUMNS].copy()
+    # Rows with a missing filter key are never selectable but must not move the others
+    data.iloc[::17, data.columns.get_loc("gender")] = np.nan
+    data.iloc[5::23, data.columns.get_loc("month_name")] = np.nan
+    return data
+
+
+def test_merged_partitions_match_rebuild(data, tmp_path):
+    base = data.iloc[:BASE_ROWS].copy()
+    base.attrs["version"] = "base"
+    live = LiveDataset(base, str(tmp_path))
+    rebuilt = base
+    for part in range(3):
+        start = BASE_ROWS + part * BATCH_ROWS
+        batch = data.iloc[start:start + BATCH_ROWS].copy()
+        if part == 2:
+            # A value no earlier row has, to exercise label growth
+            batch["activity_type"] = batch["activity_type"].cat.add_categories(["Rowing"])
+            batch.iloc[::7, batch.columns.get_loc("activity_type")] = "Rowing"
+        path = write_partition(str(tmp_path), part, batch)
+        rebuilt = append_rows(rebuilt, read_partition(path))
+        assert live.refresh() == len(batch)
+
+    assert live.refresh() == 0
+    assert live.snapshot.version == "base+3"
+    assert_same_snapshot(Snapshot.build(rebuilt), live.snapshot)
+
+
+def test_unfinished_partitions_are_not_merged(data, tmp_path):
+    live = LiveDataset(data.iloc[:BASE_ROWS].copy(), str(tmp_path))
+    data.iloc[BASE_ROWS:].to_csv(tmp_path / ".part-00000.csv", index=False)
+    assert live.refresh() == 0
+    (tmp_path / ".part-00000.csv").rename(tmp_path / "part-00000.csv")
+    assert live.refresh() == len(data) - BASE_ROWS
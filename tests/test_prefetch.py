@@ -0,0 +1,55 @@
+import pytest
+
+import prefetch
+from benchmarks.synthetic import make_dataset
+from charts import Selection
+from data_store import DASHBOARD_COLUMNS, optimize_dtypes
+from figure_cache import FigureCache
+from incremental import Snapshot
+from prefetch import Prefetcher, adjacent_selections
+
+# Prefetched figures, and the per-session state the Prefetcher keeps.
+
+CHART_IDS = ["overview_section.fig_bmi", "engagement_section.fig_gender"]
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    return Snapshot.build(optimize_dtypes(make_dataset(1_000, num_participants=50))[DASHBOARD_COLUMNS], "test")
+
+
+def rerun(prefetcher, owner, dataset, filters):
+    # What deploy.py does around one rerun
+    prefetcher.figure_cache.invalidate(dataset.version)
+    prefetcher.start_rerun(owner)
+    prefetcher.finish_rerun(owner)
+    selections = adjacent_selections(*filters, dataset.index.options['gender'])
+    prefetcher.schedule(owner, dataset, selections, CHART_IDS)
+    return selections
+
+
+def test_adjacent_selections_are_cached(dataset):
+    cache = FigureCache(64 * 2**20)
+    prefetcher = Prefetcher(cache, workers=1)
+    selections = rerun(prefetcher, "session", dataset, ([], ["Adult"], ["May"]))
+    prefetcher.executor.shutdown(wait=True)
+    for filters in selections:
+        for chart_id in CHART_IDS:
+            key = cache.key(chart_id, Selection(dataset, *filters).filters, dataset.version)
+            assert key in cache, (chart_id, filters)
+
+
+def test_finished_sessions_are_forgotten(dataset, monkeypatch):
+    prefetcher = Prefetcher(FigureCache(64 * 2**20), workers=1)
+    for session in range(20):
+        rerun(prefetcher, f"session-{session}", dataset, ([], ["Adult"], ["May"]))
+    prefetcher.executor.shutdown(wait=True)
+    assert not prefetcher.generations and not prefetcher.reruns and not prefetcher.pending
+
+    # A session whose rerun never finished, e.g. it failed and was closed
+    prefetcher.start_rerun("failed")
+    assert set(prefetcher.generations) == set(prefetcher.reruns) == {"failed"}
+    monkeypatch.setattr(prefetch, "FOREGROUND_TIMEOUT", 0.0)
+    prefetcher.start_rerun("last")
+    prefetcher.finish_rerun("last")
+    assert not prefetcher.generations and not prefetcher.reruns and not prefetcher.pending
@@ -0,0 +1,30 @@
+import glob
+import os
+
+import pandas as pd
+
+from benchmarks.synthetic import make_dataset
+from incremental import PartitionWatcher
+from prepare_data import prepare
+
+# Partition files written by prepare_data.py, as an incremental.py watcher
+# picks them up.
+
+
+def test_partitions_are_complete_and_never_overwritten(tmp_path):
+    source = tmp_path / "source.csv"
+    make_dataset(2_000, num_participants=100).drop(columns="participant_id").to_csv(source, index=False)
+    partitions = str(tmp_path / "partitions")
+    watcher = PartitionWatcher(partitions)
+
+    first = prepare(str(source), "", partitions, chunk_rows=500, num_participants=100, run_id="first")
+    merged = watcher.poll()
+    watcher.mark_seen(merged)
+    assert sum(len(pd.read_csv(path)) for path in merged) == first["rows_out"]
+    assert not glob.glob(os.path.join(partitions, "**", ".*"), recursive=True)
+
+    # A re-run adds files next to the merged ones instead of replacing them
+    mtimes = {path: os.stat(path).st_mtime_ns for path in merged}
+    second = prepare(str(source), "", partitions, chunk_rows=500, num_participants=100, run_id="second")
+    assert sum(len(pd.read_csv(path)) for path in watcher.poll()) == second["rows_out"]
+    assert {path: os.stat(path).st_mtime_ns for path in merged} == mtimes
@@ -0,0 +1,66 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import make_dataset
+from data_store import DASHBOARD_COLUMNS, optimize_dtypes
+from sketches import SketchCube
+
+# Sketch estimates against what the page shows once the rows are scanned
+# (pandas' participant count and median), for every sidebar selection of a
+# small synthetic frame, and merged sketches against one built from all rows.
+
+
+@pytest.fixture(scope="module")
+def data():
+    return optimize_dtypes(make_dataset(3_000, num_participants=400))[DASHBOARD_COLUMNS]
+
+
+def selections(data):
+    for gender, age_category, month in itertools.product(["All"] + list(data['gender'].cat.categories),
+                                                         data['age_category'].cat.categories,
+                                                         data['month_name'].cat.categories):
+        mask = (data['age_category'] == age_category) & (data['month_name'] == month)
+        if gender != "All":
+            mask &= data['gender'] == gender
+        yield (gender, age_category, month), data[mask]
+
+
+def test_distinct_participants_within_standard_errors(data):
+    sketches = SketchCube(data)
+    errors = []
+    for filters, filtered_data in selections(data):
+        estimate, error = sketches.select(*filters).distinct()
+        errors.append(abs(estimate - len(filtered_data['participant_id'].unique())) / error)
+    errors = np.array(errors)
+    assert np.mean(errors <= 2) >= 0.9 and errors.max() <= 4, errors.max()
+
+
+def test_median_within_bound_of_pandas_median(data):
+    sketches = SketchCube(data, columns=["resting_heart_rate", "bmi", "hours_sleep"])
+    for filters, filtered_data in selections(data):
+        for col in sketches.columns:
+            expected = filtered_data[col].median()
+            estimate, bound = sketches.select(*filters).quantile(col, 0.5)
+            if np.isnan(expected):
+                assert np.isnan(estimate), (filters, col)
+            else:
+                assert abs(estimate - expected) <= bound * (1 + 1e-9), (filters, col, estimate, expected)
+
+
+@pytest.mark.parametrize("missing", [None, "head", "tail"])
+def test_merge_matches_rebuild(data, missing):
+    # Also when one side has no values for the quantile column at all
+    data = data.astype({"resting_heart_rate": np.float64})
+    split = len(data) * 3 // 4
+    if missing:
+        rows = slice(None, split) if missing == "head" else slice(split, None)
+        data.iloc[rows, data.columns.get_loc("resting_heart_rate")] = np.nan
+    expected = SketchCube(data)
+    merged = SketchCube(data.iloc[:split], expected.labels).merge(data.iloc[split:], expected.labels)
+    assert np.array_equal(merged.registers, expected.registers)
+    n_slots = expected.counts["resting_heart_rate"].shape[-1]
+    assert merged.offsets["resting_heart_rate"] == expected.offsets["resting_heart_rate"]
+    assert np.array_equal(merged.counts["resting_heart_rate"][..., :n_slots], expected.counts["resting_heart_rate"])
+    assert not merged.counts["resting_heart_rate"][..., n_slots:].any()
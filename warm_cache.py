@@ -0,0 +1,156 @@
+import argparse
+import glob
+import hashlib
+import logging
+import os
+import pickle
+import time
+
+from bitmap_index import RANGE_COLUMNS
+from charts import CHARTS, Binned, Selection, default_filters
+from data_store import CSV_PATH, STORE_PATH, file_version, load_frame, store_is_current
+from figure_cache import FigureCache, max_bytes_from_env
+from incremental import Snapshot
+
+# Fast startup. A cold dashboard process parses the data file and builds the
+# filter index, aggregate cube, sketches and participant index on its first
+# session. The warm cache is that Snapshot, with the parts built lazily on a
+# first rerun (histogram bin edges, slider bounds) filled in, pickled to
+# WARM_CACHE_DIR under a hash of the data file's contents: a restart, or
+# another replica with the same file, unpickles it instead of rebuilding,
+# and a changed file hashes differently, so its stale cache is replaced.
+#
+# `python warm_cache.py` writes the cache, e.g. as a deploy step.
+# `python warm_cache.py --serve` also builds the default selection's figures
+# (importing plotly) and only then starts the Streamlit server in the same
+# process, so the first session finds the dataset and its figures in memory.
+
+WARM_CACHE_DIR = ".warm_cache"
+# Part of every cache file name; bump it when Snapshot's pickled layout changes
+CACHE_FORMAT = 1
+HASH_CHUNK = 2**20
+
+logger = logging.getLogger(__name__)
+
+_digests = {}  # file_version(path) -> content hash
+_snapshots = {}  # cache file path -> Snapshot loaded or built in this process
+# The FigureCache filled before the server started; deploy.py uses it when set
+figure_cache = None
+
+
+def data_file(store_path=STORE_PATH, csv_path=CSV_PATH):
+    # The file load_frame reads
+    return store_path if store_is_current(store_path, csv_path) else csv_path
+
+
+def file_digest(path):
+    # Hashed once per process for each modification of the file
+    version = file_version(path)
+    if version not in _digests:
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+                digest.update(chunk)
+        _digests[version] = digest.hexdigest()
+    return _digests[version]
+
+
+def warm(snapshot):
+    # Build what a first rerun would otherwise build lazily
+    for chart in CHARTS.values():
+        if isinstance(chart.prepare, Binned):
+            snapshot.bins.edges_for(chart.prepare.x)
+    for column in RANGE_COLUMNS:
+        snapshot.index.bitmaps.value_range(column)
+    return snapshot
+
+
+def cache_path(path, directory=WARM_CACHE_DIR):
+    return os.path.join(directory, f"{os.path.basename(path)}-{file_digest(path)}-v{CACHE_FORMAT}.pickle")
+
+
+def _write(cache_file, snapshot, path):
+    # Write then rename, so a concurrent reader never sees half a file, and
+    # remove the caches of earlier versions of the data file
+    directory = os.path.dirname(cache_file)
+    temporary = os.path.join(directory, f".{os.path.basename(cache_file)}.{os.getpid()}")
+    with open(temporary, "wb") as f:
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary, cache_file)
+    for stale in glob.glob(os.path.join(directory, f"{glob.escape(os.path.basename(path))}-*.pickle")):
+        if stale != cache_file:
+            os.remove(stale)
+
+
+def load_snapshot(store_path=STORE_PATH, csv_path=CSV_PATH, directory=WARM_CACHE_DIR, workers=1):
+    # (snapshot, where it came from: "memory", "disk" or "built")
+    path = data_file(store_path, csv_path)
+    cache_file = cache_path(path, directory)
+    if cache_file in _snapshots:
+        return _snapshots[cache_file], "memory"
+    snapshot = None
+    if os.path.exists(cache_file):
+        try:
+            with open(cache_file, "rb") as f:
+                snapshot, source = pickle.load(f), "disk"
+        except Exception:
+            logger.exception("Unreadable warm cache %s, rebuilding it", cache_file)
+    if snapshot is None:
+        data = load_frame(store_path, csv_path)
+        # Tied to the contents rather than the modification time, like the cache file
+        version = f"{os.path.basename(path)}:{file_digest(path)}"
+        snapshot, source = warm(Snapshot.build(data, version, workers=workers)), "built"
+        os.makedirs(directory, exist_ok=True)
+        _write(cache_file, snapshot, path)
+    _snapshots[cache_file] = snapshot
+    return snapshot, source
+
+
+def build_figures(snapshot, cache, selections=None):
+    # Every chart's figure for the given (gender, age_category, month)
+    # selections, the sidebar default if none, put into a FigureCache
+    cache.invalidate(snapshot.version)
+    for filters in selections or [default_filters(snapshot.index)]:
+        selection = Selection(snapshot, *filters)
+        for chart_id, chart in CHARTS.items():
+            cache.put(cache.key(chart_id, selection.filters), chart.build(selection))
+    return len(cache.entries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the dashboard's warm cache, and optionally serve the dashboard from it.")
+    parser.add_argument("--store", default=os.environ.get("DATA_STORE_PATH", STORE_PATH))
+    parser.add_argument("--csv", default=os.environ.get("DATA_CSV_PATH", CSV_PATH))
+    parser.add_argument("--cache-dir", default=os.environ.get("WARM_CACHE_DIR", WARM_CACHE_DIR))
+    parser.add_argument("--serve", action="store_true", help="start the dashboard once warm")
+    parser.add_argument("--port", type=int)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    snapshot, source = load_snapshot(args.store, args.csv, args.cache_dir,
+                                     int(os.environ.get("AGGREGATE_WORKERS", "1")))
+    print(f"Snapshot of {len(snapshot.index.data):,} rows {'loaded from' if source == 'disk' else 'written to'} "
+          f"{cache_path(data_file(args.store, args.csv), args.cache_dir)} in {time.perf_counter() - start:.2f} s")
+    if not args.serve:
+        return
+
+    global figure_cache
+    start = time.perf_counter()
+    figure_cache = FigureCache(max_bytes_from_env())
+    figures = build_figures(snapshot, figure_cache)
+    print(f"{figures} figures of the default selection built in {time.perf_counter() - start:.2f} s")
+    # deploy.py reads the same data files and cache directory, and finds this process's snapshot in memory
+    os.environ["WARM_CACHE_DIR"] = args.cache_dir
+    os.environ["DATA_STORE_PATH"] = args.store
+    os.environ["DATA_CSV_PATH"] = args.csv
+    from streamlit.web import bootstrap
+    flag_options = {"server_port": args.port}
+    bootstrap.load_config_options(flag_options)
+    bootstrap.run(os.path.join(os.path.dirname(os.path.abspath(__file__)), "deploy.py"), False, [], flag_options)
+
+
+if __name__ == "__main__":
+    # Run through the importable module: deploy.py imports warm_cache, and
+    # must see the snapshot and figures loaded here rather than a copy's
+    import warm_cache
+    warm_cache.main()